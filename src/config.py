@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,6 +10,13 @@ class Settings(BaseSettings):
 
     docs_path: str = os.getenv("SOURCE_MCP_INDEX_DIR", ".")
     zvec_path: str = "./zvec_db"
+    # More project roots served by the same process and model, each with its own
+    # index under <root>/.source-mcp/
+    extra_projects: List[str] = []
+    # Shared daemon: one process per user owns the model, indexes and watchers; the
+    # stdio server each MCP client starts only forwards tool calls to it over a socket
+    shared_daemon: bool = False
+    daemon_socket: str | None = None  # None = $XDG_RUNTIME_DIR/source-mcp.sock or ~/.cache/source-mcp/
     
     # Embedding settings
     embedding_provider: str = "fastembed"  # "fastembed" or "openai"
@@ -18,6 +26,34 @@ class Settings(BaseSettings):
     embedding_model: str | None = None
     openai_api_key: str | None = None
 
+    # Incremental indexing: hash file contents so touched-but-unchanged files
+    # (branch switches, `touch`, no-op formatters) skip re-embedding
+    content_hash: bool = True
+    # In a git work tree, find changed/deleted files via git instead of walking the tree
+    git_scan: bool = True
+    # Threads for directory listing / stat during discovery (each is a round trip on NFS/SMB/bind mounts)
+    scan_workers: int = 16
+    # File watcher: threads indexing changed files, and how many paths may wait before the watcher blocks
+    watch_workers: int = 2
+    watch_queue_size: int = 10000
+    # "native" (inotify & co.), "poll" (manifest-based polling) or "auto" (native, polling on
+    # network/VM filesystems or when native watching cannot start)
+    watch_mode: str = "auto"
+    poll_interval: float = 2.0     # seconds between polling cycles
+    poll_cpu_budget: float = 0.1   # fraction of one core a polling cycle may use
+    # Local embedding: indexing embeds this many chunks per scheduler slot (a waiting
+    # search gets the engine at the next batch boundary), with this many ONNX threads
+    # (None = all cores)
+    embed_batch_size: int = 32
+    index_threads: int | None = None
+    # Optional second model session reserved for search queries (batch size 1, few
+    # threads): search latency then no longer depends on the indexing settings above
+    query_session: bool = False
+    query_threads: int = 2
+    # Worker processes embedding large scans (each loads its own model): 0 = from CPU
+    # count and available memory, 1 = embed in-process only
+    embed_processes: int = 0
+
     # Web Dashboard settings
     web_port: int = 8000
     host: str = "127.0.0.1"
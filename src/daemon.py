@@ -0,0 +1,217 @@
+"""Shared indexing daemon: one process per machine owns the model, indexes and watchers.
+
+MCP clients talk to it through a Unix socket, one JSON request per line:
+``{"method": ..., "root": <client's project root>, "params": {...}}`` and
+back ``{"result": ...}`` or ``{"error": ...}``. The stdio server run by each
+MCP client becomes a thin proxy (``--shared``) that starts the daemon if
+none is listening and forwards its tool calls.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+try:  # POSIX only: shared mode is unavailable without it
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+from .services.monitor import logger
+
+
+START_TIMEOUT_SECS = 180.0   # model load + first collection open in a fresh daemon
+CONNECT_RETRY_SECS = 0.2
+LOG_NAME = "daemon.log"
+
+Handler = Callable[..., str]
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and fcntl is not None
+
+
+def default_socket_path() -> Path:
+    """Per-user socket: $XDG_RUNTIME_DIR/source-mcp.sock, else ~/.cache/source-mcp/daemon.sock."""
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime and Path(runtime).is_dir():
+        return Path(runtime) / "source-mcp.sock"
+    return Path.home() / ".cache" / "source-mcp" / "daemon.sock"
+
+
+def _private_dir(path: Path):
+    """Create the socket's directory readable by its owner only, or check an existing one.
+
+    Refuses a directory owned by another user; tightens one of ours that
+    others could list or write (other than sticky dirs like /tmp, where
+    they cannot replace our files).
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = path.stat()
+    if st.st_uid != os.getuid():
+        raise RuntimeError(f"Socket directory {path} belongs to another user")
+    if st.st_mode & 0o077 and not st.st_mode & stat.S_ISVTX:
+        os.chmod(path, 0o700)
+
+
+# ── Daemon side ─────────────────────────────────────────────
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        with self.server.connections_lock:
+            self.server.connections.add(self.request)
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(self.request)
+        super().finish()
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                handler = self.server.handlers.get(request.get("method"))
+                if handler is None:
+                    response = {"error": f"Unknown method {request.get('method')!r}"}
+                else:
+                    response = {"result": handler(request.get("root"), **request.get("params", {}))}
+            except Exception as exc:
+                logger.error(f"Daemon request failed: {exc}")
+                response = {"error": str(exc)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves ``handlers`` (method name -> callable(root, **params) -> str) on a Unix socket.
+
+    An exclusive flock on ``<socket>.lock`` makes it the only daemon for
+    that socket: a second one raises RuntimeError instead of stealing it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, handlers: Dict[str, Handler]):
+        self.socket_path = Path(socket_path)
+        _private_dir(self.socket_path.parent)
+        self.handlers = handlers
+        self.connections: set = set()  # open client sockets, closed on shutdown
+        self.connections_lock = threading.Lock()
+        self._lock_file = open(self.socket_path.with_name(self.socket_path.name + ".lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            raise RuntimeError(f"Another daemon owns {self.socket_path}")
+        self.socket_path.unlink(missing_ok=True)  # left over by a daemon that died
+        # Bind under a private umask: the socket never exists with wider permissions
+        umask = os.umask(0o077)
+        try:
+            super().__init__(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+        with self.connections_lock:
+            for conn in self.connections:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)  # proxies see EOF and reconnect
+                except OSError:
+                    pass
+        self._lock_file.close()
+
+
+# ── Proxy side ──────────────────────────────────────────────
+class DaemonClient:
+    """Forwards calls to the daemon for one project root, starting the daemon when needed."""
+
+    def __init__(self, socket_path: Path, root: str, spawn: Callable[[], None] | None = None):
+        self.socket_path = Path(socket_path)
+        self.root = root
+        self._spawn = spawn or (lambda: spawn_daemon(self.socket_path, root))
+        self._sock: socket.socket | None = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def call(self, method: str, **params) -> str:
+        with self._lock:
+            try:
+                return self._call(method, params)
+            except OSError:  # daemon restarted or died: reconnect (starting it again) once
+                self._close()
+                return self._call(method, params)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _call(self, method: str, params: dict) -> str:
+        if self._sock is None:
+            self._connect()
+        request = {"method": method, "root": self.root, "params": params}
+        self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def _connect(self):
+        if not self._try_connect():
+            logger.info(f"No daemon on {self.socket_path}; starting one")
+            self._spawn()
+            deadline = time.monotonic() + START_TIMEOUT_SECS
+            while not self._try_connect():
+                if time.monotonic() > deadline:
+                    # Not an OSError: call() must not retry by spawning a second daemon
+                    raise RuntimeError(
+                        f"Daemon did not start listening on {self.socket_path} within "
+                        f"{START_TIMEOUT_SECS:.0f}s; see {self.socket_path.parent / LOG_NAME}"
+                    )
+                time.sleep(CONNECT_RETRY_SECS)
+
+    def _try_connect(self) -> bool:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            return False
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        return True
+
+    def _close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def spawn_daemon(socket_path: Path, root: str):
+    """Start ``source-mcp daemon`` for ``root`` in its own session, logging next to the socket."""
+    _private_dir(socket_path.parent)
+    log = open(socket_path.parent / LOG_NAME, "ab")
+    subprocess.Popen(
+        [sys.executable, "-m", "src.main", "daemon", "--path", root, "--socket", str(socket_path)],
+        cwd=str(Path(__file__).resolve().parent.parent),
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=log,
+        start_new_session=True,  # outlives the MCP client that started it
+    )
+    log.close()
@@ -1,17 +1,29 @@
 import sys
 import os
 import argparse
+import logging
+import shutil
+import signal
 import threading
+import time
 import webbrowser
+from contextlib import contextmanager
 from pathlib import Path
+from typing import List
 
 import uvicorn
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+from . import daemon
 from .config import settings
+from .services.context_pack import estimate_tokens
+from .services.embed_pool import default_workers
 from .services.indexer import indexer
 from .services.monitor import logger, monitor
+from .services.projects import group_batch, projects
+from .services.search_filter import SearchFilter
+from .services.snapshot import SNAPSHOT_NAME
 from .web.app import app as web_app
 
 # ── MCP Server ──────────────────────────────────────────────
@@ -19,36 +31,170 @@ mcp = FastMCP("Source-MCP Local RAG Server")
 
 
 @mcp.tool()
-async def search_knowledge_base(query: str, limit: int = 5) -> str:
+async def search_knowledge_base(
+    query: str,
+    limit: int = 5,
+    project: str | None = None,
+    path_glob: str | None = None,
+    ext: str | None = None,
+    dir: str | None = None,
+    language: str | None = None,
+    max_tokens: int | None = None,
+) -> str:
     """
     Search for relevant context in the indexed documents.
 
     Args:
         query: The question or topic to search for.
         limit: Maximum number of text chunks to return.
+        project: Project to search, by name or root path (default: the main project).
+            "*" searches every project and merges the results.
+        path_glob: Only files whose path (relative to the project root) matches,
+            e.g. "src/**/*.py"; a pattern without "/" matches file names anywhere.
+        ext: Only these extensions, comma-separated, e.g. "py" or "ts,tsx".
+        dir: Only files under this directory, relative to the project root, e.g. "src/api".
+        language: Only files in this language, e.g. "python", "markdown".
+        max_tokens: Size the answer by this token budget instead of `limit`: the best
+            passages are packed in, neighbouring chunks of a file merged into one span.
     """
     logger.info(f"Received search query: {query}")
-    results = indexer.query(query, limit)
+    filters = {"path_glob": path_glob, "ext": ext, "dir": dir, "language": language}
+    where = {name: value for name, value in filters.items() if value}
+    if max_tokens:
+        where["max_tokens"] = max_tokens
+    if daemon_client is not None:
+        return daemon_client.call("search", query=query, limit=limit, project=project, **where)
+    return search_text(query, limit, project, **where)
+
+
+@mcp.tool()
+async def search_knowledge_base_batch(
+    queries: List[str],
+    limit: int = 5,
+    project: str | None = None,
+    path_glob: str | None = None,
+    ext: str | None = None,
+    dir: str | None = None,
+    language: str | None = None,
+) -> str:
+    """
+    Run several related searches in one call; results are grouped per query.
+
+    Cheaper than calling search_knowledge_base repeatedly: the queries are
+    embedded together and searched concurrently. A chunk found by more than
+    one query is listed only under the first.
+
+    Args:
+        queries: The questions or topics to search for.
+        limit: Maximum number of text chunks per query.
+        project, path_glob, ext, dir, language: As for search_knowledge_base,
+            applied to every query.
+    """
+    logger.info(f"Received batch of {len(queries)} search queries")
+    filters = {"path_glob": path_glob, "ext": ext, "dir": dir, "language": language}
+    where = {name: value for name, value in filters.items() if value}
+    if daemon_client is not None:
+        return daemon_client.call("search_batch", queries=queries, limit=limit, project=project, **where)
+    return search_batch_text(queries, limit, project, **where)
+
+
+@mcp.tool()
+async def get_index_stats(project: str | None = None) -> str:
+    """Get current statistics about the vector index (of one project, or "*" for all)."""
+    if daemon_client is not None:
+        return daemon_client.call("stats", project=project)
+    return stats_text(project)
+
+
+def search_text(
+    query: str, limit: int = 5, project: str | None = None, max_tokens: int | None = None, **filters
+) -> str:
+    where = SearchFilter(**filters) or None
+    try:
+        if project:
+            results = projects.query(query, limit, project, where=where, max_tokens=max_tokens)
+        else:
+            results = indexer.query(query, limit, where=where, max_tokens=max_tokens)
+    except KeyError as e:
+        return e.args[0]
+    note = readiness_note(project)
 
     if not results:
-        return "No relevant information found in the local knowledge base."
+        return "No relevant information found in the local knowledge base." + note
 
     formatted_results = "\n\n---\n\n".join(results)
-    return f"Found {len(results)} relevant chunks:\n\n{formatted_results}"
+    if max_tokens:
+        size = estimate_tokens(formatted_results)
+        return f"Found {len(results)} relevant passages (~{size} of {max_tokens} tokens):\n\n{formatted_results}{note}"
+    return f"Found {len(results)} relevant chunks:\n\n{formatted_results}{note}"
 
 
-@mcp.tool()
-async def get_index_stats() -> str:
-    """Get current statistics about the vector index."""
-    stats = indexer.get_stats()
-    return str(stats)
+def search_batch_text(queries: List[str], limit: int = 5, project: str | None = None, **filters) -> str:
+    queries = [q for q in queries if q.strip()]
+    if not queries:
+        return "No queries given."
+    where = SearchFilter(**filters) or None
+    try:
+        if project:
+            results = projects.search_batch(queries, limit, project, where=where)
+        else:
+            results = [indexer.chunk_positions(items) for items in indexer.search_batch(queries, limit, where=where)]
+    except KeyError as e:
+        return e.args[0]
+    note = readiness_note(project)
+
+    sections = []
+    for position, group in enumerate(group_batch(queries, results), 1):
+        lines = [f"## {position}. {group['query']}"]
+        if group["results"]:
+            lines.append(f"Found {len(group['results'])} relevant chunks:\n\n" + "\n\n---\n\n".join(group["results"]))
+        elif not group["repeated"]:
+            lines.append("No relevant information found in the local knowledge base.")
+        for earlier, count in sorted(group["repeated"].items()):
+            lines.append(f"(+{count} chunk{'s' if count > 1 else ''} already listed under query {earlier + 1})")
+        sections.append("\n\n".join(lines))
+    return f"Results for {len(queries)} queries:\n\n" + "\n\n".join(sections) + note
+
+
+def readiness_note(project: str | None = None) -> str:
+    readiness = projects.readiness(project)
+    return "" if readiness == "ready" else f"\n\n(Index not ready: {readiness}; results may be incomplete.)"
+
+
+def stats_text(project: str | None = None) -> str:
+    if not project:
+        return str(indexer.get_stats())
+    try:
+        selected = projects.select(project)
+    except KeyError as e:
+        return e.args[0]
+    return str({name: service.get_stats() for name, service in selected})
 
 
 # ── Background services ────────────────────────────────────
+def open_indexes() -> bool:
+    """Open the main index and the extra projects' indexes (delayed to avoid side-effects on import)."""
+    Path(settings.docs_path).mkdir(parents=True, exist_ok=True)
+    Path(settings.zvec_path).mkdir(parents=True, exist_ok=True)
+    try:
+        indexer.configure()
+        indexer.initialize()
+    except Exception as e:
+        logger.error(f"Failed to initialize indexer: {e}")
+        return False
+    for root in settings.extra_projects:
+        try:
+            projects.add(root)
+        except Exception as e:
+            logger.error(f"Failed to open project {root}: {e}")
+    return True
+
+
 def start_background_services():
     logger.info("Starting background services...")
-    indexer.start_watching()
-    threading.Thread(target=indexer.index_directory, daemon=True).start()
+    threading.Thread(target=projects.warm_up, name="warm-up", daemon=True).start()
+    projects.start_watching()
+    threading.Thread(target=projects.index_all, daemon=True).start()
 
 
 def run_dashboard():
@@ -64,16 +210,236 @@ def run_dashboard():
     server.run()
 
 
-# ── CLI entry-point ─────────────────────────────────────────
-def main():
-    parser = argparse.ArgumentParser(description="Source-MCP Server")
-    parser.add_argument("--path", type=str, help="Path to the documents directory")
-    parser.add_argument("--embed-model", type=str, help="HuggingFace embedding model name")
-    parser.add_argument("--web-port", type=int, help="Port for the Web Dashboard")
-    parser.add_argument("--no-browser", action="store_true", help="Don't auto-open browser")
+# ── Headless indexing ──────────────────────────────────────
+HEADLESS_BATCH_SIZE = 256  # no searches to make room for: embed in large batches
+HEADLESS_CPU_SHARE = 1.0   # ...and no cores to keep free for them: embedding workers on all of them
 
-    args, _unknown = parser.parse_known_args()
 
+def run_index(full: bool = False) -> int:
+    """`source-mcp index`: index settings.docs_path without watcher or dashboard, then exit.
+
+    Exit status: 0 when every file was indexed, 2 when some files failed,
+    1 when the index could not be opened or the scan crashed. Files a
+    migration started by opening the index re-embedded count as indexed.
+    """
+    with _stderr_logs():
+        return _index_headless(full)
+
+
+@contextmanager
+def _stderr_logs():
+    handler = logging.StreamHandler(sys.stderr)  # nothing else shows the logs
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    try:
+        yield
+    finally:
+        logger.removeHandler(handler)
+
+
+def _index_headless(full: bool) -> int:
+    if not os.getenv("EMBED_BATCH_SIZE"):
+        settings.embed_batch_size = HEADLESS_BATCH_SIZE
+    if not os.getenv("EMBED_PROCESSES"):
+        settings.embed_processes = default_workers(cpu_share=HEADLESS_CPU_SHARE)
+    if full:
+        shutil.rmtree(settings.zvec_path, ignore_errors=True)
+    Path(settings.zvec_path).mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    try:
+        indexer.configure()
+        indexer.initialize()
+        rebuilt = indexer.wait_for_rebuild()  # e.g. a model change migrates the index first
+        if rebuilt and rebuilt.get("error"):
+            raise RuntimeError(f"{rebuilt['reason']} failed: {rebuilt['error']}")
+        result = indexer.index_directory()
+        vectors = indexer.get_stats()["total_vectors"]
+        indexer.close()
+    except Exception as e:
+        logger.error(f"Indexing failed: {e}")
+        return 1
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    stats = monitor.get_stats()
+    scanned = bool(result["to_index"])
+    indexed = stats["files_indexed"] if scanned else 0
+    chunks = stats["total_chunks"] if scanned else 0
+    failed = stats["files_failed"] if scanned else 0
+    if rebuilt:
+        indexed += rebuilt["files"]
+        chunks += rebuilt["chunks"]
+        failed += rebuilt["failed"]
+    print(
+        f"Indexed {indexed} files ({chunks} chunks) in {elapsed:.1f}s: "
+        f"{indexed / elapsed:.1f} files/s, {chunks / elapsed:.1f} chunks/s"
+    )
+    print(
+        f"  unchanged {result['unchanged']}, removed {result['removed']}, "
+        f"failed {failed}, filtered {stats['files_skipped']}"
+    )
+    if rebuilt:
+        print(f"  {rebuilt['reason']}: {rebuilt['files']} files rebuilt")
+    print(f"  index: {settings.zvec_path} ({vectors} vectors)")
+    return 2 if failed else 0
+
+
+# ── Snapshots ──────────────────────────────────────────────
+def default_snapshot_path() -> Path:
+    return Path(settings.zvec_path).parent / SNAPSHOT_NAME
+
+
+def run_export(snapshot: str | None = None) -> int:
+    """`source-mcp export`: write the index to a portable snapshot file.
+
+    Exit status: 0 on success, 1 when the index could not be opened or written.
+    """
+    target = Path(snapshot) if snapshot else default_snapshot_path()
+    with _stderr_logs():
+        try:
+            indexer.configure()
+            indexer.initialize()
+            result = indexer.export_snapshot(target)
+            indexer.close()
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            return 1
+    size_mb = target.stat().st_size / (1024 * 1024)
+    print(f"Exported {result['files']} files ({result['chunks']} chunks) to {target} ({size_mb:.1f} MB)")
+    if result["stale"]:
+        print(f"  left out {result['stale']} files changed since they were indexed")
+    return 0
+
+
+def run_import(snapshot: str | None = None) -> int:
+    """`source-mcp import`: reuse a snapshot's vectors, then embed whatever differs locally.
+
+    Exit status: 0 on success, 2 when some files failed to index, 1 when the
+    snapshot does not fit this index (other model) or could not be read.
+    """
+    source = Path(snapshot) if snapshot else default_snapshot_path()
+    if not os.getenv("EMBED_BATCH_SIZE"):
+        settings.embed_batch_size = HEADLESS_BATCH_SIZE
+    Path(settings.zvec_path).mkdir(parents=True, exist_ok=True)
+    with _stderr_logs():
+        try:
+            indexer.configure()
+            indexer.initialize()
+            imported = indexer.import_snapshot(source)
+            result = indexer.index_directory()
+            indexer.close()
+        except Exception as e:
+            logger.error(f"Import failed: {e}")
+            return 1
+    stats = monitor.get_stats()
+    embedded = stats["files_indexed"] if result["to_index"] else 0
+    failed = stats["files_failed"]
+    print(
+        f"Reused {imported['reused']} files from {source}, "
+        f"re-embedded {embedded} ({imported['mismatched']} differed locally)"
+    )
+    print(
+        f"  already indexed {imported['unchanged']}, removed {result['removed']}, failed {failed}"
+    )
+    return 2 if failed else 0
+
+
+# ── Shared daemon ──────────────────────────────────────────
+daemon_client: daemon.DaemonClient | None = None  # set in proxy mode: tools forward to the daemon
+_daemon_ready = threading.Event()
+
+
+def socket_path() -> Path:
+    return Path(settings.daemon_socket) if settings.daemon_socket else daemon.default_socket_path()
+
+
+def _daemon_search(root: str, query: str, limit: int = 5, project: str | None = None, **filters) -> str:
+    _daemon_ready.wait()
+    projects.ensure(root)
+    return search_text(query, limit, project or root, **filters)
+
+
+def _daemon_search_batch(
+    root: str, queries: List[str], limit: int = 5, project: str | None = None, **filters
+) -> str:
+    _daemon_ready.wait()
+    projects.ensure(root)
+    return search_batch_text(queries, limit, project or root, **filters)
+
+
+def _daemon_stats(root: str, project: str | None = None) -> str:
+    _daemon_ready.wait()
+    projects.ensure(root)
+    return stats_text(project or root)
+
+
+DAEMON_HANDLERS = {
+    "ping": lambda root: "pong",
+    "search": _daemon_search,
+    "search_batch": _daemon_search_batch,
+    "stats": _daemon_stats,
+}
+
+
+def run_daemon(path: Path) -> int:
+    """`source-mcp daemon`: own the model, indexes, watchers and dashboard; serve clients on a socket.
+
+    The socket is bound before the model loads, so proxies connect at once
+    and their first calls wait until the indexes are open. Projects of
+    clients are opened on their first call. Exit status: 0 when stopped (or
+    when another daemon already owns the socket), 1 when the index could
+    not be opened.
+    """
+    with _stderr_logs():
+        try:
+            server = daemon.DaemonServer(path, DAEMON_HANDLERS)
+        except RuntimeError as e:
+            logger.info(f"{e}; exiting.")
+            return 0
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            threading.Thread(target=server.serve_forever, name="daemon-socket", daemon=True).start()
+            logger.info(f"Daemon listening on {path}")
+            if not open_indexes():
+                return 1
+            threading.Thread(target=run_dashboard, daemon=True).start()
+            start_background_services()
+            _daemon_ready.set()
+            threading.Event().wait()  # until SIGTERM / Ctrl+C
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("Daemon stopping...")
+        finally:
+            server.shutdown()
+            server.server_close()
+            projects.stop_watching()
+    return 0
+
+
+def _connect_daemon():
+    try:
+        daemon_client.call("ping")
+    except Exception as e:
+        logger.error(f"Shared daemon unavailable: {e}")
+
+
+def run_proxy(path: Path) -> int:
+    """`source-mcp --shared`: a stdio MCP server without an index of its own."""
+    global daemon_client
+    daemon_client = daemon.DaemonClient(path, settings.docs_path)
+    # Connect (starting the daemon if needed) while the MCP client is still handshaking
+    threading.Thread(target=_connect_daemon, daemon=True).start()
+    try:
+        mcp.run(transport="stdio")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon_client.close()
+    return 0
+
+
+# ── CLI entry-point ─────────────────────────────────────────
+def apply_settings(args):
+    """Resolve the project, load its .env and apply env/CLI overrides to settings."""
     # Determine project root
     if args.path:
         project_path = Path(args.path).resolve()
@@ -104,26 +470,98 @@ def main():
         settings.openai_api_key = os.getenv("OPENAI_API_KEY")
     if os.getenv("WEB_PORT"):
         settings.web_port = int(os.getenv("WEB_PORT"))
+    if os.getenv("CONTENT_HASH"):
+        settings.content_hash = os.getenv("CONTENT_HASH").lower() not in ("0", "false", "no")
+    if os.getenv("GIT_SCAN"):
+        settings.git_scan = os.getenv("GIT_SCAN").lower() not in ("0", "false", "no")
+    if os.getenv("SCAN_WORKERS"):
+        settings.scan_workers = int(os.getenv("SCAN_WORKERS"))
+    if os.getenv("WATCH_WORKERS"):
+        settings.watch_workers = int(os.getenv("WATCH_WORKERS"))
+    if os.getenv("WATCH_MODE"):
+        settings.watch_mode = os.getenv("WATCH_MODE").lower()
+    if os.getenv("POLL_INTERVAL"):
+        settings.poll_interval = float(os.getenv("POLL_INTERVAL"))
+    if os.getenv("EMBED_BATCH_SIZE"):
+        settings.embed_batch_size = int(os.getenv("EMBED_BATCH_SIZE"))
+    if os.getenv("INDEX_THREADS"):
+        settings.index_threads = int(os.getenv("INDEX_THREADS"))
+    if os.getenv("QUERY_SESSION"):
+        settings.query_session = os.getenv("QUERY_SESSION").lower() not in ("0", "false", "no")
+    if os.getenv("QUERY_THREADS"):
+        settings.query_threads = int(os.getenv("QUERY_THREADS"))
+    if os.getenv("EMBED_PROCESSES"):
+        settings.embed_processes = int(os.getenv("EMBED_PROCESSES"))
+    if os.getenv("SOURCE_MCP_EXTRA_PROJECTS"):
+        settings.extra_projects = [p for p in os.getenv("SOURCE_MCP_EXTRA_PROJECTS").split(os.pathsep) if p]
+    if os.getenv("SOURCE_MCP_SHARED"):
+        settings.shared_daemon = os.getenv("SOURCE_MCP_SHARED").lower() not in ("0", "false", "no")
+    if os.getenv("SOURCE_MCP_SOCKET"):
+        settings.daemon_socket = os.getenv("SOURCE_MCP_SOCKET")
 
     # CLI overrides env
     if args.embed_model:
         settings.embedding_model = args.embed_model
     if args.web_port:
         settings.web_port = args.web_port
+    if args.project:
+        settings.extra_projects = args.project
+    if args.shared:
+        settings.shared_daemon = True
+    if args.socket:
+        settings.daemon_socket = args.socket
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Source-MCP Server")
+    parser.add_argument(
+        "command", nargs="?", choices=("serve", "index", "export", "import", "daemon"), default="serve",
+        help=(
+            "serve (default): MCP server with watcher and dashboard; index: build the index and exit; "
+            "export / import: write or load a portable index snapshot; "
+            "daemon: shared indexing daemon on a Unix socket (see --shared)"
+        ),
+    )
+    parser.add_argument("--path", type=str, help="Path to the documents directory")
+    parser.add_argument(
+        "--project", action="append", metavar="PATH",
+        help="Another project root to serve from this process (repeatable; shares the embedding model)",
+    )
+    parser.add_argument("--embed-model", type=str, help="HuggingFace embedding model name")
+    parser.add_argument("--web-port", type=int, help="Port for the Web Dashboard")
+    parser.add_argument("--no-browser", action="store_true", help="Don't auto-open browser")
+    parser.add_argument("--full", action="store_true", help="index: discard the existing index and rebuild it")
+    parser.add_argument(
+        "--shared", action="store_true",
+        help="serve: forward tool calls to the shared daemon (started if none is running)",
+    )
+    parser.add_argument("--socket", type=str, help="daemon: Unix socket path (default: per-user runtime dir)")
+    parser.add_argument(
+        "--snapshot", type=str,
+        help=f"export/import: snapshot file (default: .source-mcp/{SNAPSHOT_NAME} in the project)",
+    )
+
+    args, _unknown = parser.parse_known_args()
+    apply_settings(args)
+
+    if args.command == "index":
+        sys.exit(run_index(full=args.full))
+    if args.command == "export":
+        sys.exit(run_export(args.snapshot))
+    if args.command == "import":
+        sys.exit(run_import(args.snapshot))
+
+    if args.command == "daemon":
+        sys.exit(run_daemon(socket_path()))
+    if settings.shared_daemon:
+        if daemon.supported():
+            sys.exit(run_proxy(socket_path()))
+        logger.warning("Shared daemon mode needs Unix sockets; serving in-process.")
 
     logger.info(f"Project path: {settings.docs_path}")
     logger.info(f"Index path: {settings.zvec_path}")
 
-    # Ensure directories exist
-    Path(settings.docs_path).mkdir(parents=True, exist_ok=True)
-    Path(settings.zvec_path).mkdir(parents=True, exist_ok=True)
-
-    # Initialize indexer (delayed to avoid side-effects on import)
-    try:
-        indexer.configure()
-        indexer.initialize()
-    except Exception as e:
-        logger.error(f"Failed to initialize indexer: {e}")
+    if not open_indexes():
         sys.exit(1)
 
     # Start dashboard
@@ -132,7 +570,6 @@ def main():
     # Auto-open browser (with delay for server startup)
     if not args.no_browser:
         def open_browser():
-            import time
             time.sleep(1.5)
             url = f"http://{settings.host}:{settings.web_port}"
             logger.info(f"Opening dashboard in browser: {url}")
@@ -156,7 +593,7 @@ def main():
         sys.exit(1)
     finally:
         logger.info("Stopping indexer watcher...")
-        indexer.stop_watching()
+        projects.stop_watching()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""Token-budgeted packing of search results into merged per-file spans."""
+
+from typing import Callable, Dict, List
+
+CHARS_PER_TOKEN = 4  # rough size of a token in source code and prose (no tokenizer needed)
+SEPARATOR = "\n\n---\n\n"  # between spans, as search results are joined
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class _Span:
+    """Consecutive chunks of one file, merged into one text."""
+
+    def __init__(self, item: Dict):
+        self.items = [item]
+        self.score = item["initial_score"]
+
+    @property
+    def first(self) -> int:
+        return self.items[0]["chunk"]
+
+    @property
+    def last(self) -> int:
+        return self.items[-1]["chunk"]
+
+    def text(self, overlap: int) -> str:
+        merged = self.items[0]["text"]
+        for item in self.items[1:]:
+            text = item["text"]
+            # Neighbouring chunks share exactly `overlap` characters (see TextChunker)
+            shared = min(overlap, len(text))
+            merged += text[shared:] if merged.endswith(text[:shared]) else "\n" + text
+        return merged
+
+    def result(self, overlap: int) -> Dict:
+        return {**self.items[0], "text": self.text(overlap), "initial_score": self.score}
+
+
+def pack(items: List[Dict], budget: int, overlap: int, format: Callable[[Dict], str]) -> List[str]:
+    """Fill ``budget`` tokens with the best results, merging neighbouring chunks of a file.
+
+    ``items`` are search results (``doc``, ``text``, ``initial_score``),
+    best first; ``chunk`` is the chunk's position in its file, or None when
+    unknown (never merged). A chunk next to one already taken extends that
+    span and only costs its new text. Chunks that do not fit are skipped in
+    favour of smaller ones further down (if not even the best one fits, it
+    is truncated). Spans come back best first, each formatted by ``format``.
+    """
+    spans_by_file: Dict[tuple, List[_Span]] = {}
+    spans: List[_Span] = []
+
+    def render(candidate: List[_Span]) -> List[str]:
+        ordered = sorted(candidate, key=lambda span: span.score, reverse=True)
+        return [format(span.result(overlap)) for span in ordered]
+
+    def cost(candidate: List[_Span]) -> int:
+        return estimate_tokens(SEPARATOR.join(render(candidate)))
+
+    for item in items:
+        key = (item.get("project"), item["doc"].fields.get("file_path", ""))
+        position = item.get("chunk")
+        file_spans = spans_by_file.setdefault(key, [])
+        before = [(span, list(span.items)) for span in file_spans]
+
+        joined = None
+        if position is not None:
+            for span in file_spans:
+                if span.last == position - 1:
+                    span.items.append(item)
+                elif span.first == position + 1:
+                    span.items.insert(0, item)
+                else:
+                    continue
+                span.score = max(span.score, item["initial_score"])
+                joined = span
+                break
+        if joined is not None:
+            # The new chunk may also close the gap to another span of the file
+            for other in file_spans:
+                if other.first == joined.last + 1:
+                    joined.items = joined.items + other.items
+                elif other.last == joined.first - 1:
+                    joined.items = other.items + joined.items
+                else:
+                    continue
+                joined.score = max(joined.score, other.score)
+                file_spans.remove(other)
+                spans.remove(other)
+                break
+        else:
+            joined = _Span(item)
+            file_spans.append(joined)
+            spans.append(joined)
+
+        if cost(spans) > budget:
+            # Undo: restore the file's spans as they were
+            for span in file_spans:
+                if span in spans:
+                    spans.remove(span)
+            file_spans[:] = []
+            for span, span_items in before:
+                span.items = span_items
+                span.score = max(i["initial_score"] for i in span_items)
+                file_spans.append(span)
+                spans.append(span)
+
+    if not spans and items:
+        # Not even the best chunk fits: a truncated one beats an empty answer
+        return [format(items[0])[: budget * CHARS_PER_TOKEN]]
+    return render(spans)
@@ -0,0 +1,214 @@
+"""Process pool of embedding workers for large scans."""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .monitor import logger
+
+
+WORKER_MEMORY_MB = 700   # resident size of one worker with a MiniLM-class ONNX model
+MAX_DIM = 4096           # largest embedding dimension a result buffer must hold
+WORKER_NICE = 10         # workers yield the CPU to the server process (queries)
+START_TIMEOUT_SECS = 300.0   # model load in a fresh process
+BATCH_TIMEOUT_SECS = 300.0   # a worker that died never answers
+
+
+def default_workers(memory_mb: int = WORKER_MEMORY_MB, cpu_share: float = 0.5) -> int:
+    """Worker count for this machine: ``cpu_share`` of the cores, capped by half the available memory.
+
+    Half by default, leaving the rest to queries; a headless run with none to serve takes them all.
+    """
+    cores = os.cpu_count() or 1
+    by_cpu = max(1, int(cores * cpu_share))
+    available = _available_memory_mb()
+    if available is None:
+        return by_cpu
+    return max(1, min(by_cpu, int(available * 0.5 // memory_mb)))
+
+
+def load_fastembed(model_name: str, threads: int):
+    from fastembed import TextEmbedding
+    return TextEmbedding(model_name=model_name, threads=threads)
+
+
+class EmbedPool:
+    """N worker processes, each with its own single-threaded model session.
+
+    Texts go to the workers through a task queue; vectors come back through
+    one shared-memory buffer per worker, so the parent only copies them out
+    into a NumPy array (no pickling of vectors). ``embed`` splits its texts
+    into batches and spreads them over all workers, so one large file — or
+    several files embedded from several threads — keeps every worker busy.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        batch_size: int = 32,
+        threads_per_worker: int = 1,
+        factory: Callable = load_fastembed,
+    ):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        ctx = mp.get_context("spawn")  # never fork a process holding ONNX threads
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._buffers = [
+            shared_memory.SharedMemory(create=True, size=self.batch_size * MAX_DIM * 4)
+            for _ in range(self.workers)
+        ]
+        # A worker writes its buffer only after the parent has copied the previous result out
+        self._free = [ctx.Semaphore(1) for _ in range(self.workers)]
+        self._procs = [
+            ctx.Process(
+                target=_worker_main,
+                args=(i, factory, model_name, threads_per_worker, self._buffers[i].name,
+                      self._tasks, self._results, self._free[i]),
+                name=f"embed-worker-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        self._jobs: Dict[int, Future] = {}
+        self._jobs_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self):
+        for p in self._procs:
+            p.start()
+        ready = 0
+        deadline = time.monotonic() + START_TIMEOUT_SECS
+        while ready < self.workers:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.name for p in self._procs if p.exitcode is not None]
+                if dead or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"Embedding workers did not start: {', '.join(dead) or 'timeout'}")
+                continue
+            if message[0] != "ready":
+                self.close()
+                raise RuntimeError(f"Embedding worker failed to start: {message[-1]}")
+            ready += 1
+        self._collector = threading.Thread(target=self._collect, name="embed-pool-results", daemon=True)
+        self._collector.start()
+        logger.info(f"Embedding pool started: {self.workers} worker processes")
+
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed ``texts`` across the workers; blocks until every batch is back."""
+        futures = []
+        for start in range(0, len(texts), self.batch_size):
+            future: Future = Future()
+            job = next(self._ids)
+            with self._jobs_lock:
+                if self._closed:
+                    raise RuntimeError("Embedding pool is closed")
+                self._jobs[job] = future
+            self._tasks.put((job, texts[start : start + self.batch_size]))
+            futures.append(future)
+        vectors: List[np.ndarray] = []
+        for future in futures:
+            vectors.extend(future.result(timeout=BATCH_TIMEOUT_SECS))
+        return vectors
+
+    def close(self):
+        with self._jobs_lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._jobs.values())
+            self._jobs.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding pool closed"))
+        for _ in self._procs:
+            self._tasks.put(None)
+        for p in self._procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        self._results.put(None)  # stops the collector
+        if self._collector is not None:
+            self._collector.join(timeout=5)
+        for buf in self._buffers:
+            buf.close()
+            buf.unlink()
+        logger.info("Embedding pool stopped.")
+
+    def _collect(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            _, job, worker, count, dim, error = message
+            with self._jobs_lock:
+                future = self._jobs.pop(job, None)
+            if error is None:
+                view = np.ndarray((count, dim), dtype=np.float32, buffer=self._buffers[worker].buf)
+                matrix = view.copy()
+                del view  # no exported pointer may outlive the buffer
+            self._free[worker].release()
+            if future is None:
+                continue
+            if error is None:
+                future.set_result(list(matrix))
+            else:
+                future.set_exception(RuntimeError(error))
+
+
+def _worker_main(index, factory, model_name, threads, buffer_name, tasks, results, free):
+    try:
+        os.nice(WORKER_NICE)
+    except OSError:
+        pass
+    try:
+        model = factory(model_name, threads)
+        buf = shared_memory.SharedMemory(name=buffer_name)
+    except Exception as exc:
+        results.put(("error", str(exc)))
+        return
+    results.put(("ready", index))
+    capacity = buf.size // 4
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job, texts = task
+        free.acquire()
+        try:
+            matrix = np.asarray(list(model.embed(texts)), dtype=np.float32)
+            count, dim = matrix.shape
+            if count * dim > capacity:
+                raise ValueError(f"{count}x{dim} vectors do not fit the result buffer")
+            np.ndarray((count, dim), dtype=np.float32, buffer=buf.buf)[:] = matrix
+            results.put(("done", job, index, count, dim, None))
+        except Exception as exc:
+            results.put(("done", job, index, 0, 0, str(exc)))
+    buf.close()
+
+
+def _available_memory_mb() -> Optional[int]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2**20
+    except (ValueError, OSError, AttributeError):
+        return None
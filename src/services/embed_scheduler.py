@@ -0,0 +1,53 @@
+"""Embedding scheduler — interactive queries go ahead of background indexing."""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+QUERY = 0   # interactive: search requests
+WATCH = 1   # files the watcher saw change: ahead of the scan backlog
+INDEX = 2   # background: scans, rebuilds, migrations
+
+
+class EmbedScheduler:
+    """Hands out the local embedding engine one batch at a time, by priority.
+
+    The model (and the cores it runs on) is shared by searches and by
+    indexing. Indexing embeds in small batches and takes a slot per batch,
+    so it can be interrupted at every batch boundary: whenever a query is
+    waiting, the next slot goes to the query (and a watcher-triggered file
+    goes ahead of the scan). A query therefore waits for at most one
+    in-flight indexing batch instead of a whole file's chunks.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._waiting: List[int] = [0, 0, 0]  # per priority
+        self.index_batches = 0
+        self.query_waits = 0               # queries that found an indexing batch running
+
+    @contextmanager
+    def slot(self, priority: int = INDEX) -> Iterator[None]:
+        with self._cond:
+            if priority == QUERY and self._busy:
+                self.query_waits += 1
+            self._waiting[priority] += 1
+            try:
+                self._cond.wait_for(lambda: not self._busy and not any(self._waiting[:priority]))
+            finally:
+                self._waiting[priority] -= 1
+            self._busy = True
+            if priority != QUERY:
+                self.index_batches += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+# Shared by every IndexerService in the process (live, shadow rebuild, legacy model)
+embed_scheduler = EmbedScheduler()
@@ -1,10 +1,15 @@
 """Smart file filter — decide what gets indexed, Cursor-style."""
 
+import os
+import stat
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional, Set
+from typing import Dict, Iterable, Iterator, Optional, Set
 
 import pathspec
 
+from . import git_changes
 from .monitor import logger
 
 
@@ -45,9 +50,38 @@ INDEXABLE_NAMES: Set[str] = {
     "Makefile", "Dockerfile", "Rakefile", "Gemfile", "Procfile",
     "Vagrantfile", "CMakeLists.txt", "LICENSE", "README",
     ".gitignore", ".gitattributes", ".editorconfig",
-    ".cursorignore", ".prettierrc", ".eslintrc",
+    ".cursorignore", ".sourcemcpignore", ".prettierrc", ".eslintrc",
 }
 
+# Language names for search filters, by extension (then by file name)
+_LANGUAGES: Dict[str, str] = {
+    ".py": "python", ".js": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".jsx": "javascript", ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".kt": "kotlin", ".kts": "kotlin", ".go": "go", ".rs": "rust",
+    ".rb": "ruby", ".php": "php", ".c": "c", ".h": "c", ".cpp": "cpp", ".hpp": "cpp",
+    ".cc": "cpp", ".cs": "csharp", ".swift": "swift", ".scala": "scala", ".lua": "lua",
+    ".r": "r", ".m": "objc", ".mm": "objc", ".pl": "perl", ".pm": "perl",
+    ".sh": "shell", ".bash": "shell", ".zsh": "shell", ".fish": "shell",
+    ".ps1": "powershell", ".bat": "batch", ".cmd": "batch",
+    ".sql": "sql", ".graphql": "graphql", ".gql": "graphql", ".proto": "protobuf",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".xml": "xml",
+    ".ini": "ini", ".cfg": "ini", ".conf": "ini",
+    ".md": "markdown", ".mdx": "markdown", ".rst": "rst", ".txt": "text", ".tex": "latex",
+    ".adoc": "asciidoc", ".org": "org", ".csv": "csv", ".tsv": "csv",
+    ".html": "html", ".htm": "html", ".css": "css", ".scss": "scss", ".sass": "sass",
+    ".less": "less", ".vue": "vue", ".svelte": "svelte",
+    ".tf": "terraform", ".hcl": "terraform", ".nix": "nix", ".dockerfile": "dockerfile",
+    ".makefile": "make", ".cmake": "cmake",
+}
+_NAME_LANGUAGES: Dict[str, str] = {
+    "Makefile": "make", "Dockerfile": "dockerfile", "CMakeLists.txt": "cmake",
+    "Rakefile": "ruby", "Gemfile": "ruby", "Vagrantfile": "ruby",
+}
+
+# ── Ignore files (gitignore syntax, any directory) ─────────
+# Read in this order, so a later file can re-include (!pattern) what an earlier one ignores
+IGNORE_FILES: tuple[str, ...] = (".gitignore", ".cursorignore", ".sourcemcpignore")
+
 # ── Always-skip directories ────────────────────────────────
 SKIP_DIRS: Set[str] = {
     ".git", ".svn", ".hg",
@@ -86,33 +120,140 @@ SKIP_NAMES: Set[str] = {
 }
 
 MAX_FILE_SIZE: int = 1 * 1024 * 1024  # 1 MB
+_STAT_BATCH = 64  # files stat'ed per pool task during discovery
 
 
 class FileFilter:
     """Decides which files should be indexed, Cursor-style."""
 
-    def __init__(self, root: Path):
+    def __init__(self, root: Path, exclude: tuple[str, ...] = ()):
         self.root = root.resolve()
-        self._gitignore_spec: Optional[pathspec.PathSpec] = None
-        self._load_ignore_files()
+        # Path prefixes (ending in a separator) never entered nor indexed, e.g. the index itself
+        self.exclude = exclude
+        # directory -> compiled rules of the ignore files it contains (None: it has none)
+        self._rules: Dict[Path, Optional[pathspec.PathSpec]] = {}
+        self.last_skip_reasons: Dict[str, int] = {}  # reason category -> count, from the last scan
+        # Repo-wide git excludes (see git_changes.exclude_files), matched from the work tree's top
+        self._excludes, self._excludes_base = self._load_excludes()
+        self._rules_for(self.root)
 
-    def _load_ignore_files(self):
-        """Parse .gitignore file."""
-        ignore_path = self.root / ".gitignore"
-        if ignore_path.is_file():
+    # ── Ignore rules (per-directory cache) ──────────────────
+    def _rules_for(self, directory: Path, present: Optional[Set[str]] = None) -> Optional[pathspec.PathSpec]:
+        """Rules from the ignore files in ``directory``, compiled once and cached.
+
+        ``present`` names the ignore files a directory listing already found,
+        which spares probing for the others.
+        """
+        try:
+            return self._rules[directory]
+        except KeyError:
+            pass
+        patterns: list[str] = []
+        loaded: list[str] = []
+        for name in IGNORE_FILES:
+            if present is not None and name not in present:
+                continue
             try:
-                patterns = ignore_path.read_text(encoding="utf-8").splitlines()
-                self._gitignore_spec = pathspec.PathSpec.from_lines("gitignore", patterns)
-                logger.info(f"Loaded .gitignore ({len(patterns)} patterns)")
+                patterns += (directory / name).read_text(encoding="utf-8").splitlines()
+                loaded.append(name)
+            except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+                continue
+            except (OSError, UnicodeDecodeError) as exc:
+                logger.warning(f"Failed to read {directory / name}: {exc}")
+        spec = None
+        if patterns:
+            try:
+                spec = pathspec.PathSpec.from_lines("gitignore", patterns)
+                where = self._relative(directory) or str(directory)
+                logger.info(f"Loaded {', '.join(loaded)} in {where} ({len(patterns)} patterns)")
             except Exception as exc:
-                logger.warning(f"Failed to parse .gitignore: {exc}")
+                logger.warning(f"Failed to parse ignore files in {directory}: {exc}")
+        self._rules[directory] = spec
+        return spec
+
+    def _load_excludes(self) -> tuple[Optional[pathspec.PathSpec], tuple[str, ...]]:
+        """Rules git applies below every .gitignore, so a walk and ``git status`` agree."""
+        top = git_changes.repo_root(self.root)
+        if top is None or not self.root.is_relative_to(top):
+            return None, ()
+        patterns: list[str] = []
+        for path in git_changes.exclude_files(top):
+            try:
+                patterns += path.read_text(encoding="utf-8").splitlines()
+            except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+                continue
+            except (OSError, UnicodeDecodeError) as exc:
+                logger.warning(f"Failed to read {path}: {exc}")
+        if not patterns:
+            return None, ()
+        try:
+            spec = pathspec.PathSpec.from_lines("gitignore", patterns)
+        except Exception as exc:
+            logger.warning(f"Failed to parse git excludes for {top}: {exc}")
+            return None, ()
+        logger.info(f"Loaded git excludes for {top} ({len(patterns)} patterns)")
+        return spec, self.root.relative_to(top).parts
+
+    def invalidate(self, directory: Path):
+        """Forget the cached rules of ``directory`` (one of its ignore files changed)."""
+        self._rules.pop(directory, None)
+
+    def _ignored(self, parts: tuple[str, ...], is_dir: bool = False) -> bool:
+        """Apply every ignore file from the root down to the path's parent.
 
-    def should_index(self, filepath: Path) -> str:
-        """Returns empty string if file should be indexed, otherwise a skip reason."""
-        filepath = filepath.resolve()
+        As in git, rules in deeper directories override shallower ones (and
+        all of them the repo-wide excludes), and each file's patterns are
+        relative to the directory holding it.
+        """
+        verdict = None
+        if self._excludes is not None:
+            sub = "/".join((*self._excludes_base, *parts)) + ("/" if is_dir else "")
+            verdict = self._excludes.check_file(sub).include
+        directory = self.root
+        for depth in range(len(parts)):
+            spec = self._rules_for(directory)
+            if spec is not None:
+                sub = "/".join(parts[depth:]) + ("/" if is_dir else "")
+                result = spec.check_file(sub).include
+                if result is not None:
+                    verdict = result
+            directory = directory / parts[depth]
+        return bool(verdict)
 
+    def should_index(self, filepath: Path, st: Optional[os.stat_result] = None) -> str:
+        """Returns empty string if file should be indexed, otherwise a skip reason.
+
+        Pass ``st`` when the caller already stat'ed the file; no further
+        filesystem calls are made then.
+        """
+        rel = self._relative(filepath)
+        if rel is None:
+            # Outside the root as given (e.g. reached through a symlink): resolve first
+            filepath = filepath.resolve()
+            rel = self._relative(filepath)
+        if self.exclude and str(filepath).startswith(self.exclude):
+            return "skip-dir:index"
+        reason = self._name_verdict(filepath, rel)
+        if reason:
+            return reason
+        if st is None:
+            try:
+                st = filepath.stat()
+            except OSError:
+                return "stat-error"
+        return _size_verdict(st)
+
+    def _relative(self, filepath: Path) -> Optional[str]:
+        try:
+            return str(filepath.relative_to(self.root))
+        except ValueError:
+            return None
+
+    def _name_verdict(self, filepath: Path, rel: Optional[str]) -> str:
+        """Every check that needs no filesystem access."""
         # ── Directory-based skip ────────────────────────────
-        for part in filepath.parts:
+        parts = Path(rel).parts if rel is not None else filepath.parts
+        for part in parts[:-1]:
             if part in SKIP_DIRS:
                 return f"skip-dir:{part}"
 
@@ -137,45 +278,165 @@ class FileFilter:
         if suffix not in INDEXABLE_EXTENSIONS and name not in INDEXABLE_NAMES:
             return f"unknown-ext:{suffix or '(none)'}"
 
-        # ── Size check ──────────────────────────────────────
-        try:
-            size = filepath.stat().st_size
-            if size > MAX_FILE_SIZE:
-                return f"too-large:{size // 1024}KB"
-            if size == 0:
-                return "empty"
-        except OSError:
-            return "stat-error"
-
-        # ── .gitignore ──────────────────────────────────────
-        try:
-            rel = filepath.relative_to(self.root)
-            rel_str = str(rel)
-        except ValueError:
-            rel_str = filepath.name
-
-        if self._gitignore_spec and self._gitignore_spec.match_file(rel_str):
+        # ── .gitignore / .cursorignore / .sourcemcpignore ───
+        if self._ignored(parts if rel is not None else (filepath.name,)):
             return "gitignored"
 
-        return ""  # OK to index
+        return ""
 
-    def collect_files(self, directory: Optional[Path] = None) -> tuple[list[Path], int]:
-        """Walk directory, return (indexable_files, skipped_count)."""
+    # ── Discovery (parallel) ────────────────────────────────
+    def scan_files(
+        self, directory: Optional[Path] = None, workers: int = 1
+    ) -> tuple[Dict[Path, os.stat_result], int]:
+        """Walk directory, return ({indexable_file: stat}, skipped_count).
+
+        Directory listings and stats run on ``workers`` threads — on network
+        and container filesystems each one is a round trip. Every file is
+        stat'ed at most once (only if its name passes the filter), skip
+        directories are pruned without being listed, and the stat result is
+        returned for the caller to fingerprint with. Skip reasons are tallied
+        by category in ``last_skip_reasons``.
+        """
         root = (directory or self.root).resolve()
-        indexable: list[Path] = []
-        skipped = 0
+        found: Dict[Path, os.stat_result] = {}
+        reasons: Counter = Counter()
 
-        for path in root.rglob("*"):
-            if not path.is_file():
-                continue
-            reason = self.should_index(path)
-            if reason:
-                skipped += 1
-            else:
-                indexable.append(path)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = {pool.submit(self._list_dir, root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload, rejected = future.result()
+                    reasons.update(rejected)
+                    if kind == "dir":
+                        subdirs, candidates = payload
+                        pending.update(pool.submit(self._list_dir, d) for d in subdirs)
+                        for start in range(0, len(candidates), _STAT_BATCH):
+                            pending.add(pool.submit(self._stat_batch, candidates[start : start + _STAT_BATCH]))
+                    else:
+                        found.update(payload)
 
+        skipped = sum(reasons.values())
+        self.last_skip_reasons = dict(reasons)
         logger.info(
-            f"File filter: {len(indexable)} indexable, {skipped} skipped "
+            f"File filter: {len(found)} indexable, {skipped} skipped "
             f"in {root}"
         )
-        return indexable, skipped
+        return found, skipped
+
+    def _list_dir(self, directory: Path):
+        subdirs: list[Path] = []
+        candidates: list[Path] = []
+        rejected: Counter = Counter()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as exc:
+            logger.debug(f"Cannot list {directory}: {exc}")
+            return "dir", (subdirs, candidates), rejected
+        # Compile this directory's ignore rules before judging its entries
+        self._rules_for(directory, present={e.name for e in entries if e.name in IGNORE_FILES})
+        rel_dir = self._relative(directory)
+        base = Path(rel_dir).parts if rel_dir else ()
+        for entry in entries:
+            path = directory / entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Ignored directories are pruned, never listed (like git, no re-including inside)
+                    if entry.name not in SKIP_DIRS and not (
+                        rel_dir is not None and self._ignored((*base, entry.name), is_dir=True)
+                    ) and not (self.exclude and (str(path) + os.sep).startswith(self.exclude)):
+                        subdirs.append(path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            reason = self._name_verdict(path, self._relative(path))
+            if reason:
+                rejected[_category(reason)] += 1
+            else:
+                candidates.append(path)
+        return "dir", (subdirs, candidates), rejected
+
+    @staticmethod
+    def _stat_batch(paths: list[Path]):
+        stats: Dict[Path, os.stat_result] = {}
+        rejected: Counter = Counter()
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                rejected["stat-error"] += 1
+                continue
+            reason = _size_verdict(st)
+            if reason:
+                rejected[_category(reason)] += 1
+            else:
+                stats[path] = st
+        return "stat", stats, rejected
+
+    def walk(
+        self, directory: Optional[Path] = None, exclude: tuple[str, ...] = ()
+    ) -> Iterator[tuple[Path, list[Path]]]:
+        """Yield (directory, candidate files) one directory at a time, pruning like
+        scan_files. Nothing is stat'ed, so the caller controls the pace.
+        ``exclude`` holds path prefixes (ending in a separator) never entered."""
+        stack = [(directory or self.root).resolve()]
+        while stack:
+            current = stack.pop()
+            _, (subdirs, candidates), _ = self._list_dir(current)
+            yield current, candidates
+            stack.extend(d for d in subdirs if not (str(d) + os.sep).startswith(exclude))
+
+    def stat_files(self, paths: Iterable[Path], workers: int = 1) -> Dict[Path, os.stat_result]:
+        """Stat many files concurrently. Missing or unreadable files are left out."""
+        paths = list(paths)
+
+        def _stat(path: Path):
+            try:
+                return path, path.stat()
+            except OSError:
+                return path, None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return {p: st for p, st in pool.map(_stat, paths) if st is not None}
+
+    def collect_files(self, directory: Optional[Path] = None) -> tuple[list[Path], int]:
+        """Walk directory, return (indexable_files, skipped_count)."""
+        found, skipped = self.scan_files(directory)
+        return list(found), skipped
+
+
+def _category(reason: str) -> str:
+    """"skip-dir:node_modules" -> "skip-dir"."""
+    return reason.split(":", 1)[0]
+
+
+def _size_verdict(st: os.stat_result) -> str:
+    """Checks on an already-fetched stat result."""
+    if not stat.S_ISREG(st.st_mode):
+        return "not-a-file"
+    if st.st_size > MAX_FILE_SIZE:
+        return f"too-large:{st.st_size // 1024}KB"
+    if st.st_size == 0:
+        return "empty"
+    return ""
+
+
+def file_kind(filepath: Path) -> str:
+    """"code", "web", "docs", "config" or "other", from the extension tables above."""
+    suffix = filepath.suffix.lower()
+    if suffix in _CODE_EXTS:
+        return "code"
+    if suffix in _WEB_EXTS:
+        return "web"
+    if suffix in _DOC_EXTS:
+        return "docs"
+    if suffix in _CONFIG_EXTS:
+        return "config"
+    return "other"
+
+
+def language(filepath: Path) -> str:
+    """Language name for search filters ("python", "markdown", ...), or "" when unknown."""
+    return _NAME_LANGUAGES.get(filepath.name) or _LANGUAGES.get(filepath.suffix.lower(), "")
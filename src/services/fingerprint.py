@@ -0,0 +1,40 @@
+"""Fast content hashes for telling touched files from modified ones."""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+try:  # optional: xxh3 is several times faster than blake2b on large files
+    import xxhash
+except ImportError:  # pragma: no cover - depends on the environment
+    xxhash = None
+
+
+HASH_ALGO = "xxh3" if xxhash is not None else "blake2b"
+_READ_BLOCK = 1 << 20
+
+
+def _hasher():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Hash already-read file contents. Tagged with the algorithm, so switching
+    algorithms never makes two different contents compare equal."""
+    h = _hasher()
+    h.update(data)
+    return f"{HASH_ALGO}:{h.hexdigest()}"
+
+
+def content_hash(path: Path) -> Optional[str]:
+    """Hash a file's bytes, or None if it cannot be read."""
+    h = _hasher()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_BLOCK), b""):
+                h.update(block)
+    except OSError:
+        return None
+    return f"{HASH_ALGO}:{h.hexdigest()}"
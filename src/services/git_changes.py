@@ -0,0 +1,93 @@
+"""Git-aware change detection — ask the local git index what changed instead of walking the tree."""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Set
+
+from .monitor import logger
+
+
+GIT_TIMEOUT_SECS = 30.0
+
+
+class GitState(NamedTuple):
+    head: str          # commit checked out when the state was read
+    dirty: List[str]   # paths (relative to the repo root) differing from HEAD, incl. untracked
+
+
+def _git(top: Path, *args: str) -> Optional[str]:
+    """Run a read-only git command; None if git is missing or the command fails."""
+    try:
+        result = subprocess.run(
+            # --no-optional-locks: never contend with the user's own git commands
+            ["git", "--no-optional-locks", "-C", str(top), *args],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="surrogateescape",
+            timeout=GIT_TIMEOUT_SECS,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.debug(f"git {args[0]} failed: {exc}")
+        return None
+    if result.returncode != 0:
+        logger.debug(f"git {args[0]} exited {result.returncode}: {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+
+def _split_z(output: str) -> List[str]:
+    return [p for p in output.split("\0") if p]
+
+
+def repo_root(path: Path) -> Optional[Path]:
+    """Top-level directory of the work tree containing ``path``, or None."""
+    out = _git(path, "rev-parse", "--show-toplevel")
+    return Path(out.strip()).resolve() if out else None
+
+
+def read_state(top: Path, scope: Path) -> Optional[GitState]:
+    """HEAD plus every path under ``scope`` that differs from it in the working tree."""
+    head = _git(top, "rev-parse", "--verify", "HEAD")
+    if head is None:
+        return None  # no commits yet
+    status = _git(
+        top, "status", "--porcelain", "-z", "--no-renames", "--untracked-files=all",
+        "--", str(scope),
+    )
+    if status is None:
+        return None
+    # Porcelain v1 entries are "XY path"; paths are relative to the repo root
+    dirty = [entry[3:] for entry in _split_z(status)]
+    return GitState(head=head.strip(), dirty=dirty)
+
+
+def changed_since(top: Path, base: str, scope: Path) -> Optional[List[str]]:
+    """Paths under ``scope`` added, modified or deleted between ``base`` and HEAD."""
+    out = _git(top, "diff", "--name-only", "-z", "--no-renames", base, "HEAD", "--", str(scope))
+    return None if out is None else _split_z(out)
+
+
+def tracked_files(top: Path, scope: Path) -> Optional[Set[str]]:
+    """Paths under ``scope`` in the git index (relative to the repo root)."""
+    out = _git(top, "ls-files", "-z", "--full-name", "--", str(scope))
+    return None if out is None else set(_split_z(out))
+
+
+def exclude_files(top: Path) -> List[Path]:
+    """Repo-wide ignore files git honours besides .gitignore, lowest priority first.
+
+    core.excludesFile (default ~/.config/git/ignore), then .git/info/exclude —
+    what ``git status`` applies to untracked files (as --exclude-standard).
+    """
+    configured = _git(top, "config", "--path", "core.excludesFile")
+    if configured and configured.strip():
+        files = [Path(configured.strip()).expanduser()]
+    else:
+        config_home = os.getenv("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+        files = [Path(config_home) / "git" / "ignore"]
+    info = _git(top, "rev-parse", "--git-path", "info/exclude")
+    if info and info.strip():
+        files.append(top / info.strip())  # relative to top unless git gives an absolute path
+    return files
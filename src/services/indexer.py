@@ -1,9 +1,13 @@
 import os
 import json
+import time
 import shutil
+import stat
 import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Set
 
 import numpy as np
 import zvec
@@ -13,8 +17,21 @@ from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
 from ..config import settings
-from .file_filter import FileFilter
-from .monitor import logger, monitor
+from . import git_changes
+from .embed_pool import EmbedPool, default_workers
+from .embed_scheduler import INDEX, QUERY, WATCH, embed_scheduler
+from .file_filter import IGNORE_FILES, FileFilter
+from .fingerprint import content_hash, hash_bytes
+from .journal import JOURNAL_NAME, IndexJournal, JournalRecord
+from .manifest import MANIFEST_DB_NAME, ManifestStore
+from .monitor import MonitorService, logger, monitor as main_monitor
+from .poller import POLL_FS_TYPES, ManifestPoller, filesystem_type
+from .context_pack import pack
+from .scan_order import prioritize
+from .search_filter import SearchFilter, chunk_metadata
+from .snapshot import SnapshotEntry, SnapshotReader, SnapshotWriter, portable_hash
+from .text_sniff import SNIFF_BYTES, decode, sniff
+from .watch_queue import WatchQueue
 
 
 # ── Text Chunker ────────────────────────────────────────────
@@ -49,25 +66,69 @@ class TextChunker:
 # ── Constants ───────────────────────────────────────────────
 BATCH_SIZE = 100       # max docs per zvec upsert
 MAX_CHUNKS = 200       # max chunks per file (prevents huge files from exploding)
-MANIFEST_NAME = ".source-mcp_manifest.json"
+MANIFEST_NAME = ".source-mcp_manifest.json"  # legacy JSON manifest (migrated on open)
+INDEX_SIZE_REFRESH_SECS = 5.0  # min interval between index-size measurements
+CHECKPOINT_SECS = 30.0         # max time between checkpoints during a scan
+CHECKPOINT_JOURNAL_MB = 64     # ...or checkpoint once the journal grows this large
+SHADOW_SUFFIX = ".building"    # side directory a rebuild writes into
+OLD_SUFFIX = ".old"            # previous collection, kept only until the swap completes
+MIGRATION_BATCH = 512          # chunks per embedding call when re-embedding stored text
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 2)  # threads hashing touched files
+GIT_STATE_KEY = "git_state"    # manifest meta: commit + dirty paths of the last scan, files written since
+POOL_MIN_FILES = 200           # scans smaller than this are not worth starting worker processes
+SCHEMA_VERSION = 2             # meta.json "schema": 2 added the per-chunk file metadata fields
+BATCH_QUERY_WORKERS = 8        # concurrent vector queries of one search batch
+PACK_CANDIDATES = 30           # results considered when packing a token budget (see context_pack)
+
+DEFAULT_FASTEMBED_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
 
 
 # ── Indexer Service ─────────────────────────────────────────
 class IndexerService:
-    def __init__(self):
+    def __init__(
+        self, zvec_path: str | None = None, docs_path: str | None = None, monitor: MonitorService | None = None
+    ):
+        # Scan progress and readiness of this index (the dashboard's monitor for the main one)
+        self.monitor = monitor or main_monitor
         self.chunker = TextChunker()
         self.observer = Observer()
+        self._watch_queue: WatchQueue | None = None  # watcher events waiting for a worker
         self.collection = None
         self.file_filter: FileFilter | None = None
-        self._manifest: Dict[str, dict] = {}  # {filepath: {mtime, size, chunks}}
+        self._zvec_path = zvec_path  # None -> settings.zvec_path
+        self._docs_path = docs_path  # None -> settings.docs_path
+        self._manifest: ManifestStore | None = None  # lives inside the zvec dir
+        self._journal: IndexJournal | None = None    # writes not yet checkpointed
+        self._write_lock = threading.RLock()
+        self._last_checkpoint = time.monotonic()
+
+        # Rebuilds (see _start_rebuild): the live collection keeps serving meanwhile
+        self._collection_lock = threading.RLock()
+        self._events_lock = threading.Lock()
+        self._rebuild_thread: threading.Thread | None = None
+        self._pending_events: set | None = None  # watcher paths seen during a rebuild
+        self.last_rebuild: Dict | None = None  # what the last finished rebuild wrote (see _run_rebuild)
+        self._scan_fresh: set | None = None  # paths the watcher indexed while a scan runs
+        self._serving_embedder: "IndexerService | None" = self  # model the live collection speaks
+        self._meta_fields = False  # collection stores file metadata per chunk (schema 2)
         
         self.provider = None
         self.model_name = None
         self.fastembed_model = None
+        self.query_model = None  # optional session reserved for search queries
+        self._embed_pool: EmbedPool | None = None  # worker processes, only during large scans
         self.openai_client = None
         self.reranker = None
         self._configured = False
 
+        # Index size is measured off the indexing path (see _request_index_size_refresh)
+        self._index_size_mb = 0.0
+        self._size_lock = threading.Lock()
+        self._size_refresh_running = False
+        self._size_refresh_again = False
+        self._size_refreshed_at = 0.0
+
     def configure(self):
         """Load settings and initialize components. Safe to call multiple times."""
         if self._configured:
@@ -76,20 +137,10 @@ class IndexerService:
         self.provider = settings.embedding_provider
         self.model_name = settings.embedding_model
         
-        if self.provider == "openai":
-            import openai
-            if not settings.openai_api_key:
-                logger.warning("OpenAI provider selected but OPENAI_API_KEY not set. Falling back to FastEmbed.")
-                self.provider = "fastembed"
-            else:
-                if not self.model_name:
-                    self.model_name = "text-embedding-3-small"
-                self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-                
-        if self.provider == "fastembed":
-            if not self.model_name:
-                self.model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            self.fastembed_model = TextEmbedding(model_name=self.model_name)
+        if self.provider == "openai" and not settings.openai_api_key:
+            logger.warning("OpenAI provider selected but OPENAI_API_KEY not set. Falling back to FastEmbed.")
+            self.provider = "fastembed"
+        self._load_embedding_model()
         
         # Initialize Reranker (Cross-Encoder)
         try:
@@ -103,6 +154,53 @@ class IndexerService:
         logger.info(f"Indexer configured: provider={self.provider}, model={self.model_name}")
         self._configured = True
 
+    def _load_embedding_model(self):
+        """Create the client/model for self.provider, filling in the default model name."""
+        if self.provider == "openai":
+            import openai
+            if not self.model_name:
+                self.model_name = DEFAULT_OPENAI_MODEL
+            self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
+        elif self.provider == "fastembed":
+            if not self.model_name:
+                self.model_name = DEFAULT_FASTEMBED_MODEL
+            self.fastembed_model = TextEmbedding(model_name=self.model_name, threads=settings.index_threads)
+            if settings.query_session:
+                self.query_model = TextEmbedding(model_name=self.model_name, threads=settings.query_threads)
+                logger.info(f"Query embedding session loaded ({settings.query_threads} threads)")
+
+    def _adopt_models(self, other: "IndexerService"):
+        """Share another instance's loaded models instead of loading them again."""
+        self.provider = other.provider
+        self.model_name = other.model_name
+        self.fastembed_model = other.fastembed_model
+        self.query_model = other.query_model
+        self.openai_client = other.openai_client
+        self.reranker = other.reranker
+        self._configured = True
+
+    @property
+    def zvec_path(self) -> Path:
+        return Path(self._zvec_path or settings.zvec_path)
+
+    @property
+    def docs_path(self) -> str:
+        return self._docs_path or settings.docs_path
+
+    def _side_path(self, suffix: str) -> Path:
+        return self.zvec_path.with_name(self.zvec_path.name + suffix)
+
+    def _index_dirs(self, resolve: bool = False) -> tuple[str, ...]:
+        """Path prefixes of the collection and its rebuild side dirs: never indexed nor watched.
+
+        A rebuild's builder (in the side dir) covers the live collection's too.
+        """
+        path = self.zvec_path.resolve() if resolve else self.zvec_path
+        name = path.name
+        for suffix in (SHADOW_SUFFIX, OLD_SUFFIX):
+            name = name.removesuffix(suffix)
+        return tuple(str(path.with_name(name + suffix)) + os.sep for suffix in ("", SHADOW_SUFFIX, OLD_SUFFIX))
+
     def initialize(self):
         """Open or create the Zvec collection. Must be called after settings are finalized."""
         if not self._configured:
@@ -110,8 +208,9 @@ class IndexerService:
 
         if self.collection is not None:
             return self.collection
-            
-        db_path = Path(settings.zvec_path)
+
+        self._recover_swap()
+        db_path = self.zvec_path
         
         # NOTE: Do NOT delete the LOCK file! Zvec uses OS-level flock() on it.
         # When the process exits (even crashes), the OS releases the flock automatically.
@@ -128,46 +227,61 @@ class IndexerService:
         
         current_dim = self._get_dimension()
         recreate = False
+        # Meta of a collection built with another model (or an older schema): it keeps
+        # serving (with that model) while a replacement is built in the background.
+        migrate_from = None
         
         # Check compatibility
         if db_path.exists() and meta_path.exists():
             try:
                 meta = json.loads(meta_path.read_text())
                 if meta.get("dimension") != current_dim:
-                    logger.warning(f"DB dimension mismatch ({meta.get('dimension')} vs {current_dim}). Recreating.")
-                    recreate = True
+                    logger.warning(f"DB dimension mismatch ({meta.get('dimension')} vs {current_dim}). Rebuilding.")
+                    migrate_from = meta
                 elif meta.get("provider") != self.provider:
-                    # Optional: assume incompatible if provider changes, or just rely on dim
-                    logger.info(f"Provider changed from {meta.get('provider')} to {self.provider}. Recreating for consistency.")
-                    recreate = True
+                    logger.info(f"Provider changed from {meta.get('provider')} to {self.provider}. Rebuilding for consistency.")
+                    migrate_from = meta
+                elif meta.get("model") != self.model_name:
+                    logger.info(f"Model changed from {meta.get('model')} to {self.model_name}. Rebuilding.")
+                    migrate_from = meta
+                elif meta.get("schema", 1) < SCHEMA_VERSION:
+                    logger.info("Index predates the chunk metadata fields. Rebuilding (vectors are reused).")
+                    migrate_from = meta
             except Exception as e:
                 logger.warning(f"Error reading meta.json: {e}. Recreating DB.")
                 recreate = True
         elif db_path.exists() and any(db_path.iterdir()):
-             # Existing DB but no meta -> assume old fastembed 384
-             if current_dim != 384:
-                 logger.warning(f"Legacy DB found (assumed 384) but need {current_dim}. Recreating.")
-                 recreate = True
+             # Existing DB but no meta -> assume old fastembed 384 (and the first schema)
+             logger.warning(f"Legacy DB found (assumed 384, need {current_dim}). Rebuilding.")
+             migrate_from = {"provider": "fastembed", "model": DEFAULT_FASTEMBED_MODEL, "dimension": 384}
 
         if recreate and db_path.exists():
+            # The manifest and journal live inside the DB dir, so they go with it
+            self._close_manifest()
             shutil.rmtree(db_path)
-            # Clear manifest since DB is being recreated
-            self._manifest = {}
-            self._save_manifest()
-            logger.info("Manifest cleared due to DB recreation (dimension/provider change).")
+            logger.info("Manifest cleared due to DB recreation.")
             
         # Ensure parent exists, but let zvec create the db dir itself
         if not db_path.parent.exists():
             db_path.parent.mkdir(parents=True, exist_ok=True)
 
         if not db_path.exists(): 
-             logger.info(f"Creating new Zvec collection at {settings.zvec_path} (dim={current_dim})")
+             logger.info(f"Creating new Zvec collection at {db_path} (dim={current_dim})")
              schema = zvec.CollectionSchema(
                 name="knowledge_base",
                 fields=[
                     zvec.FieldSchema(name="id", data_type=zvec.DataType.STRING),
                     zvec.FieldSchema(name="file_path", data_type=zvec.DataType.STRING),
                     zvec.FieldSchema(name="text", data_type=zvec.DataType.STRING),
+                    # File metadata for filtered search (see search_filter.chunk_metadata)
+                    zvec.FieldSchema(name="rel_path", data_type=zvec.DataType.STRING, index_param=zvec.InvertIndexParam()),
+                    zvec.FieldSchema(name="ext", data_type=zvec.DataType.STRING, index_param=zvec.InvertIndexParam()),
+                    zvec.FieldSchema(name="top_dir", data_type=zvec.DataType.STRING, index_param=zvec.InvertIndexParam()),
+                    zvec.FieldSchema(name="language", data_type=zvec.DataType.STRING, index_param=zvec.InvertIndexParam()),
+                    zvec.FieldSchema(
+                        name="mtime", data_type=zvec.DataType.DOUBLE,
+                        index_param=zvec.InvertIndexParam(enable_range_optimization=True),
+                    ),
                 ],
                 vectors=[
                     zvec.VectorSchema(
@@ -177,34 +291,50 @@ class IndexerService:
                     ),
                 ],
             )
-             self.collection = zvec.create_and_open(path=str(settings.zvec_path), schema=schema)
+             self.collection = zvec.create_and_open(path=str(db_path), schema=schema)
+             self._meta_fields = True
              # Save metadata
              meta_path.write_text(json.dumps({
                  "provider": self.provider,
                  "model": self.model_name,
-                 "dimension": current_dim
+                 "dimension": current_dim,
+                 "schema": SCHEMA_VERSION,
              }))
-             self.file_filter = FileFilter(Path(settings.docs_path))
-             self._load_manifest()
+             self.file_filter = FileFilter(Path(self.docs_path), exclude=self._index_dirs(resolve=True))
+             self._load_manifest(fresh=True)
+             self._open_journal()
              return self.collection
 
-        logger.info(f"Opening existing Zvec collection at {settings.zvec_path}")
+        logger.info(f"Opening existing Zvec collection at {db_path}")
         try:
-            self.collection = zvec.open(str(settings.zvec_path))
-            self.file_filter = FileFilter(Path(settings.docs_path))
+            self.collection = zvec.open(str(db_path))
+            self._meta_fields = self._has_meta_fields()
+            self.file_filter = FileFilter(Path(self.docs_path), exclude=self._index_dirs(resolve=True))
             self._load_manifest()
-            return self.collection
+            self._open_journal()
         except Exception as e:
             logger.error(f"Failed to open existing DB: {e}. Recreating from scratch.")
+            # Dropping the DB dir drops the manifest too, so files get re-indexed
+            self.collection = None
+            self._close_manifest()
             if db_path.exists():
                 shutil.rmtree(db_path)
-            # Clear manifest so files get re-indexed into the new empty DB
-            self._manifest = {}
-            self._save_manifest()
             logger.info("Manifest cleared due to DB recreation.")
             # Recursive call will set self.collection eventually
             return self.initialize()
 
+        if migrate_from is not None:
+            if (migrate_from.get("provider"), migrate_from.get("model")) == (self.provider, self.model_name):
+                reason = "Upgrading index schema"  # same model: keeps serving, vectors are copied
+            else:
+                self._serving_embedder = self._legacy_embedder(migrate_from)
+                reason = f"Migrating index from {migrate_from.get('provider')}/{migrate_from.get('model')}"
+            self._start_rebuild(
+                reason,
+                reuse_text=True,
+            )
+        return self.collection
+
     # ── Helpers & Internal ──────────────────────────────────
     def _get_dimension(self) -> int:
         if self.provider == "openai":
@@ -221,7 +351,18 @@ class IndexerService:
             return 384
         return 384
 
-    def embed(self, texts: List[str]) -> List[np.ndarray]:
+    def _has_meta_fields(self) -> bool:
+        return any(f.name == "rel_path" for f in self.collection.schema.fields)
+
+    def _chunk_fields(self, record: JournalRecord) -> Dict:
+        """Scalar fields shared by all chunks of a record's file (empty on a schema-1 collection)."""
+        if not self._meta_fields:
+            return {}
+        root = self.file_filter.root if self.file_filter else Path(self.docs_path).resolve()
+        return chunk_metadata(record.path, root, (record.fingerprint or {}).get("mtime"))
+
+    def embed(self, texts: List[str], priority: int = INDEX) -> List[np.ndarray]:
+        """Embed texts; local models go through the scheduler (see EmbedScheduler)."""
         if not texts:
             return []
         
@@ -235,66 +376,271 @@ class IndexerService:
                 return [np.array(d.embedding, dtype=np.float32) for d in resp.data]
             
             elif self.provider == "fastembed":
-                # generator
-                return list(self.fastembed_model.embed(texts))
+                if priority == QUERY and self.query_model is not None:
+                    # Own session and threads: never waits for an indexing batch
+                    return list(self.query_model.embed(texts))
+                # Only the scan backlog goes to the pool: a watcher's file would queue behind
+                # every batch already submitted, while the in-process model sits idle meanwhile
+                pool = self._embed_pool
+                if priority == INDEX and pool is not None:
+                    try:
+                        return pool.embed(texts)
+                    except Exception as exc:  # e.g. closed at the end of the scan
+                        logger.warning(f"Embedding pool failed ({exc}); embedding in-process")
+                # Small batches, each in its own slot, so a search can cut in between them
+                step = len(texts) if priority == QUERY else max(1, settings.embed_batch_size)
+                vectors: List[np.ndarray] = []
+                for start in range(0, len(texts), step):
+                    batch = texts[start : start + step]
+                    with embed_scheduler.slot(priority):
+                        vectors.extend(self.fastembed_model.embed(batch))
+                return vectors
             
             return []
         except Exception as e:
             logger.error(f"Embedding failed: {e}")
             return []
 
-    def _file_fingerprint(self, path: Path) -> dict:
+    def _file_fingerprint(self, path: Path, st: os.stat_result | None = None) -> dict:
         try:
-            stat = path.stat()
-            return {"mtime": stat.st_mtime, "size": stat.st_size}
+            st = st or path.stat()
+            return {"mtime": st.st_mtime, "size": st.st_size}
         except FileNotFoundError:
             return {}
 
-    def _load_manifest(self):
+    def _load_manifest(self, fresh: bool = False):
+        """Open the manifest store next to the collection.
+
+        A legacy JSON manifest in the docs root is imported once (unless the
+        collection was just created, in which case it describes nothing) and
+        then removed.
+        """
+        self._close_manifest()
+        self._manifest = ManifestStore(self.zvec_path / MANIFEST_DB_NAME)
+
+        legacy = Path(self.docs_path) / MANIFEST_NAME
+        if not legacy.exists():
+            return
         try:
-            mp = Path(settings.docs_path) / MANIFEST_NAME
-            if mp.exists():
-                self._manifest = json.loads(mp.read_text())
+            if not fresh and len(self._manifest) == 0:
+                count = self._manifest.import_json(legacy)
+                logger.info(f"Migrated {count} entries from legacy {MANIFEST_NAME}")
+            legacy.unlink()
         except Exception as e:
-            logger.warning(f"Failed to load manifest: {e}")
-            self._manifest = {}
+            logger.warning(f"Failed to migrate legacy manifest: {e}")
 
     def _save_manifest(self):
+        """Checkpoint: flush zvec, commit the manifest batch, then truncate the journal.
+
+        The order matters — the manifest never claims data zvec has not
+        persisted, and the journal is only dropped once both are durable.
+        """
         try:
-            mp = Path(settings.docs_path) / MANIFEST_NAME
-            mp.write_text(json.dumps(self._manifest, indent=2))
+            with self._write_lock:
+                if self.collection is not None:
+                    self.collection.flush()
+                if self._manifest is not None:
+                    self._manifest.commit()
+                if self._journal is not None:
+                    self._journal.reset()
+                self._last_checkpoint = time.monotonic()
         except Exception as e:
             logger.warning(f"Failed to save manifest: {e}")
 
+    def _maybe_checkpoint(self):
+        """Checkpoint if enough time or journal volume has accumulated."""
+        if self._journal is None or not self._journal.pending:
+            return
+        if (
+            time.monotonic() - self._last_checkpoint >= CHECKPOINT_SECS
+            or self._journal.size() >= CHECKPOINT_JOURNAL_MB * 1024 * 1024
+        ):
+            self._save_manifest()
+
+    def _close_manifest(self):
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def wait_for_rebuild(self) -> Dict | None:
+        """Block until a running rebuild (e.g. a migration started by initialize) is done.
+
+        Returns its ``last_rebuild`` summary, or None when none was started.
+        """
+        if self._rebuild_thread is None:
+            return None
+        self._rebuild_thread.join()
+        return self.last_rebuild
+
+    def close(self):
+        """Wait for a running rebuild, checkpoint, and close the index (before the process exits)."""
+        self.wait_for_rebuild()
+        self._save_manifest()
+        self._close_manifest()
+
+    def _open_journal(self):
+        """Open the indexing journal and replay whatever a previous run left behind."""
+        self._journal = IndexJournal(self.zvec_path / JOURNAL_NAME)
+        try:
+            records = self._journal.records()
+        except Exception as e:
+            logger.warning(f"Failed to read indexing journal: {e}. Discarding it.")
+            records = []
+        if records:
+            logger.info(f"Resuming interrupted indexing: replaying {len(records)} journaled files")
+            with self._write_lock:
+                for record in records:
+                    self._apply_record(record)
+                self._touch_git_state([record.path for record in records])
+        if records or self._journal.size():
+            self._save_manifest()
+
+    def _apply_record(self, record: JournalRecord):
+        """Write one journaled file into zvec and the (uncommitted) manifest. Idempotent."""
+        vectors = record.vectors if record.vectors is not None else []
+        meta = self._chunk_fields(record)
+        docs = [
+            zvec.Doc(
+                id=chunk_id,
+                fields={"id": chunk_id, "file_path": record.path, "text": text, **meta},
+                vectors={"embedding": vec},
+            )
+            for chunk_id, text, vec in zip(record.ids, record.texts, vectors)
+        ]
+        # Batch upsert to avoid "Too many docs" error
+        for start in range(0, len(docs), BATCH_SIZE):
+            self.collection.upsert(docs[start : start + BATCH_SIZE])
+        if record.stale_ids:
+            self.collection.delete(record.stale_ids)
+
+        if record.fingerprint is None:
+            self._manifest.remove(record.path)
+        else:
+            self._manifest.put(record.path, record.fingerprint, len(record.ids))
+
+    @staticmethod
+    def _chunk_id(file_path: str, i: int) -> str:
+        return hashlib.md5(f"{file_path}:{i}".encode()).hexdigest()
+
+    def _change_state(self, path: Path, current_fp: dict) -> str:
+        """Compare a file against its manifest entry.
+
+        Returns "new", "modified", "unchanged", or "touched" — the mtime moved
+        but the size did not, and a stored content hash can settle whether the
+        bytes actually changed (checkout round-trips, `touch`, no-op formatters).
+        """
+        old_fp = self._manifest.fingerprint(str(path))
+        if old_fp is None:
+            return "new"
+        if current_fp.get("size") != old_fp.get("size"):
+            return "modified"
+        if current_fp.get("mtime") == old_fp.get("mtime"):
+            return "unchanged"
+        if settings.content_hash and old_fp.get("hash"):
+            return "touched"
+        return "modified"
+
+    def _confirm_unchanged(self, path: Path, current_fp: dict, digest: str | None) -> bool:
+        """If a touched file's hash still matches, record its new mtime (manifest only)."""
+        old_fp = self._manifest.fingerprint(str(path))
+        if old_fp is None or digest is None or digest != old_fp.get("hash"):
+            return False
+        self._manifest.put(str(path), {**current_fp, "hash": digest}, self._manifest.chunks(str(path)))
+        return True
+
     def _needs_reindex(self, path: Path) -> bool:
-        path_str = str(path)
-        if path_str not in self._manifest:
-            return True
-        entry = self._manifest[path_str]
         current_fp = self._file_fingerprint(path)
-        old_fp = entry.get("fingerprint", {})
-        return (
-            current_fp.get("mtime") != old_fp.get("mtime") or 
-            current_fp.get("size") != old_fp.get("size")
-        )
-
-    def _init_collection(self):
-        """Helper to re-initialize collection (used by reindex)."""
-        # Ensure configured
-        self.configure()
-        # Force re-creation logic reuse from initialize
-        # But initialize checks if self.collection is not None
-        # Caller of this should set self.collection = None
-        return self.initialize()
+        state = self._change_state(path, current_fp)
+        if state == "touched":
+            return not self._confirm_unchanged(path, current_fp, content_hash(path))
+        return state != "unchanged"
+
+    def _select_changed(self, stats: Dict[Path, os.stat_result]) -> List[Path]:
+        """Return the files that need re-embedding, judged from already-fetched stats.
+        Touched files are hashed in parallel; those whose content is unchanged
+        only get a manifest update."""
+        to_index: List[Path] = []
+        touched = []
+        for path, st in stats.items():
+            current_fp = self._file_fingerprint(path, st)
+            state = self._change_state(path, current_fp)
+            if state == "touched":
+                touched.append((path, current_fp))
+            elif state != "unchanged":
+                to_index.append(path)
+
+        if touched:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+                digests = list(pool.map(content_hash, [p for p, _ in touched]))
+            refreshed = 0
+            for (path, current_fp), digest in zip(touched, digests):
+                if self._confirm_unchanged(path, current_fp, digest):
+                    refreshed += 1
+                else:
+                    to_index.append(path)
+            if refreshed:
+                self._save_manifest()
+            logger.info(
+                f"Hashed {len(touched)} touched files in {time.monotonic() - started:.2f}s: "
+                f"{refreshed} unchanged (manifest updated only)"
+            )
+        return to_index
 
     # ── Watching ────────────────────────────────────────────
     def start_watching(self):
         if self.observer.is_alive():
             return
-        handler = DocsEventHandler(self)
-        self.observer.schedule(handler, settings.docs_path, recursive=True)
+        self._watch_queue = WatchQueue(
+            self.handle_file_event,
+            workers=settings.watch_workers,
+            capacity=settings.watch_queue_size,
+            on_depth=lambda depth: self.monitor.update_stats(queue_depth=depth),
+        )
+        self._watch_queue.start()
+        # Our own writes (collection, manifest, journal, rebuild side dirs) never reach the queue
+        suppressed = self._index_dirs()
+
+        if self._watch_mode() == "native":
+            try:
+                observer = Observer()
+                observer.schedule(DocsEventHandler(self._watch_queue, suppressed), self.docs_path, recursive=True)
+                observer.start()
+                self.observer = observer
+                self.monitor.update_stats(watch_mode="native")
+                logger.info(f"Started watching directory: {self.docs_path}")
+                return
+            except Exception as exc:  # e.g. inotify instance/watch limits (EMFILE/ENOSPC)
+                if settings.watch_mode == "native":
+                    logger.error(f"Failed to watch {self.docs_path}: {exc}")
+                    return
+                logger.warning(f"Native file watching failed ({exc}); falling back to polling.")
+
+        self.observer = ManifestPoller(
+            self.file_filter,
+            lookup=lambda p: self._manifest.fingerprint(p) if self._manifest is not None else None,
+            known_paths=lambda: self._manifest.paths() if self._manifest is not None else [],
+            emit=self._watch_queue.put,
+            interval=settings.poll_interval,
+            cpu_budget=settings.poll_cpu_budget,
+            exclude=suppressed,
+        )
         self.observer.start()
-        logger.info(f"Started watching directory: {settings.docs_path}")
+        self.monitor.update_stats(watch_mode="poll")
+
+    def _watch_mode(self) -> str:
+        """Resolve settings.watch_mode ("auto" / "native" / "poll") to "native" or "poll"."""
+        mode = settings.watch_mode
+        if mode in ("native", "poll"):
+            return mode
+        fs_type = filesystem_type(Path(self.docs_path))
+        if fs_type in POLL_FS_TYPES:
+            logger.info(f"{self.docs_path} is on {fs_type}; file events may never arrive, polling instead.")
+            return "poll"
+        return "native"
 
     def stop_watching(self):
         if self.observer.is_alive():
@@ -304,52 +650,454 @@ class IndexerService:
             from watchdog.observers import Observer
             self.observer = Observer()
             logger.info("Stopped watching directory.")
-
-    def reindex(self):
-        """Wipe collection and manifest, then start full indexing in background."""
+        if self._watch_queue is not None:
+            self._watch_queue.stop()
+            self._watch_queue = None
+
+    def handle_file_event(self, file_path: str):
+        """Bring one path the watcher reported in line with the disk. Runs on a watch worker."""
+        path = Path(file_path)
+        if path.is_dir():  # created or moved in: its files get no events of their own
+            for _, files in self.file_filter.walk(path, exclude=self._index_dirs(resolve=True)):
+                for f in files:
+                    self.handle_file_event(str(f))
+            return
+        if not path.exists():
+            with self._write_lock:  # a deleted or moved-away directory takes everything below it
+                below = [] if file_path in self._manifest else self._manifest.paths_under(file_path + os.sep)
+            for p in below:
+                self.handle_file_event(p)
+        self._touch_git_state([file_path])  # before any write, so it is committed with them
+        if path.name in IGNORE_FILES:
+            with self._events_lock:
+                rebuilding = self._pending_events is not None
+                if rebuilding:
+                    self._pending_events.add(file_path)
+            if not rebuilding:  # else re-judged against the rebuilt index once it is swapped in
+                self.ignore_rules_changed(file_path)
+        if path.is_file():
+            # Bursts (created + modified, repeated saves) often leave nothing new to index.
+            # Under the write lock: a swap (see _swap_in) never shows a closed manifest.
+            with self._write_lock:
+                changed = self._needs_reindex(path)
+            if changed:
+                self.index_file(file_path, priority=WATCH)
+        else:
+            self.remove_file(file_path)
+        self._maybe_checkpoint()
+
+    def reindex(self) -> bool:
+        """Rebuild the index from scratch in the background; the current one serves until the swap.
+
+        Returns False when a rebuild is already running (this request is ignored).
+        """
         logger.info("Forced reindex requested.")
-        
-        def run_reindex():
+        return self._start_rebuild("Forced reindex")
+
+    # ── Rebuild into a side directory + atomic swap ─────────
+    def _legacy_embedder(self, meta: dict) -> "IndexerService | None":
+        """An embed-only instance for the model an existing collection was built with."""
+        legacy = IndexerService()
+        legacy.provider = meta.get("provider")
+        legacy.model_name = meta.get("model")
+        try:
+            legacy._load_embedding_model()
+            return legacy
+        except Exception as e:
+            logger.warning(
+                f"Cannot load {legacy.provider}/{legacy.model_name} to serve queries "
+                f"while migrating ({e}). Search is unavailable until the rebuild finishes."
+            )
+            return None
+
+    def _start_rebuild(self, reason: str, reuse_text: bool = False) -> bool:
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            logger.warning(f"{reason} ignored: a rebuild is already running.")
+            return False
+        with self._events_lock:
+            self._pending_events = set()
+        self.last_rebuild = None
+        self._rebuild_thread = threading.Thread(
+            target=self._run_rebuild, args=(reason, reuse_text), daemon=True
+        )
+        self._rebuild_thread.start()
+        return True
+
+    def _run_rebuild(self, reason: str, reuse_text: bool = False):
+        """Build a complete new collection in a side directory, swap it in, then replay
+        the watcher events that arrived meanwhile.
+
+        With ``reuse_text`` the new collection is filled from the chunk text
+        already stored in the live one (see _migrate_from) instead of a scan.
+        Leaves ``last_rebuild``: files and chunks written, files failed, and
+        the error if the rebuild was abandoned.
+        """
+        shadow = self._side_path(SHADOW_SUFFIX)
+        logger.info(f"{reason}: building new index in {shadow}")
+        builder = None
+        try:
+            if shadow.exists():
+                shutil.rmtree(shadow)
+            builder = IndexerService(zvec_path=str(shadow), docs_path=self._docs_path, monitor=self.monitor)
+            builder._adopt_models(self)
+            builder.initialize()
+            if reuse_text:
+                builder._migrate_from(self)
+            else:
+                builder.index_directory()
+            written = self._scan_tally()
+            self._swap_in(builder)
+        except Exception as e:
+            logger.error(f"{reason} failed, keeping the current index: {e}")
+            self.last_rebuild = {"reason": reason, "files": 0, "chunks": 0, "failed": 0, "error": str(e)}
+            if builder is not None:
+                builder.collection = None
+                builder._close_manifest()
+            shutil.rmtree(shadow, ignore_errors=True)
+            with self._events_lock:
+                self._pending_events = None
+            return
+
+        with self._events_lock:
+            pending, self._pending_events = self._pending_events, None
+        if pending:
+            logger.info(f"Replaying {len(pending)} file events received during the rebuild")
+            for path in sorted(pending):
+                self.handle_file_event(path)
+            self._save_manifest()
+        logger.info(f"{reason} completed.")
+        if reuse_text:
+            # Pick up files that changed since they were last indexed
+            if self.index_directory()["to_index"]:
+                written = {key: count + self._scan_tally()[key] for key, count in written.items()}
+        else:
+            self._request_index_size_refresh(force=True)
+        self.last_rebuild = {"reason": reason, **written}
+
+    def _scan_tally(self) -> Dict[str, int]:
+        """Files and chunks the last scan or migration wrote, and files it failed on."""
+        stats = self.monitor.stats
+        return {"files": stats["files_indexed"], "chunks": stats["total_chunks"], "failed": stats["files_failed"]}
+
+    def _migrate_from(self, source: "IndexerService"):
+        """Fill this (new, empty) collection by re-embedding the chunks stored in ``source``.
+
+        No file is walked, read or chunked: the ``text`` of every chunk listed
+        in the source manifest is fetched from the old collection, embedded in
+        batches of MIGRATION_BATCH with this instance's model, and written
+        under the same ids and fingerprints. When ``source`` already speaks
+        this model (a schema upgrade), the stored vectors are copied instead.
+        Files whose chunks cannot all be fetched are left out; the incremental
+        scan after the swap indexes them.
+        """
+        entries = list(source._manifest.items())
+        copy_vectors = source._serving_embedder is source
+        self.monitor.begin_migration(len(entries))
+        verb = "Copying" if copy_vectors else "Re-embedding"
+        logger.info(f"{verb} stored chunks of {len(entries)} files with {self.model_name}")
+
+        batch: List[JournalRecord] = []
+        batch_chunks = 0
+        done = 0
+        next_report = 0.1
+        for path, entry in entries:
+            ids = [self._chunk_id(path, i) for i in range(entry["chunks"])]
+            docs = source.collection.fetch(ids) if ids else {}
+            if not ids or len(docs) != len(ids):
+                self.monitor.file_failed()
+                continue
+            texts = [docs[chunk_id].fields.get("text", "") for chunk_id in ids]
+            record = JournalRecord(path=path, fingerprint=entry["fingerprint"], ids=ids, texts=texts)
+            if copy_vectors:
+                record.vectors = np.asarray([docs[i].vector("embedding") for i in ids], dtype=np.float32)
+                with self._write_lock:
+                    self._apply_record(record)
+                self.monitor.file_indexed(len(ids))
+                done += 1
+                continue
+            batch.append(record)
+            batch_chunks += len(ids)
+            if batch_chunks >= MIGRATION_BATCH:
+                done += self._embed_and_apply(batch)
+                batch, batch_chunks = [], 0
+                if entries and done / len(entries) >= next_report:
+                    logger.info(f"Migration progress: {done}/{len(entries)} files")
+                    next_report += 0.1
+        if batch:
+            done += self._embed_and_apply(batch)
+
+        self.monitor.finish_scan()
+        logger.info(f"Migrated {done}/{len(entries)} files without touching the filesystem")
+
+    def _embed_and_apply(self, records: List[JournalRecord]) -> int:
+        """Embed the texts of several files in one call and write them. Returns files written."""
+        texts = [t for r in records for t in r.texts]
+        vectors = self.embed(texts)
+        if len(vectors) != len(texts):
+            for _ in records:
+                self.monitor.file_failed()
+            return 0
+        matrix = np.asarray(vectors, dtype=np.float32)
+        offset = 0
+        with self._write_lock:
+            for record in records:
+                record.vectors = matrix[offset : offset + len(record.ids)]
+                offset += len(record.ids)
+                self._apply_record(record)
+                self.monitor.file_indexed(len(record.ids))
+        return len(records)
+
+    def _swap_in(self, builder: "IndexerService"):
+        """Replace the live collection with ``builder``'s, which lives in a side directory.
+
+        Queries and writes wait on the locks for the few milliseconds the
+        directory renames and reopen take; the old collection is deleted only
+        after the new one is live.
+        """
+        builder._save_manifest()
+        live, shadow, old = self.zvec_path, builder.zvec_path, self._side_path(OLD_SUFFIX)
+        with self._write_lock, self._collection_lock:
+            # Release zvec locks and SQLite handles on both sides before renaming
+            builder.collection = None
+            builder._close_manifest()
+            self.collection = None
+            self._close_manifest()
+
+            swapped = False
             try:
-                self.stop_watching()
-                
-                # Clear manifest
-                self._manifest = {}
-                self._save_manifest()
-                
-                # Re-init collection - we'll force _init_collection to recreate by deleting first
-                db_path = Path(settings.zvec_path)
-                if db_path.exists():
-                    try:
-                        self.collection = None # Drop reference
-                        shutil.rmtree(db_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to delete DB directory: {e}")
-
-                self.collection = self._init_collection()
-                self.file_filter = FileFilter(Path(settings.docs_path))
-                self.index_directory()
-                self.start_watching()
-                logger.info("Forced reindex completed.")
-            except Exception as e:
-                logger.error(f"Error during reindex: {e}")
+                if old.exists():
+                    shutil.rmtree(old)
+                if live.exists():
+                    os.replace(live, old)
+                os.replace(shadow, live)
+                swapped = True
+                self._open_live()
+            except BaseException:
+                # Put the previous collection back and serve it again before giving up
+                self.collection = None
+                self._close_manifest()
+                if swapped and old.exists():
+                    os.replace(live, shadow)  # the new one is dropped with the rest of the rebuild
+                if not live.exists() and old.exists():
+                    os.replace(old, live)
+                self._open_live()
+                raise
+            self.file_filter = builder.file_filter
+            if isinstance(self.observer, ManifestPoller):
+                self.observer.file_filter = self.file_filter
+            self._serving_embedder = self
+        shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"Swapped in rebuilt index at {live}")
+
+    def _open_live(self):
+        """(Re)open the collection, manifest and journal at zvec_path."""
+        self.collection = zvec.open(str(self.zvec_path))
+        self._meta_fields = self._has_meta_fields()
+        self._load_manifest()
+        self._open_journal()
+
+    def _recover_swap(self):
+        """Clean up after a rebuild that was interrupted (possibly mid-swap)."""
+        live, shadow, old = self.zvec_path, self._side_path(SHADOW_SUFFIX), self._side_path(OLD_SUFFIX)
+        if not live.exists() and old.exists():
+            logger.warning("Found an interrupted index swap; restoring the previous index.")
+            os.replace(old, live)
+        for leftover in (shadow, old):
+            if leftover.exists():
+                shutil.rmtree(leftover, ignore_errors=True)
+
+    # ── Git-aware change detection ──────────────────────────
+    def _git_plan(self, top: Path, state: "git_changes.GitState") -> tuple | None:
+        """Files git says may differ from the index, as ({path: stat}, to_remove).
+
+        Candidates are: paths changed between the last indexed commit and
+        HEAD, paths dirty now, paths that were dirty at the last scan or
+        written by the watcher since (they may have been reverted), and
+        indexed files git does not track.
+        Returns None when git cannot vouch for the rest of the tree and a
+        full walk is needed.
+        """
+        stored = self._manifest.get_meta(GIT_STATE_KEY)
+        if not stored or len(self._manifest) == 0:
+            return None
+        last = json.loads(stored)
+        root = self.file_filter.root
+        if last.get("root") != str(root):
+            return None
+        if (top / ".gitmodules").exists():
+            return None  # changes inside submodules are invisible to the outer repo
+
+        committed = git_changes.changed_since(top, last["head"], root)
+        tracked = git_changes.tracked_files(top, root)
+        if committed is None or tracked is None:
+            return None  # e.g. the last indexed commit was garbage-collected
+
+        candidates = {top / rel for rel in (*committed, *state.dirty, *last.get("dirty", []))}
+        candidates.update(Path(p) for p in last.get("touched", []))
+        prefix = str(top) + os.sep
+        for p in self._manifest.paths():
+            rel = p[len(prefix):].replace(os.sep, "/") if p.startswith(prefix) else None
+            if rel not in tracked:
+                candidates.add(Path(p))
+
+        candidates = [p for p in candidates if p.is_relative_to(root)]
+        # Ignore files among them may have changed since their rules were cached
+        for p in candidates:
+            if p.name in IGNORE_FILES:
+                self.file_filter.invalidate(p.parent)
+        stats = self.file_filter.stat_files(candidates, workers=settings.scan_workers)
+        to_check: Dict[Path, os.stat_result] = {}
+        to_remove = set()
+        for path in candidates:
+            st = stats.get(path)
+            if st is not None and not self.file_filter.should_index(path, st):
+                to_check[path] = st
+            elif str(path) in self._manifest:
+                to_remove.add(str(path))
+
+        # A changed ignore file may flip the verdict of anything below it: walk that subtree
+        rule_dirs = {
+            p.parent for p in candidates
+            if p.name in IGNORE_FILES and (
+                str(p) in to_remove
+                or (p in to_check and self._change_state(p, self._file_fingerprint(p, to_check[p])) != "unchanged")
+            )
+        }
+        for directory in rule_dirs:
+            if directory == root:
+                return None
+            walked, gone, _ = self._walk_plan(directory)
+            to_check.update(walked)
+            to_remove.update(gone)
+        return to_check, sorted(to_remove)
+
+    def _record_git_state(self, state: "git_changes.GitState | None", touched: Set[str] = frozenset()):
+        """Remember the commit and dirty paths this scan reflects (committed with the manifest).
+
+        ``touched``: files written outside the scan since its git state was read.
+        """
+        if state is None:
+            return
+        self._manifest.set_meta(GIT_STATE_KEY, json.dumps({
+            "root": str(self.file_filter.root),
+            "head": state.head,
+            "dirty": state.dirty,
+            "touched": sorted(touched),
+        }))
+
+    def _git_touched(self) -> Set[str]:
+        stored = self._manifest.get_meta(GIT_STATE_KEY)
+        return set(json.loads(stored).get("touched", [])) if stored else set()
+
+    def _touch_git_state(self, paths: List[str]):
+        """Add files written outside a scan to the stored git state, for the next git plan.
+
+        Git cannot vouch for them: an edit the watcher indexed and ``git
+        checkout`` reverted while the server was down leaves git status clean.
+        Joins the manifest transaction the writes themselves are committed in.
+        """
+        with self._write_lock:
+            stored = self._manifest.get_meta(GIT_STATE_KEY)
+            if not stored:
+                return
+            state = json.loads(stored)
+            touched = set(state.get("touched", []))
+            if touched.issuperset(paths):
+                return
+            state["touched"] = sorted(touched.union(paths))
+            self._manifest.set_meta(GIT_STATE_KEY, json.dumps(state))
+
+    def _walk_plan(self, directory: Path | None = None) -> tuple:
+        """Walk the docs tree (or one subtree): ({path: stat}, indexed paths now gone or filtered, skipped)."""
+        stats, skipped = self.file_filter.scan_files(directory, workers=settings.scan_workers)
+        present = {str(p) for p in stats}
+        prefix = None if directory is None else str(directory) + os.sep
+        removed = [
+            p for p in self._manifest.paths()
+            if p not in present and (prefix is None or p.startswith(prefix))
+        ]
+        return stats, removed, skipped
+
+    def ignore_rules_changed(self, ignore_file: str):
+        """An ignore file was created, edited or removed: re-judge only the files below it.
+
+        Newly ignored files are evicted from the index, newly included ones
+        are indexed; nothing outside the file's directory is touched.
+        """
+        directory = Path(ignore_file).parent
+        if not directory.is_relative_to(self.file_filter.root):
+            directory = directory.resolve()
+        self.file_filter.invalidate(directory)
+        stats, removed, _ = self._walk_plan(directory)
+        for path in removed:
+            self.remove_file(path)
+        to_index = self._select_changed(stats)
+        for path in to_index:
+            self.index_file(str(path))
+        self._save_manifest()
+        logger.info(
+            f"Ignore rules changed in {directory}: "
+            f"{len(removed)} files evicted, {len(to_index)} indexed"
+        )
 
-        import threading
-        threading.Thread(target=run_reindex, daemon=True).start()
+    def remove_file(self, file_path: str):
+        """Drop a file's chunks and manifest entry (journaled like any other write)."""
+        with self._events_lock:
+            if self._pending_events is not None:
+                self._pending_events.add(file_path)
+        with self._write_lock:
+            if file_path not in self._manifest:
+                return
+            record = JournalRecord(
+                path=file_path,
+                fingerprint=None,
+                stale_ids=[self._chunk_id(file_path, i) for i in range(self._manifest.chunks(file_path))],
+            )
+            self._journal.append(record)
+            self._apply_record(record)
+        logger.info(f"Removed {Path(file_path).name} from the index.")
 
     # ── Full scan (incremental) ─────────────────────────────
-    def index_directory(self):
-        """Walk the docs directory — only index new/changed files."""
-        indexable, skipped = self.file_filter.collect_files()
+    def index_directory(self) -> Dict[str, int]:
+        """Index new/changed files and drop deleted ones.
 
-        # Split into new/changed vs unchanged
-        to_index = [p for p in indexable if self._needs_reindex(p)]
+        In a git work tree the candidates come from git (see _git_plan);
+        otherwise — or when git cannot vouch for the tree — the docs
+        directory is walked and every file compared with the manifest.
+        Returns how many files were to index, were unchanged and were removed.
+        """
+        if self._pending_events is not None:
+            logger.info("Rebuild in progress; skipping incremental scan (the rebuild covers it).")
+            return {"to_index": 0, "unchanged": 0, "removed": 0}
+
+        # Read git state before looking at any file, so edits racing the scan show up next time
+        top = git_changes.repo_root(self.file_filter.root) if settings.git_scan else None
+        git_state = git_changes.read_state(top, self.file_filter.root) if top else None
+        touched_before = self._git_touched()
+        plan = self._git_plan(top, git_state) if git_state else None
+
+        if plan is not None:
+            indexable, removed = plan
+            skipped = 0
+            logger.info(f"Git change detection: {len(indexable)} candidates, {len(removed)} deleted")
+        else:
+            indexable, removed, skipped = self._walk_plan()
+
+        for path in removed:
+            self.remove_file(path)
+
+        # Split into new/changed vs unchanged; recent, nearby source files first
+        to_index = prioritize(self._select_changed(indexable), indexable)
         unchanged = len(indexable) - len(to_index)
 
         if unchanged > 0:
             logger.info(f"Skipping {unchanged} unchanged files (already indexed)")
 
-        monitor.begin_scan(len(to_index), skipped=skipped)
+        self.monitor.begin_scan(
+            len(to_index),
+            skipped=skipped,
+            skip_reasons=self.file_filter.last_skip_reasons if plan is None else None,
+        )
         logger.info(
             f"Starting scan: {len(to_index)} to index, "
             f"{unchanged} unchanged, {skipped} filtered"
@@ -357,51 +1105,252 @@ class IndexerService:
 
         if not to_index:
             # Nothing to do — restore stats from manifest
-            total_chunks = sum(m.get("chunks", 0) for m in self._manifest.values())
-            size_mb = self._calc_index_size()
-            monitor.update_stats(
-                files_discovered=len(indexable),
+            self._record_git_state(git_state, self._git_touched() - touched_before)
+            if removed or git_state is not None:
+                self._save_manifest()
+            total_chunks = self._manifest.total_chunks()
+            self.monitor.update_stats(
+                files_discovered=len(self._manifest) if plan is not None else len(indexable),
                 files_indexed=len(self._manifest),
                 total_chunks=total_chunks,
             )
-            monitor.finish_scan(index_size_mb=size_mb)
-            logger.info(f"Index up to date. {len(self._manifest)} files, {total_chunks} chunks, {size_mb:.2f} MB")
-            return
+            self.monitor.finish_scan()
+            self._request_index_size_refresh(force=True)
+            logger.info(f"Index up to date. {len(self._manifest)} files, {total_chunks} chunks")
+            return {"to_index": 0, "unchanged": unchanged, "removed": len(removed)}
 
-        for i, fpath in enumerate(to_index):
-            self.index_file(str(fpath))
-            if (i + 1) % 10 == 0:
-                self._save_manifest()
-                monitor.update_stats(index_size_mb=self._calc_index_size())
+        self._start_embed_pool(len(to_index))
+        self._scan_fresh = set()
+        try:
+            self._index_files(to_index)
+        finally:
+            self._scan_fresh = None
+            self._stop_embed_pool()
 
+        self._record_git_state(git_state, self._git_touched() - touched_before)
         self._save_manifest()
-        size_mb = self._calc_index_size()
-        monitor.finish_scan(index_size_mb=size_mb)
+        self.monitor.finish_scan()
+        self._request_index_size_refresh(force=True)
         logger.info(
             f"Finished scan. "
-            f"Indexed {monitor.stats['files_indexed']}/{len(to_index)} new files, "
-            f"{monitor.stats['total_chunks']} chunks, {size_mb:.2f} MB"
+            f"Indexed {self.monitor.stats['files_indexed']}/{len(to_index)} new files, "
+            f"{self.monitor.stats['total_chunks']} chunks"
+        )
+        return {"to_index": len(to_index), "unchanged": unchanged, "removed": len(removed)}
+
+    def _index_files(self, paths: List[Path]):
+        """Index a scan's files — several at a time when an embedding pool is running.
+
+        Files the watcher already indexed during the scan are not done twice.
+        """
+        fresh = self._scan_fresh if self._scan_fresh is not None else set()
+        paths = (p for p in paths if str(p) not in fresh)
+        if self._embed_pool is None:
+            for i, fpath in enumerate(paths):
+                self.index_file(str(fpath))
+                self._maybe_checkpoint()
+                if (i + 1) % 10 == 0:
+                    self._request_index_size_refresh()
+            return
+
+        # Enough files in flight to keep every worker busy, without queueing the whole scan
+        in_flight = self._embed_pool.workers * 2
+        done = 0
+        with ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="scan-index") as executor:
+            pending = set()
+            for fpath in paths:
+                pending.add(executor.submit(self.index_file, str(fpath)))
+                if len(pending) < in_flight:
+                    continue
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done += len(finished)
+                self._maybe_checkpoint()
+                if done % 10 < len(finished):
+                    self._request_index_size_refresh()
+            wait(pending)
+
+    def _start_embed_pool(self, files: int):
+        if self.provider != "fastembed" or files < POOL_MIN_FILES:
+            return
+        workers = settings.embed_processes or default_workers()
+        if workers <= 1:
+            return
+        pool = EmbedPool(self.model_name, workers, batch_size=settings.embed_batch_size)
+        try:
+            pool.start()
+        except Exception as exc:
+            logger.warning(f"Embedding pool unavailable, embedding in-process: {exc}")
+            pool.close()
+            return
+        self._embed_pool = pool
+
+    def _stop_embed_pool(self):
+        pool, self._embed_pool = self._embed_pool, None
+        if pool is not None:
+            pool.close()
+
+    # ── Snapshots ───────────────────────────────────────────
+    def export_snapshot(self, snapshot_path: Path) -> Dict[str, int]:
+        """Write every up-to-date indexed file to a portable snapshot.
+
+        Files are keyed by their path relative to the docs root and a
+        portable content hash, so the snapshot means the same thing in any
+        checkout. Files edited since they were indexed are left out (their
+        vectors describe older contents). Returns files/chunks written and
+        files left out.
+        """
+        root = self.file_filter.root
+        writer = SnapshotWriter(snapshot_path, self.provider, self.model_name, self._get_dimension())
+        stale = 0
+        try:
+            for path in sorted(self._manifest.paths()):
+                chunks = self._manifest.chunks(path)
+                current = self._file_fingerprint(Path(path))
+                if not chunks or not current or self._change_state(Path(path), current) != "unchanged":
+                    stale += 1
+                    continue
+                try:
+                    rel = Path(path).relative_to(root).as_posix()
+                    data = Path(path).read_bytes()
+                except (ValueError, OSError):
+                    stale += 1
+                    continue
+                ids = [self._chunk_id(path, i) for i in range(chunks)]
+                docs = self.collection.fetch(ids)
+                if len(docs) != len(ids):
+                    stale += 1
+                    continue
+                writer.add(SnapshotEntry(
+                    path=rel,
+                    hash=portable_hash(data),
+                    texts=[docs[i].fields.get("text", "") for i in ids],
+                    vectors=np.asarray([docs[i].vector("embedding") for i in ids], dtype=np.float32),
+                ))
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        logger.info(f"Exported {writer.files} files ({writer.chunks} chunks) to {snapshot_path}")
+        return {"files": writer.files, "chunks": writer.chunks, "stale": stale}
+
+    def import_snapshot(self, snapshot_path: Path) -> Dict[str, int]:
+        """Adopt the vectors of a snapshot for files whose local contents match.
+
+        The snapshot must come from the same provider, model and dimension
+        (ValueError otherwise). Each entry is checked against the local tree:
+        a file that exists, passes the file filter and has the same content
+        hash gets the stored chunks and vectors under its local path, written
+        through the journal like any indexed file. Nothing is embedded here —
+        an ``index_directory`` afterwards embeds only what differs. Returns
+        how many files were reused, already indexed, or did not match.
+        """
+        root = self.file_filter.root
+        reused = unchanged = mismatched = 0
+        with SnapshotReader(snapshot_path) as reader:
+            header = reader.header
+            expected = (self.provider, self.model_name, self._get_dimension())
+            found = (header.get("provider"), header.get("model"), header.get("dimension"))
+            if found != expected:
+                raise ValueError(
+                    f"Snapshot was built with {found[0]}/{found[1]} (dim {found[2]}), "
+                    f"this index uses {expected[0]}/{expected[1]} (dim {expected[2]})"
+                )
+            for entry in reader:
+                path = root / entry.path
+                if Path(entry.path).is_absolute() or ".." in Path(entry.path).parts:
+                    mismatched += 1
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    mismatched += 1
+                    continue
+                if not stat.S_ISREG(st.st_mode) or self.file_filter.should_index(path, st):
+                    mismatched += 1
+                    continue
+                fingerprint = self._file_fingerprint(path, st)
+                if self._change_state(path, fingerprint) == "unchanged":
+                    unchanged += 1
+                    continue
+                try:
+                    data = path.read_bytes()
+                except OSError:
+                    mismatched += 1
+                    continue
+                if portable_hash(data) != entry.hash:
+                    mismatched += 1
+                    continue
+                if settings.content_hash:
+                    fingerprint["hash"] = hash_bytes(data)
+
+                key = str(path)
+                count = len(entry.texts)
+                record = JournalRecord(
+                    path=key,
+                    fingerprint=fingerprint,
+                    ids=[self._chunk_id(key, i) for i in range(count)],
+                    texts=entry.texts,
+                    vectors=entry.vectors,
+                    stale_ids=[self._chunk_id(key, i) for i in range(count, self._manifest.chunks(key))],
+                )
+                with self._write_lock:
+                    self._journal.append(record)
+                    self._apply_record(record)
+                reused += 1
+                self._maybe_checkpoint()
+        self._save_manifest()
+        logger.info(
+            f"Imported {reused} files from {snapshot_path} "
+            f"({unchanged} already indexed, {mismatched} differ locally)"
         )
+        return {"reused": reused, "unchanged": unchanged, "mismatched": mismatched}
 
     # ── Index a single file ─────────────────────────────────
-    def index_file(self, file_path: str):
+    def index_file(self, file_path: str, priority: int = INDEX):
         try:
             path = Path(file_path)
 
+            # One stat, shared by the filter and the fingerprint
+            try:
+                st = path.stat()
+            except OSError:
+                return
+
             # Run through file filter (if available)
             if self.file_filter:
-                reason = self.file_filter.should_index(path)
+                reason = self.file_filter.should_index(path, st)
                 if reason:
+                    # Indexed before it grew too large, was ignored, ...: its chunks must go
+                    self.remove_file(str(path))
                     return
 
-            if not path.exists() or not path.is_file():
-                return
+            # During a rebuild, remember the file so it is replayed after the swap
+            with self._events_lock:
+                events = self._pending_events
+                if events is not None:
+                    events.add(str(path))
+            if events is not None and self._serving_embedder is not self:
+                return  # the live collection speaks another model; the rebuild covers it
 
-            try:
-                text = path.read_text(encoding="utf-8")
-            except UnicodeDecodeError:
+            if not stat.S_ISREG(st.st_mode):
                 return
 
+            # Fingerprint before reading, so an edit racing the read is seen next scan
+            fingerprint = self._file_fingerprint(path, st)
+            # Sniff a prefix first: binaries are rejected after a few KB, not a full read
+            with open(path, "rb") as f:
+                data = f.read(SNIFF_BYTES)
+                encoding, reason = sniff(data)
+                if encoding is None:
+                    self.monitor.file_skipped(reason)
+                    logger.info(f"Skipping {path.name}: {reason}")
+                    self.remove_file(str(path))  # it may have been text when last indexed
+                    return
+                data += f.read()
+            text = decode(data, encoding)
+            if settings.content_hash:
+                fingerprint["hash"] = hash_bytes(data)
+
             chunks = self.chunker.split_text(text)
             if not chunks:
                 return
@@ -413,153 +1362,311 @@ class IndexerService:
                 )
                 chunks = chunks[:MAX_CHUNKS]
 
-            monitor.file_started(path.name)
+            self.monitor.file_started(path.name)
 
-            embeddings = self.embed(chunks)
+            embeddings = self.embed(chunks, priority)
             if not embeddings:
-                monitor.file_failed()
+                self.monitor.file_failed()
                 return
 
-            # Build docs
-            all_docs = []
-            for i, (chunk, vec) in enumerate(zip(chunks, embeddings)):
-                chunk_id = hashlib.md5(f"{file_path}:{i}".encode()).hexdigest()
-                all_docs.append(zvec.Doc(
-                    id=chunk_id,
-                    fields={
-                        "id": chunk_id,
-                        "file_path": str(path),
-                        "text": chunk,
-                    },
-                    vectors={
-                        "embedding": vec,
-                    },
-                ))
+            # Journal first, then zvec + manifest (committed at the next checkpoint)
+            with self._write_lock:
+                # Chunks left over from a longer previous version of the file
+                old_chunks = self._manifest.chunks(str(path))
+                record = JournalRecord(
+                    path=str(path),
+                    fingerprint=fingerprint,
+                    ids=[self._chunk_id(file_path, i) for i in range(len(chunks))],
+                    texts=chunks,
+                    vectors=np.asarray(embeddings, dtype=np.float32),
+                    stale_ids=[self._chunk_id(file_path, i) for i in range(len(chunks), old_chunks)],
+                )
+                self._journal.append(record)
+                self._apply_record(record)
 
-            # Batch upsert to avoid "Too many docs" error
-            for start in range(0, len(all_docs), BATCH_SIZE):
-                batch = all_docs[start : start + BATCH_SIZE]
-                self.collection.upsert(batch)
-
-            monitor.file_indexed(len(chunks))
-            # Record in manifest for incremental indexing
-            self._manifest[str(path)] = {
-                "fingerprint": self._file_fingerprint(path),
-                "chunks": len(chunks),
-            }
+            self.monitor.file_indexed(len(chunks))
+            fresh = self._scan_fresh
+            if priority == WATCH and fresh is not None:
+                fresh.add(str(path))
             logger.info(f"Indexed {path.name}: {len(chunks)} chunks.")
 
         except Exception as exc:
             logger.error(f"Error indexing {file_path}: {exc}")
-            monitor.file_failed()
+            self.monitor.file_failed()
 
     # ── Query ───────────────────────────────────────────────
-    def query(self, query_text: str, limit: int = 5, threshold: float = 0.0) -> List[str]:
+    def query(
+        self,
+        query_text: str,
+        limit: int = 5,
+        threshold: float = 0.0,
+        where: SearchFilter | None = None,
+        max_tokens: int | None = None,
+    ) -> List[str]:
+        """Search and format the top chunks as ``[file name] text``.
+
+        With ``max_tokens`` the answer is sized by that budget instead of
+        ``limit``: neighbouring chunks of a file are merged into one span
+        (see context_pack.pack).
+        """
+        if max_tokens:
+            items = self.chunk_positions(self.search(query_text, PACK_CANDIDATES, threshold, where=where))
+            return pack(items, max_tokens, self.chunker.chunk_overlap, self.format_result)
+        return [self.format_result(item) for item in self.search(query_text, limit, threshold, where=where)]
+
+    def query_batch(
+        self, queries: List[str], limit: int = 5, threshold: float = 0.0, where: SearchFilter | None = None
+    ) -> List[List[str]]:
+        """``query`` for several queries at once (see search_batch)."""
+        return [
+            [self.format_result(item) for item in items]
+            for items in self.search_batch(queries, limit, threshold, where=where)
+        ]
+
+    def chunk_positions(self, items: List[Dict]) -> List[Dict]:
+        """Set ``chunk`` (position in its file, None if unknown) on search results.
+
+        Chunk ids are ``md5(path:i)``, so positions are recovered by hashing
+        the first ``n`` ids of each file, ``n`` being its manifest chunk count.
+        """
+        positions: Dict[str, Dict[str, int]] = {}
+        for item in items:
+            path = item["doc"].fields.get("file_path", "")
+            if path not in positions:
+                count = self._manifest.chunks(path) if self._manifest is not None else 0
+                positions[path] = {self._chunk_id(path, i): i for i in range(count or MAX_CHUNKS)}
+            item["chunk"] = positions[path].get(item["doc"].id)
+        return items
+
+    @staticmethod
+    def format_result(item: Dict, project: str | None = None) -> str:
+        fpath = item["doc"].fields.get("file_path", "")
+        fname = Path(fpath).name if fpath else "unknown"
+        return f"[{project}:{fname}] {item['text']}" if project else f"[{fname}] {item['text']}"
+
+    def search(
+        self,
+        query_text: str,
+        limit: int = 5,
+        threshold: float = 0.0,
+        qvec: np.ndarray | None = None,
+        where: SearchFilter | None = None,
+    ) -> List[Dict]:
         """
         Search with 3-stage Pipeline:
         1. Dense Retrieval (OpenAI/FastEmbed) -> 50 candidates
         2. Keyword Boosting (Sparse heuristic) -> 30 candidates
         3. Cross-Encoder Reranking (MsMarco) -> top K
+
+        Returns the top candidates as dicts with ``doc``, ``text`` and
+        ``initial_score``. ``qvec`` skips embedding the query (several
+        projects searched with one embedding). ``where`` restricts the
+        files searched: it is evaluated by zvec during the vector search, so
+        all candidates come from matching files.
         """
+        qvecs = None if qvec is None else [qvec]
+        return self.search_batch([query_text], limit, threshold, qvecs=qvecs, where=where)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        threshold: float = 0.0,
+        qvecs: List[np.ndarray] | None = None,
+        where: SearchFilter | None = None,
+    ) -> List[List[Dict]]:
+        """``search`` for several queries: one embedding call, concurrent vector queries.
+
+        Returns one candidate list per query, in order. The collection lock
+        is held once for the whole batch, so a rebuild swap waits for all of
+        its queries like it would for a single one.
+        """
+        if not queries:
+            return []
         try:
-            vecs = self.embed([query_text])
-            if not vecs:
-                return []
-            qvec = vecs[0]
+            if qvecs is None:
+                # While migrating models, the live collection is queried with its own model
+                embedder = self._serving_embedder
+                if embedder is None:
+                    return [[] for _ in queries]
+                qvecs = embedder.embed(list(queries), priority=QUERY)
+                if len(qvecs) != len(queries):
+                    return [[] for _ in queries]
 
             # 1. Fetch deep candidate pool (50 max)
             candidates_limit = min(limit * 10, 50)
-            results = self.collection.query(
-                vectors=[zvec.VectorQuery(field_name="embedding", vector=qvec)],
-                topk=candidates_limit,
-            )
+            with self._collection_lock:
+                collection = self.collection
+                if collection is None:
+                    return [[] for _ in queries]
+                # A collection without the metadata fields (mid-upgrade) is filtered afterwards
+                expression = where.expression() if where and self._meta_fields else None
+
+                def vector_query(qvec):
+                    return collection.query(
+                        vectors=[zvec.VectorQuery(field_name="embedding", vector=qvec)],
+                        topk=candidates_limit,
+                        filter=expression,
+                    )
+
+                if len(qvecs) == 1:
+                    pools = [vector_query(qvecs[0])]
+                else:
+                    with ThreadPoolExecutor(
+                        max_workers=min(len(qvecs), BATCH_QUERY_WORKERS), thread_name_prefix="query"
+                    ) as pool:
+                        pools = list(pool.map(vector_query, qvecs))
+
+            return [
+                self._rank(query_text, results or [], limit, threshold, where)
+                for query_text, results in zip(queries, pools)
+            ]
 
-            if not results:
-                return []
-
-            # 2. Keyword Boosting (Cheap Sparse)
-            q_lower = query_text.lower().strip()
-            q_tokens = [t for t in q_lower.split() if len(t) > 2]
+        except Exception as exc:
+            logger.error(f"Query error: {exc}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return [[] for _ in queries]
+
+    def _rank(
+        self, query_text: str, results: List, limit: int, threshold: float, where: SearchFilter | None
+    ) -> List[Dict]:
+        """Stages 2 and 3 of ``search`` over one query's vector candidates."""
+        # 2. Keyword Boosting (Cheap Sparse)
+        q_lower = query_text.lower().strip()
+        q_tokens = [t for t in q_lower.split() if len(t) > 2]
+        
+        scored_candidates = []
+        for res in results:
+            if res.score is not None and res.score < threshold:
+                continue
+            if where and not where.matches(self._result_meta(res)):
+                continue
             
-            scored_candidates = []
-            for res in results:
-                if res.score is not None and res.score < threshold:
-                    continue
-                
-                text = res.fields.get("text", "")
-                text_lower = text.lower()
-                
-                # Base vector score
-                score = res.score
-                
-                # Boosts
-                if q_lower in text_lower:
-                    score += 0.2
-                
-                matches = 0
-                for token in q_tokens:
-                    if token in text_lower:
-                        matches += 1
-                if matches > 0:
-                    score += (matches * 0.03)
-
-                scored_candidates.append({
-                    "doc": res, 
-                    "text": text, 
-                    "initial_score": score
-                })
-
-            # Sort by boosted score and take top 30 for expensive reranking
-            scored_candidates.sort(key=lambda x: x["initial_score"], reverse=True)
-            rerank_candidates = scored_candidates[:30]
-
-            # 3. Cross-Encoder Reranking (High Precision)
-            # DISABLED: The default model is English-only and hurts Russian queries.
-            # if self.reranker:
-            #     docs_text = [c["text"] for c in rerank_candidates]
-            #     try:
-            #         # rank returns list of scores
-            #         scores = list(self.reranker.rerank(query_text, docs_text))
-            #         
-            #         # Merge scores back
-            #         for i, score in enumerate(scores):
-            #             rerank_candidates[i]["final_score"] = score
-            #         
-            #         # Sort by Reranker score
-            #         rerank_candidates.sort(key=lambda x: x["final_score"], reverse=True)
-            #         
-            #     except Exception as e:
-            #         logger.warning(f"Reranking failed, falling back to initial scores: {e}")
-            #         # Fallback: just use initial scores
-            #         pass
+            text = res.fields.get("text", "")
+            text_lower = text.lower()
+            
+            # Base vector score
+            score = res.score
             
-            # ── Format Output ───────────────────────────────────────
-            context: List[str] = []
-            for item in rerank_candidates[:limit]:
-                res = item["doc"]
-                fpath = res.fields.get("file_path", "")
-                fname = Path(fpath).name if fpath else "unknown"
-                context.append(f"[{fname}] {item['text']}")
+            # Boosts
+            if q_lower in text_lower:
+                score += 0.2
             
-            return context
+            matches = 0
+            for token in q_tokens:
+                if token in text_lower:
+                    matches += 1
+            if matches > 0:
+                score += (matches * 0.03)
+
+            scored_candidates.append({
+                "doc": res, 
+                "text": text, 
+                "initial_score": score
+            })
+
+        # Sort by boosted score and take top 30 for expensive reranking
+        scored_candidates.sort(key=lambda x: x["initial_score"], reverse=True)
+        rerank_candidates = scored_candidates[:30]
+
+        # 3. Cross-Encoder Reranking (High Precision)
+        # DISABLED: The default model is English-only and hurts Russian queries.
+        # if self.reranker:
+        #     docs_text = [c["text"] for c in rerank_candidates]
+        #     try:
+        #         # rank returns list of scores
+        #         scores = list(self.reranker.rerank(query_text, docs_text))
+        #         
+        #         # Merge scores back
+        #         for i, score in enumerate(scores):
+        #             rerank_candidates[i]["final_score"] = score
+        #         
+        #         # Sort by Reranker score
+        #         rerank_candidates.sort(key=lambda x: x["final_score"], reverse=True)
+        #         
+        #     except Exception as e:
+        #         logger.warning(f"Reranking failed, falling back to initial scores: {e}")
+        #         # Fallback: just use initial scores
+        #         pass
+        
+        return rerank_candidates[:limit]
+
+    def _result_meta(self, res) -> Dict:
+        if "rel_path" in res.fields:
+            return res.fields
+        root = self.file_filter.root if self.file_filter else Path(self.docs_path).resolve()
+        return chunk_metadata(res.fields.get("file_path", ""), root, None)
 
+    def warm_up(self):
+        """Pay one-time costs (model session setup, first allocations, zvec load) before the first search."""
+        started = time.perf_counter()
+        try:
+            embedder = self._serving_embedder
+            vecs = embedder.embed(["warm-up query"], priority=QUERY) if embedder is not None else []
+            if vecs:
+                with self._collection_lock:
+                    if self.collection is not None:
+                        self.collection.query(
+                            vectors=[zvec.VectorQuery(field_name="embedding", vector=vecs[0])],
+                            topk=1,
+                        )
         except Exception as exc:
-            logger.error(f"Query error: {exc}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return []
+            logger.warning(f"Warm-up failed: {exc}")
+        self.monitor.update_stats(warm=True)
+        logger.info(f"Warm-up done in {time.perf_counter() - started:.2f}s")
 
     # ── Helpers ─────────────────────────────────────────────
     def _calc_index_size(self) -> float:
-        try:
-            total = sum(
-                f.stat().st_size
-                for f in Path(settings.zvec_path).rglob("*")
-                if f.is_file()
-            )
-            return total / (1024 * 1024)
-        except Exception:
-            return 0.0
+        """Walk the index directory and sum file sizes (MB). Never call on the hot path."""
+        total = 0
+        stack = [str(self.zvec_path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                total += entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return total / (1024 * 1024)
+
+    def _request_index_size_refresh(self, force: bool = False):
+        """Re-measure the index size in a background thread, at most once per interval.
+
+        ``force`` bypasses the rate limit (used at the end of a scan); if a
+        measurement is already running it is repeated once it finishes so the
+        final figure reflects every write.
+        """
+        with self._size_lock:
+            if self._size_refresh_running:
+                if force:
+                    self._size_refresh_again = True
+                return
+            elapsed = time.monotonic() - self._size_refreshed_at
+            if not force and elapsed < INDEX_SIZE_REFRESH_SECS:
+                return
+            self._size_refresh_running = True
+        threading.Thread(target=self._refresh_index_size, daemon=True).start()
+
+    def _refresh_index_size(self):
+        while True:
+            try:
+                self._index_size_mb = self._calc_index_size()
+                self.monitor.update_stats(index_size_mb=self._index_size_mb)
+            except Exception as e:
+                logger.warning(f"Failed to measure index size: {e}")
+            with self._size_lock:
+                if not self._size_refresh_again:
+                    self._size_refresh_running = False
+                    self._size_refreshed_at = time.monotonic()
+                    return
+                self._size_refresh_again = False
 
     def _get_total_vectors(self) -> int:
         try:
@@ -576,22 +1683,30 @@ class IndexerService:
     def get_stats(self) -> Dict:
         return {
             "total_vectors": self._get_total_vectors(),
+            "index_size_mb": round(self._index_size_mb, 2),
             "backend": "zvec",
+            "readiness": self.monitor.readiness(),
         }
 
 
 # ── File watcher ────────────────────────────────────────────
 class DocsEventHandler(FileSystemEventHandler):
-    def __init__(self, idx: IndexerService):
-        self.indexer = idx
+    """Runs on watchdog's observer thread, so it only enqueues: workers do the indexing."""
 
-    def on_created(self, event):
-        if not event.is_directory:
-            self.indexer.index_file(event.src_path)
+    def __init__(self, queue: WatchQueue, suppressed: tuple = ()):
+        self.queue = queue
+        self.suppressed = suppressed  # path prefixes whose events are dropped outright
 
-    def on_modified(self, event):
-        if not event.is_directory:
-            self.indexer.index_file(event.src_path)
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return  # a file in it changed: that file has its own event
+        # Moves (incl. editors' atomic saves): the old path is gone, the new one changed.
+        # A directory's path is handled as its whole subtree (see handle_file_event).
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and not (path + os.sep).startswith(self.suppressed):
+                self.queue.put(path)
 
 
 indexer = IndexerService()
@@ -0,0 +1,131 @@
+"""Write-ahead journal for indexing runs — makes interrupted scans resumable."""
+
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .monitor import logger
+
+
+JOURNAL_NAME = "index.journal"
+
+# Frame: header length, vector-bytes length, crc32 of (header + vectors)
+_FRAME = struct.Struct("<III")
+
+
+@dataclass
+class JournalRecord:
+    """Everything needed to (re)apply one file's write without re-embedding it.
+
+    ``fingerprint=None`` marks a removal: the file's chunks are deleted and
+    its manifest entry dropped.
+    """
+
+    path: str
+    fingerprint: Optional[dict]
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    vectors: Optional[np.ndarray] = None  # float32, shape (len(ids), dim)
+    stale_ids: List[str] = field(default_factory=list)
+
+    def encode(self) -> bytes:
+        vectors = b""
+        dim = 0
+        if self.vectors is not None and len(self.vectors):
+            arr = np.ascontiguousarray(self.vectors, dtype="<f4")
+            vectors = arr.tobytes()
+            dim = arr.shape[1]
+        header = json.dumps({
+            "path": self.path,
+            "fingerprint": self.fingerprint,
+            "ids": self.ids,
+            "texts": self.texts,
+            "stale_ids": self.stale_ids,
+            "dim": dim,
+        }).encode("utf-8")
+        crc = zlib.crc32(header + vectors)
+        return _FRAME.pack(len(header), len(vectors), crc) + header + vectors
+
+    @classmethod
+    def decode(cls, header: bytes, vectors: bytes) -> "JournalRecord":
+        meta = json.loads(header.decode("utf-8"))
+        arr = None
+        if meta["dim"]:
+            arr = np.frombuffer(vectors, dtype="<f4").reshape(-1, meta["dim"])
+        return cls(
+            path=meta["path"],
+            fingerprint=meta["fingerprint"],
+            ids=meta["ids"],
+            texts=meta["texts"],
+            vectors=arr,
+            stale_ids=meta["stale_ids"],
+        )
+
+
+# fdatasync skips the inode timestamps; not available everywhere (e.g. macOS)
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+
+class IndexJournal:
+    """Append-only log of index writes not yet covered by a checkpoint.
+
+    A file's complete set of chunks (ids, texts, vectors) is appended here
+    *before* it is upserted into zvec. A checkpoint (zvec flush, then manifest
+    commit) truncates the log. Records left after a crash are replayed on the
+    next start, re-applying the stored vectors: already-embedded files are
+    never embedded twice, and a file whose upsert was cut short is rewritten
+    in full. A torn final record (crash mid-append) is ignored — that file
+    had not reached zvec yet.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self.pending = 0  # records appended since the last reset
+
+    def append(self, record: JournalRecord):
+        """Write one record and sync it: it must be on disk before its upsert starts."""
+        frame = memoryview(record.encode())
+        while frame:  # write() may be short (signals, disk nearly full)
+            frame = frame[os.write(self._fd, frame):]
+        _datasync(self._fd)
+        self.pending += 1
+
+    def size(self) -> int:
+        return os.fstat(self._fd).st_size
+
+    def records(self) -> List[JournalRecord]:
+        """Read every complete record, stopping at the first torn or corrupt one."""
+        out: List[JournalRecord] = []
+        data = self.path.read_bytes()
+        pos = 0
+        while pos + _FRAME.size <= len(data):
+            header_len, vec_len, crc = _FRAME.unpack_from(data, pos)
+            start = pos + _FRAME.size
+            end = start + header_len + vec_len
+            if end > len(data):
+                break
+            payload = data[start:end]
+            if zlib.crc32(payload) != crc:
+                logger.warning(f"Journal record at offset {pos} is corrupt; ignoring the rest.")
+                break
+            out.append(JournalRecord.decode(payload[:header_len], payload[header_len:]))
+            pos = end
+        return out
+
+    def reset(self):
+        """Drop all records — called once they are covered by a checkpoint."""
+        os.ftruncate(self._fd, 0)
+        self.pending = 0
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,438 @@
+"""Transactional manifest store — file fingerprints backed by SQLite (WAL)."""
+
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .monitor import logger
+
+
+MANIFEST_DB_NAME = "manifest.db"
+_DIGEST_SIZE = 16  # bytes of an "algo:<hex>" content hash (see fingerprint.hash_bytes)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path   TEXT PRIMARY KEY,
+    mtime  REAL,
+    size   INTEGER,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    hash   TEXT,     -- only hashes that are not "algo:<32 hex digits>"
+    algo   INTEGER,  -- hash_algos.id of an "algo:<hex>" hash
+    digest BLOB      -- and its raw 16-byte digest
+);
+CREATE TABLE IF NOT EXISTS hash_algos (
+    id   INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+)
+"""
+_MAX_ALGOS = 255  # algorithm ids are kept in a byte per row
+
+
+class ManifestStore:
+    """Per-file fingerprints and chunk counts used for incremental indexing.
+
+    Every write is a single-row upsert inside an open transaction; nothing is
+    durable until ``commit()``, so callers decide the batch size. SQLite runs
+    in WAL mode, so a crash loses at most the uncommitted batch and never
+    corrupts what was already committed. Lookups are served from an in-memory
+    mirror (see _Mirror) loaded on open.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self._algos: Dict[int, str] = {}  # hash_algos, shared with the mirror
+        self._algo_ids: Dict[str, int] = {}
+        self._entries = _Mirror(self._algos)
+        self._in_tx = False
+        self._conn = self._connect()
+        self._load()
+
+    # ── Connection ──────────────────────────────────────────
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            conn = self._open_connection()
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"Manifest DB unreadable ({e}). Starting with an empty manifest.")
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+            conn = self._open_connection()
+        return conn
+
+    def _open_connection(self) -> sqlite3.Connection:
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves to control batching
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+            if "hash" not in columns:  # manifests written before content hashing
+                conn.execute("ALTER TABLE files ADD COLUMN hash TEXT")
+            if "digest" not in columns:  # hashes were stored as hex text
+                self._split_hashes(conn)
+            conn.execute("SELECT count(*) FROM files").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _split_hashes(self, conn: sqlite3.Connection):
+        """Move "algo:<hex>" hashes into the algo/digest columns (one-time upgrade)."""
+        conn.execute("ALTER TABLE files ADD COLUMN algo INTEGER")
+        conn.execute("ALTER TABLE files ADD COLUMN digest BLOB")
+        rows = conn.execute("SELECT rowid, hash FROM files WHERE hash IS NOT NULL").fetchall()
+        conn.execute("BEGIN")
+        updates = []
+        for rowid, digest in rows:
+            algo, raw, odd = _split_hash(digest)
+            if algo is not None:
+                conn.execute("INSERT OR IGNORE INTO hash_algos (name) VALUES (?)", (algo,))
+                algo = conn.execute("SELECT id FROM hash_algos WHERE name = ?", (algo,)).fetchone()[0]
+            updates.append((algo, raw, odd, rowid))
+        conn.executemany("UPDATE files SET algo = ?, digest = ?, hash = ? WHERE rowid = ?", updates)
+        conn.execute("COMMIT")
+
+    def _load(self):
+        for algo_id, name in self._conn.execute("SELECT id, name FROM hash_algos"):
+            self._algos[algo_id] = name
+            self._algo_ids[name] = algo_id
+        # Columns come back ready for the mirror's arrays; a small int per
+        # row for the algorithm costs no object, unlike its name
+        rows = self._conn.execute(
+            "SELECT path, mtime, IFNULL(size, -1), chunks, IFNULL(algo, 0), "
+            "IFNULL(digest, zeroblob(?)) FROM files",
+            (_DIGEST_SIZE,),
+        ).fetchall()
+        odd = dict(self._conn.execute("SELECT path, hash FROM files WHERE hash IS NOT NULL"))
+        try:
+            self._entries.load(rows, odd)
+        except ValueError as e:  # rows not written by put(): check them one by one
+            logger.warning(f"Manifest mirror: {e}, loading row by row")
+            self._entries = _Mirror(self._algos)
+            for path, mtime, size, chunks, algo, digest in rows:
+                if algo not in self._algos or len(digest) != _DIGEST_SIZE:
+                    algo = digest = None
+                packed = (algo, digest, odd.get(path))
+                self._entries.put(path, mtime, None if size < 0 else size, chunks, packed)
+        if rows:
+            logger.info(f"Loaded manifest: {len(rows)} files")
+
+    def close(self):
+        """Close the connection. Uncommitted writes are rolled back."""
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._in_tx:
+                self._conn.execute("ROLLBACK")
+                self._in_tx = False
+            self._conn.close()
+            self._conn = None
+
+    # ── Reads (in-memory mirror) ────────────────────────────
+    def get(self, path: str) -> Optional[dict]:
+        """The entry as ``{"fingerprint": {...}, "chunks": n}`` (built on demand)."""
+        with self._lock:
+            row = self._entries.row(path)
+            if row is None:
+                return None
+            return {"fingerprint": self._entries.fingerprint(row), "chunks": self._entries.chunks[row]}
+
+    def fingerprint(self, path: str) -> Optional[dict]:
+        """Just the stored fingerprint — the hot lookup for change detection."""
+        with self._lock:
+            row = self._entries.row(path)
+            return None if row is None else self._entries.fingerprint(row)
+
+    def chunks(self, path: str) -> int:
+        """Chunk count stored for ``path`` (0 if it is not indexed)."""
+        with self._lock:
+            row = self._entries.row(path)
+            return 0 if row is None else self._entries.chunks[row]
+
+    def __contains__(self, path: str) -> bool:
+        return self._entries.row(path) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def paths(self) -> List[str]:
+        """Snapshot of every path, without materializing entries."""
+        with self._lock:
+            return self._entries.paths()
+
+    def paths_under(self, directory: str) -> List[str]:
+        """Every path below ``directory`` (a prefix ending in a separator)."""
+        with self._lock:
+            return self._entries.paths_under(directory)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with self._lock:
+            return iter([(path, self.get(path)) for path in self._entries.paths()])
+
+    def total_chunks(self) -> int:
+        return self._entries.total_chunks
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # ── Writes (transactional) ──────────────────────────────
+    def _begin(self):
+        if not self._in_tx:
+            self._conn.execute("BEGIN")
+            self._in_tx = True
+
+    def put(self, path: str, fingerprint: dict, chunks: int):
+        """Upsert one file's entry into the current transaction."""
+        with self._lock:
+            self._begin()
+            mtime, size = fingerprint.get("mtime"), fingerprint.get("size")
+            packed = self._pack_hash(fingerprint.get("hash"))
+            self._conn.execute(
+                "INSERT INTO files (path, mtime, size, chunks, algo, digest, hash) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime=excluded.mtime, size=excluded.size, "
+                "chunks=excluded.chunks, algo=excluded.algo, digest=excluded.digest, hash=excluded.hash",
+                (path, mtime, size, chunks, *packed),
+            )
+            self._entries.put(path, mtime, size, chunks, packed)
+
+    def _pack_hash(self, digest: Optional[str]) -> Tuple[Optional[int], Optional[bytes], Optional[str]]:
+        """A content hash as ``(algo id, raw digest, None)``, or ``(None, None, hash)``
+        for one that is kept verbatim. New algorithms join hash_algos in the
+        current transaction."""
+        algo, raw, odd = _split_hash(digest)
+        if algo is None:
+            return None, None, odd
+        algo_id = self._algo_ids.get(algo)
+        if algo_id is None:
+            if len(self._algos) >= _MAX_ALGOS:
+                return None, None, digest
+            algo_id = self._conn.execute("INSERT INTO hash_algos (name) VALUES (?)", (algo,)).lastrowid
+            self._algos[algo_id] = algo
+            self._algo_ids[algo] = algo_id
+        return algo_id, raw, None
+
+    def remove(self, path: str):
+        with self._lock:
+            if not self._entries.remove(path):
+                return
+            self._begin()
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def set_meta(self, key: str, value: str):
+        """Store an index-wide value (e.g. the last indexed git commit) in the current transaction."""
+        with self._lock:
+            self._begin()
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._begin()
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM meta")
+            self._entries = _Mirror(self._algos)
+
+    def commit(self):
+        """Make every write since the last commit durable, atomically."""
+        with self._lock:
+            if self._in_tx:
+                self._conn.execute("COMMIT")
+                self._in_tx = False
+
+    # ── Legacy JSON migration ───────────────────────────────
+    def import_json(self, json_path: Path) -> int:
+        """Import a legacy ``.source-mcp_manifest.json`` and commit. Returns the file count."""
+        data = json.loads(Path(json_path).read_text())
+        with self._lock:
+            for path, entry in data.items():
+                self.put(path, entry.get("fingerprint", {}), entry.get("chunks", 0))
+            self.commit()
+        return len(data)
+
+
+class _Mirror:
+    """Compact in-memory copy of the ``files`` table.
+
+    Paths are split into a directory, stored once per directory, and a file
+    name, kept only as a key of its directory's ``{name: row}`` dict; each
+    file is a row in parallel typed arrays (mtime, size, chunks,
+    hash algorithm + 16-byte digest) rather than a dict of dicts. That is
+    about a third of the memory of nested dicts, and the chunk total is
+    a running sum. Removed rows are recycled.
+    """
+
+    def __init__(self, algos: Dict[int, str]):
+        self._index: Dict[str, Dict[str, int]] = {}  # directory -> {file name -> row}
+        self.mtime = array("d")
+        self.size = array("q")
+        self.chunks = array("l")
+        self._algo = array("B")          # key into _algos; 0 = no hash
+        self._digest = bytearray()       # _DIGEST_SIZE bytes per row
+        self._algos = algos              # the store's hash_algos
+        self._odd_hashes: Dict[int, str] = {}  # rows whose hash is not algo:<16-byte hex>
+        self._free: List[int] = []
+        self._count = 0
+        self.total_chunks = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def row(self, path: str) -> Optional[int]:
+        directory, name = _split(path)
+        names = self._index.get(directory)
+        return None if names is None else names.get(name)
+
+    def paths(self) -> List[str]:
+        return [directory + name for directory, names in self._index.items() for name in names]
+
+    def paths_under(self, prefix: str) -> List[str]:
+        return [
+            directory + name
+            for directory, names in self._index.items() if directory.startswith(prefix)
+            for name in names
+        ]
+
+    def fingerprint(self, row: int) -> dict:
+        mtime, size = self.mtime[row], self.size[row]
+        fingerprint = {
+            "mtime": None if math.isnan(mtime) else mtime,
+            "size": None if size < 0 else size,
+        }
+        digest = self._hash(row)
+        if digest:
+            fingerprint["hash"] = digest
+        return fingerprint
+
+    def load(self, rows: List[tuple], odd_hashes: Dict[str, str]):
+        """Fill an empty mirror in bulk from ``(path, mtime, size, chunks, algo,
+        digest)`` rows, with SQL having already turned missing sizes into -1,
+        algorithms into 0 and digests into zero bytes: only the path index is
+        built row by row, the columns go into the arrays whole. The few hashes
+        kept verbatim come separately, by path."""
+        if not rows:
+            return
+        paths, mtimes, sizes, chunks, algos, digests = (
+            list(map(itemgetter(column), rows)) for column in range(6)
+        )
+        directories = {}  # head -> the directory's {name: row}
+        for row, path in enumerate(paths):
+            head, sep, name = path.rpartition(os.sep)
+            names = directories.get(head)
+            if names is None:
+                names = directories[head] = self._index[sys.intern(head + sep)] = {}
+            names[name] = row
+        if None in mtimes:
+            mtimes = [math.nan if mtime is None else mtime for mtime in mtimes]
+        self.mtime = array("d", mtimes)
+        self.size = array("q", sizes)
+        self.chunks = array("l", chunks)
+        self.total_chunks = sum(chunks)
+        if not set(algos) <= self._algos.keys() | {0}:
+            raise ValueError("unknown hash algorithm id")
+        self._algo = array("B", algos)
+        self._digest = bytearray(b"".join(digests))
+        if len(self._digest) != _DIGEST_SIZE * len(paths):
+            raise ValueError("digest of the wrong size")
+        self._odd_hashes = {self.row(path): digest for path, digest in odd_hashes.items()}
+        self._count = len(paths)
+
+    def put(self, path: str, mtime, size, chunks: int, packed_hash: tuple):
+        directory, name = _split(path)
+        names = self._index.get(directory)
+        row = None if names is None else names.get(name)
+        if row is None:
+            row = self._new_row(directory, name)
+        else:
+            self.total_chunks -= self.chunks[row]
+        self.mtime[row] = math.nan if mtime is None else mtime
+        self.size[row] = -1 if size is None else size
+        self.chunks[row] = chunks
+        self.total_chunks += chunks
+        self._set_hash(row, *packed_hash)
+
+    def remove(self, path: str) -> bool:
+        directory, name = _split(path)
+        names = self._index.get(directory)
+        row = None if names is None else names.pop(name, None)
+        if row is None:
+            return False
+        if not names:
+            del self._index[directory]
+        self.total_chunks -= self.chunks[row]
+        self.chunks[row] = 0
+        self._set_hash(row, None, None, None)
+        self._free.append(row)
+        self._count -= 1
+        return True
+
+    def _new_row(self, directory: str, name: str) -> int:
+        directory = sys.intern(directory)  # one string per directory, shared by its rows
+        names = self._index.setdefault(directory, {})
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.chunks)
+            self.mtime.append(0.0)
+            self.size.append(0)
+            self.chunks.append(0)
+            self._algo.append(0)
+            self._digest.extend(bytes(_DIGEST_SIZE))
+        names[name] = row
+        self._count += 1
+        return row
+
+    def _hash(self, row: int) -> Optional[str]:
+        algo = self._algo[row]
+        if algo:
+            start = row * _DIGEST_SIZE
+            return f"{self._algos[algo]}:{self._digest[start : start + _DIGEST_SIZE].hex()}"
+        return self._odd_hashes.get(row)
+
+    def _set_hash(self, row: int, algo: Optional[int], raw: Optional[bytes], odd: Optional[str]):
+        self._algo[row] = algo or 0
+        self._odd_hashes.pop(row, None)
+        if odd:
+            self._odd_hashes[row] = odd
+        if not algo:
+            return
+        start = row * _DIGEST_SIZE
+        self._digest[start : start + _DIGEST_SIZE] = raw
+
+
+def _split_hash(digest: Optional[str]) -> Tuple[Optional[str], Optional[bytes], Optional[str]]:
+    """A content hash as ``(algo, raw digest, None)`` when it is "algo:<hex>" of
+    a 16-byte digest, else ``(None, None, hash)`` kept verbatim."""
+    if not digest:
+        return None, None, None
+    algo, _, hexdigest = digest.partition(":")
+    try:
+        raw = bytes.fromhex(hexdigest)
+    except ValueError:
+        raw = b""
+    if len(raw) != _DIGEST_SIZE or not algo or raw.hex() != hexdigest:
+        return None, None, digest
+    return algo, raw, None
+
+
+def _split(path: str) -> Tuple[str, str]:
+    """("/src/pkg/", "a.py") — the directory keeps its separator so joining is concatenation."""
+    head, sep, name = path.rpartition(os.sep)
+    return head + sep, name
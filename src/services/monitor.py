@@ -1,7 +1,8 @@
 import logging
+import threading
 from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class MonitorService:
@@ -9,16 +10,23 @@ class MonitorService:
 
     def __init__(self, max_logs: int = 1000):
         self.logs: deque = deque(maxlen=max_logs)
+        # Files are indexed on several threads at once: counters are read-modify-written under it
+        self._stats_lock = threading.RLock()
         self.stats: Dict[str, Any] = {
             "status": "Initializing",
             "files_discovered": 0,
             "files_indexed": 0,
             "files_failed": 0,
             "files_skipped": 0,
+            "skip_reasons": {},  # reason category -> count (filter + content sniffing)
             "total_chunks": 0,
             "index_size_mb": 0.0,
             "current_file": None,
             "indexing_active": False,
+            "queue_depth": 0,  # watcher events waiting to be indexed
+            "watch_mode": None,  # "native" or "poll" once the watcher runs
+            "warm": False,  # first query embedding + vector search done (see IndexerService.warm_up)
+            "first_scan_done": False,
             "last_updated": datetime.now().isoformat(),
         }
 
@@ -35,47 +43,85 @@ class MonitorService:
 
     # ── Stats ───────────────────────────────────────────────
     def update_stats(self, **kwargs):
-        self.stats.update(kwargs)
-        self.stats["last_updated"] = datetime.now().isoformat()
+        with self._stats_lock:
+            self.stats.update(kwargs)
+            self.stats["last_updated"] = datetime.now().isoformat()
 
     def get_stats(self) -> Dict[str, Any]:
-        return dict(self.stats)
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats["readiness"] = self.readiness()
+        return stats
+
+    def readiness(self) -> str:
+        """"warming", "indexing N%" or "ready": whether search latency and results are representative yet."""
+        s = self.stats
+        if not s["warm"]:
+            return "warming"
+        if s["indexing_active"] or not s["first_scan_done"]:
+            discovered = s["files_discovered"]
+            done = s["files_indexed"] + s["files_failed"]
+            return f"indexing {int(100 * done / discovered) if discovered else 0}%"
+        return "ready"
 
     # ── Convenience helpers for indexing progress ───────────
-    def begin_scan(self, files_discovered: int, skipped: int = 0):
+    def begin_scan(self, files_discovered: int, skipped: int = 0, skip_reasons: Optional[Dict[str, int]] = None):
         self.update_stats(
             status="Indexing",
             files_discovered=files_discovered,
             files_indexed=0,
             files_failed=0,
             files_skipped=skipped,
+            skip_reasons=dict(skip_reasons or {}),
             total_chunks=0,
             indexing_active=True,
             current_file=None,
         )
 
+    def begin_migration(self, files: int):
+        """Re-embedding stored chunks with a new model; progress uses the scan counters."""
+        self.begin_scan(files)
+        self.update_stats(status="Migrating")
+
     def file_started(self, filename: str):
         self.update_stats(current_file=filename)
 
     def file_indexed(self, chunks: int):
-        self.update_stats(
-            files_indexed=self.stats["files_indexed"] + 1,
-            total_chunks=self.stats["total_chunks"] + chunks,
-            current_file=None,
-        )
+        with self._stats_lock:
+            self.update_stats(
+                files_indexed=self.stats["files_indexed"] + 1,
+                total_chunks=self.stats["total_chunks"] + chunks,
+                current_file=None,
+            )
+
+    def file_skipped(self, reason: str):
+        """A file rejected after it was picked for indexing (e.g. binary content)."""
+        category = reason.split(":", 1)[0]
+        with self._stats_lock:
+            reasons = dict(self.stats["skip_reasons"])
+            reasons[category] = reasons.get(category, 0) + 1
+            self.update_stats(
+                files_skipped=self.stats["files_skipped"] + 1,
+                skip_reasons=reasons,
+                current_file=None,
+            )
 
     def file_failed(self):
-        self.update_stats(
-            files_failed=self.stats["files_failed"] + 1,
-            current_file=None,
-        )
-
-    def finish_scan(self, index_size_mb: float = 0.0):
+        with self._stats_lock:
+            self.update_stats(
+                files_failed=self.stats["files_failed"] + 1,
+                current_file=None,
+            )
+
+    def finish_scan(self, index_size_mb: Optional[float] = None):
+        # Index size is normally pushed by the indexer's background measurement
+        extra = {} if index_size_mb is None else {"index_size_mb": index_size_mb}
         self.update_stats(
             status="Ready",
             indexing_active=False,
+            first_scan_done=True,
             current_file=None,
-            index_size_mb=index_size_mb,
+            **extra,
         )
 
 
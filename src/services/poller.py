@@ -0,0 +1,163 @@
+"""Polling file watcher for filesystems where inotify is unavailable or silent."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .file_filter import FileFilter
+from .monitor import logger
+
+
+# Filesystems whose changes often never produce inotify events (made by another
+# host, a VM, or a FUSE layer). "auto" watch mode polls on these.
+POLL_FS_TYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "virtiofs", "vboxsf",
+    "fuse.sshfs", "fuse.grpcfuse", "fakeowner", "fuse.osxfs",
+}
+
+_SLICE_SECS = 0.05  # work done between budget checks
+
+
+class ManifestPoller:
+    """Finds changed files by polling, without snapshotting the tree.
+
+    Each cycle walks the docs tree one directory at a time with the file
+    filter's pruning (skip and ignored directories are never listed) and
+    compares every candidate's stat against the manifest fingerprint. The
+    only state it keeps is the fingerprints of changes already reported.
+    Changes go to ``emit`` (the watch queue, which coalesces them); indexed
+    files that were not seen during a full cycle are reported as removed.
+
+    The walk is paced to use at most ``cpu_budget`` of one core: after each
+    slice of work it sleeps in proportion, so a large repo costs a longer
+    cycle rather than a busy CPU. Exposes the Observer surface the indexer
+    uses (start / stop / join / is_alive).
+    """
+
+    def __init__(
+        self,
+        file_filter: FileFilter,
+        lookup: Callable[[str], Optional[dict]],
+        known_paths: Callable[[], Iterable[str]],
+        emit: Callable[[str], None],
+        interval: float = 2.0,
+        cpu_budget: float = 0.1,
+        exclude: Tuple[str, ...] = (),
+    ):
+        self.file_filter = file_filter
+        self._lookup = lookup
+        self._known_paths = known_paths
+        self._emit = emit
+        self.interval = interval
+        self.cpu_budget = min(max(cpu_budget, 0.01), 1.0)
+        self.exclude = exclude
+        self._reported: Dict[str, Tuple[float, int]] = {}  # path -> fingerprint already emitted
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_cycle_secs = 0.0
+
+    # ── Observer surface ────────────────────────────────────
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="manifest-poller", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Polling {self.file_filter.root} for changes "
+            f"(every {self.interval:g}s, CPU budget {self.cpu_budget:.0%})"
+        )
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ── Polling ─────────────────────────────────────────────
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as exc:
+                logger.error(f"Polling cycle failed: {exc}")
+            self.last_cycle_secs = time.monotonic() - started
+            self._stop.wait(self.interval)
+
+    def poll_once(self) -> int:
+        """Run one full cycle. Returns the number of paths emitted."""
+        emitted = 0
+        seen = set()
+        slice_start = time.monotonic()
+        for _, candidates in self.file_filter.walk(exclude=self.exclude):
+            if self._stop.is_set():
+                return emitted  # partial cycle: no deletion pass
+            for path in candidates:
+                key = str(path)
+                seen.add(key)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if self._changed(key, (st.st_mtime, st.st_size)):
+                    self._emit(key)
+                    emitted += 1
+            slice_start = self._pace(slice_start)
+
+        # Indexed files the walk no longer reaches: deleted (or moved away)
+        for key in self._known_paths():
+            if key not in seen:
+                self._emit(key)
+                emitted += 1
+        # Forget reports for paths that are gone or were indexed at the reported version
+        for key in list(self._reported):
+            if key not in seen or _fingerprint(self._lookup(key)) == self._reported[key]:
+                del self._reported[key]
+        return emitted
+
+    def _changed(self, key: str, fingerprint: Tuple[float, int]) -> bool:
+        if _fingerprint(self._lookup(key)) == fingerprint:
+            return False
+        # New or modified: report once per distinct fingerprint (a file the
+        # indexer rejects, e.g. undecodable, is not re-sent every cycle)
+        if self._reported.get(key) == fingerprint:
+            return False
+        self._reported[key] = fingerprint
+        return True
+
+    def _pace(self, slice_start: float) -> float:
+        worked = time.monotonic() - slice_start
+        if worked < _SLICE_SECS:
+            return slice_start
+        self._stop.wait(worked * (1 - self.cpu_budget) / self.cpu_budget)
+        return time.monotonic()
+
+
+def _fingerprint(fp: Optional[dict]) -> Optional[Tuple[float, int]]:
+    if fp is None:
+        return None
+    return fp.get("mtime"), fp.get("size")
+
+
+def filesystem_type(path: Path) -> Optional[str]:
+    """Type of the filesystem ``path`` lives on, from /proc/mounts (Linux only)."""
+    try:
+        mounts = Path("/proc/mounts").read_text().splitlines()
+    except OSError:
+        return None
+    target = str(Path(path).resolve())
+    best, fs_type = "", None
+    for line in mounts:
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        mount_point = fields[1].replace("\\040", " ")
+        inside = target == mount_point or target.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > len(best):
+            best, fs_type = mount_point, fields[2]
+    return fs_type
@@ -0,0 +1,270 @@
+"""Several project roots served by one process: one index each, one embedding model."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .embed_scheduler import QUERY
+from .context_pack import pack
+from .indexer import DEFAULT_FASTEMBED_MODEL, PACK_CANDIDATES, IndexerService, indexer
+from .monitor import MonitorService, logger
+from .search_filter import SearchFilter
+
+
+ALL_PROJECTS = "*"  # selector that fans a search out to every project
+INDEX_DIR = ".source-mcp"
+DB_DIR = "zvec_db"
+
+
+class ProjectRegistry:
+    """The project roots this process serves.
+
+    The main project is the ``indexer`` singleton (settings.docs_path).
+    Every extra root gets its own IndexerService — collection, manifest,
+    journal and watcher under ``<root>/.source-mcp/`` — that adopts the
+    main instance's loaded models, so N projects cost one model in memory
+    and share one embedding scheduler. Each keeps its own scan progress and
+    readiness (a MonitorService per project; the main one is the
+    dashboard's). Projects are addressed by the name of their root
+    directory or by its path.
+    """
+
+    def __init__(self, primary: IndexerService):
+        self.primary = primary
+        self._extra: Dict[str, IndexerService] = {}
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()  # one project opened at a time (see ensure)
+
+    def add(self, root: str) -> IndexerService:
+        """Open (or create) the index of another project root, sharing the main models."""
+        path = Path(root).resolve()
+        name = self._unique_name(path)
+        service = IndexerService(
+            zvec_path=str(path / INDEX_DIR / DB_DIR), docs_path=str(path), monitor=MonitorService()
+        )
+        service._adopt_models(self.primary)
+        service._configured = True
+        service.initialize()
+        with self._lock:
+            self._extra[name] = service
+        logger.info(f"Serving project '{name}' from {path}")
+        return service
+
+    def ensure(self, root: str) -> IndexerService:
+        """The project at ``root``, opened, watched and scanned in the background if it is new.
+
+        Raises ValueError for a root indexed with another embedding model
+        (see _check_model) instead of opening it.
+        """
+        with self._open_lock:
+            try:
+                return self.select(root)[0][1]
+            except KeyError:
+                pass
+            self._check_model(Path(root).resolve())
+            service = self.add(root)
+        service.start_watching()
+        threading.Thread(target=self._warm_and_scan, args=(service,), name="project-scan", daemon=True).start()
+        return service
+
+    @staticmethod
+    def _warm_and_scan(service: IndexerService):
+        service.warm_up()
+        service.index_directory()
+
+    def services(self) -> List[Tuple[str, IndexerService]]:
+        with self._lock:
+            extra = list(self._extra.items())
+        return [(self._name(self.primary), self.primary)] + extra
+
+    def names(self) -> List[str]:
+        return [name for name, _ in self.services()]
+
+    def select(self, project: str | None = None) -> List[Tuple[str, IndexerService]]:
+        """Projects a selector refers to: None -> the main one, "*" -> all, else a name or root path."""
+        services = self.services()
+        if not project:
+            return services[:1]
+        if project == ALL_PROJECTS:
+            return services
+        for name, service in services:
+            if project == name or Path(project).expanduser().resolve() == Path(service.docs_path).resolve():
+                return [(name, service)]
+        raise KeyError(f"Unknown project '{project}'. Available: {', '.join(self.names())}")
+
+    def query(
+        self,
+        query_text: str,
+        limit: int = 5,
+        project: str | None = None,
+        where: SearchFilter | None = None,
+        max_tokens: int | None = None,
+    ) -> List[str]:
+        """Search one project, or fan out and merge by score (results tagged with the project).
+
+        ``max_tokens`` sizes the answer by a token budget instead of ``limit``
+        (see IndexerService.query).
+        """
+        if not max_tokens:
+            return self.query_batch([query_text], limit, project, where)[0]
+        selected = self.select(project)
+        if len(selected) == 1:
+            return selected[0][1].query(query_text, limit, where=where, max_tokens=max_tokens)
+
+        items = []
+        for name, service, item in self._fan_out([query_text], PACK_CANDIDATES, selected, where)[0]:
+            service.chunk_positions([item])
+            items.append({**item, "project": name})
+        overlap = self.primary.chunker.chunk_overlap
+        return pack(items, max_tokens, overlap, lambda item: IndexerService.format_result(item, item["project"]))
+
+    def query_batch(
+        self, queries: List[str], limit: int = 5, project: str | None = None, where: SearchFilter | None = None
+    ) -> List[List[str]]:
+        """``query`` for several queries with one embedding call; one result list per query."""
+        selected = self.select(project)
+        if len(selected) == 1:
+            return selected[0][1].query_batch(queries, limit, where=where)
+        return [
+            [IndexerService.format_result(item, name) for name, _, item in found]
+            for found in self._fan_out(queries, limit, selected, where)
+        ]
+
+    def search_batch(
+        self, queries: List[str], limit: int = 5, project: str | None = None, where: SearchFilter | None = None
+    ) -> List[List[Dict]]:
+        """``query_batch`` before formatting: the result dicts, with ``project`` (None when one
+        project is searched) and ``chunk`` (see IndexerService.chunk_positions) set."""
+        selected = self.select(project)
+        if len(selected) == 1:
+            service = selected[0][1]
+            found = [
+                [(None, service, item) for item in items]
+                for items in service.search_batch(queries, limit, where=where)
+            ]
+        else:
+            found = self._fan_out(queries, limit, selected, where)
+        results = []
+        for entries in found:
+            items = []
+            for name, service, item in entries:
+                service.chunk_positions([item])
+                items.append({**item, "project": name})
+            results.append(items)
+        return results
+
+    def _fan_out(
+        self,
+        queries: List[str],
+        limit: int,
+        selected: List[Tuple[str, IndexerService]],
+        where: SearchFilter | None,
+    ) -> List[List[Tuple[str, IndexerService, Dict]]]:
+        """Search every selected project; per query, the best ``limit`` results across them."""
+        # One embedding per query for every project whose collection speaks the main model
+        vecs = self.primary.embed(list(queries), priority=QUERY)
+        merged: List[list] = [[] for _ in queries]
+        for name, service in selected:
+            shared = vecs if vecs and service._serving_embedder is service else None
+            for found, items in zip(merged, service.search_batch(queries, limit, qvecs=shared, where=where)):
+                found.extend((name, service, item) for item in items)
+        for found in merged:
+            found.sort(key=lambda entry: entry[2]["initial_score"], reverse=True)
+            del found[limit:]
+        return merged
+
+    def readiness(self, project: str | None = None) -> str:
+        """"ready", or what the selected projects are still doing ("other: indexing 40%")."""
+        selected = self.select(project)
+        if len(selected) == 1:
+            return selected[0][1].monitor.readiness()
+        busy = [(name, service.monitor.readiness()) for name, service in selected]
+        busy = [f"{name}: {state}" for name, state in busy if state != "ready"]
+        return ", ".join(busy) or "ready"
+
+    def warm_up(self):
+        for _, service in self.services():
+            service.warm_up()
+
+    def index_all(self):
+        """Initial scans, one project after another (they share the model)."""
+        for name, service in self.services():
+            try:
+                service.index_directory()
+            except Exception as exc:
+                logger.error(f"Scan of project '{name}' failed: {exc}")
+
+    def start_watching(self):
+        for _, service in self.services():
+            service.start_watching()
+
+    def stop_watching(self):
+        for _, service in self.services():
+            service.stop_watching()
+
+    def _check_model(self, path: Path):
+        """Refuse a project whose index speaks another model than the main one.
+
+        Opening it would start a migration that re-embeds the project with
+        this process's model and replaces the index its own server uses.
+        """
+        db_path = path / INDEX_DIR / DB_DIR
+        try:
+            meta = json.loads((db_path / "meta.json").read_text())
+        except FileNotFoundError:
+            if not db_path.is_dir() or not any(db_path.iterdir()):
+                return  # not indexed yet: built with the main model
+            meta = {"provider": "fastembed", "model": DEFAULT_FASTEMBED_MODEL}  # as initialize() assumes
+        except (OSError, ValueError):
+            meta = {}
+        stored = (meta.get("provider"), meta.get("model"))
+        serving = (self.primary.provider, self.primary.model_name)
+        if stored != serving:
+            raise ValueError(
+                f"Project {path} is indexed with {'/'.join(map(str, stored))}, but this daemon embeds with "
+                f"{'/'.join(serving)}; opening it here would re-embed and replace that index. Run the "
+                f"project without --shared, or start the daemon with the same EMBEDDING_PROVIDER/EMBEDDING_MODEL."
+            )
+
+    def _unique_name(self, path: Path) -> str:
+        taken = set(self.names())
+        name, n = path.name or str(path), 2
+        while name in taken:
+            name, n = f"{path.name}-{n}", n + 1
+        return name
+
+    @staticmethod
+    def _name(service: IndexerService) -> str:
+        path = Path(service.docs_path).resolve()
+        return path.name or str(path)
+
+
+def group_batch(queries: List[str], results: List[List[Dict]]) -> List[Dict]:
+    """Group batch results per query, keeping each chunk only under the first query that found it.
+
+    ``results`` come from ProjectRegistry.search_batch; a chunk is the same
+    when its (project, file, position) are, whatever its text looks like
+    once formatted. Returns ``{"query", "results", "repeated"}`` per query,
+    results formatted; ``repeated`` maps the positions (0-based) of earlier
+    queries to how many of this query's chunks were already listed there.
+    """
+    first_seen: Dict[tuple, int] = {}
+    groups: List[Dict] = []
+    for position, (query_text, items) in enumerate(zip(queries, results)):
+        unique: List[str] = []
+        repeated: Dict[int, int] = {}
+        for item in items:
+            doc = item["doc"]
+            chunk = item.get("chunk")
+            key = (item.get("project"), doc.fields.get("file_path", ""), doc.id if chunk is None else chunk)
+            earlier = first_seen.setdefault(key, position)
+            if earlier == position:
+                unique.append(IndexerService.format_result(item, item.get("project")))
+            else:
+                repeated[earlier] = repeated.get(earlier, 0) + 1
+        groups.append({"query": query_text, "results": unique, "repeated": repeated})
+    return groups
+
+
+projects = ProjectRegistry(indexer)
@@ -0,0 +1,129 @@
+"""Per-chunk file metadata and the search filters pushed into the vector query."""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+from .file_filter import language
+
+
+def chunk_metadata(file_path: str, root: Path, mtime: Optional[float]) -> Dict:
+    """Scalar fields stored with every chunk of ``file_path`` (see IndexerService schema)."""
+    path = Path(file_path)
+    try:
+        rel = path.relative_to(root).as_posix()
+    except ValueError:
+        rel = path.as_posix()
+    parts = PurePosixPath(rel).parts
+    return {
+        "rel_path": rel,
+        "ext": path.suffix.lower().lstrip("."),
+        "top_dir": parts[0] if len(parts) > 1 else "",
+        "language": language(path),
+        "mtime": float(mtime or 0.0),
+    }
+
+
+@dataclass
+class SearchFilter:
+    """Restricts a search to files by glob, extension, directory or language.
+
+    ``path_glob`` matches the path relative to the project root: ``*`` and
+    ``?`` stay within one directory, ``**`` spans any number of them, and a
+    pattern without ``/`` matches file names anywhere (``*.py``). ``ext``
+    takes one or more comma-separated extensions (``py`` or ``.py,.pyi``);
+    ``dir`` is a directory relative to the root (``src`` or ``src/services``).
+
+    ``expression()`` is the zvec filter evaluated inside the vector search;
+    where zvec's LIKE cannot express a glob exactly it is a superset, and
+    ``matches()`` settles the candidates that come back.
+    """
+
+    path_glob: Optional[str] = None
+    ext: Optional[str] = None
+    dir: Optional[str] = None
+    language: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.path_glob or self.ext or self.dir or self.language)
+
+    def expression(self) -> Optional[str]:
+        clauses: List[str] = []
+        exts = self._exts()
+        if exts and all(_quotable(e) for e in exts):
+            quoted = ", ".join(f"'{e}'" for e in exts)
+            clauses.append(f"ext = {quoted}" if len(exts) == 1 else f"ext IN ({quoted})")
+        directory = self._dir()
+        if directory and _quotable(directory):
+            if "/" in directory:
+                clauses.append(f"rel_path LIKE '{directory}/%'")
+            else:
+                clauses.append(f"top_dir = '{directory}'")
+        if self.language and _quotable(self.language):
+            clauses.append(f"language = '{self.language.lower()}'")
+        if self.path_glob and _quotable(self.path_glob):
+            clauses.append(f"rel_path LIKE '{_glob_to_like(self.path_glob)}'")
+        return " AND ".join(clauses) or None
+
+    def matches(self, meta: Dict) -> bool:
+        rel = meta.get("rel_path", "")
+        exts = self._exts()
+        if exts and meta.get("ext", "") not in exts:
+            return False
+        directory = self._dir()
+        if directory and not rel.startswith(directory + "/"):
+            return False
+        if self.language and meta.get("language", "") != self.language.lower():
+            return False
+        if self.path_glob and not _glob_regex(self.path_glob).match(rel):
+            return False
+        return True
+
+    def _exts(self) -> List[str]:
+        if not self.ext:
+            return []
+        return [e.strip().lower().lstrip(".") for e in self.ext.split(",") if e.strip()]
+
+    def _dir(self) -> str:
+        return (self.dir or "").replace("\\", "/").strip("/")
+
+
+def _quotable(value: str) -> bool:
+    # zvec's filter grammar has no escape for quotes inside string literals
+    return "'" not in value and '"' not in value and "\\" not in value
+
+
+def _glob_pattern(glob: str) -> str:
+    glob = glob.replace("\\", "/").lstrip("/")
+    return glob if "/" in glob else "**/" + glob
+
+
+def _glob_to_like(glob: str) -> str:
+    like = re.sub(r"\*\*/|\*+|\?|\[[^\]]*\]", "%", _glob_pattern(glob))
+    return re.sub(r"%+", "%", like)
+
+
+def _glob_regex(glob: str) -> "re.Pattern[str]":
+    pattern, out, i = _glob_pattern(glob), [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            out.append("[" + pattern[i + 1 : end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
@@ -0,0 +1,131 @@
+"""Portable index snapshots — a built index another machine or checkout can import."""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+
+
+SNAPSHOT_NAME = "snapshot.smcp"   # default file, next to the index under .source-mcp/
+SNAPSHOT_VERSION = 1
+_MAGIC = b"SMCPSNAP"
+# Frame: JSON length, vector-bytes length
+_FRAME = struct.Struct("<II")
+
+
+def portable_hash(data: bytes) -> str:
+    """Content hash every machine computes the same way (no optional xxhash)."""
+    return "blake2b:" + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class SnapshotEntry:
+    """One file's chunks, keyed by its path relative to the project root."""
+
+    path: str            # POSIX separators, relative to the docs root
+    hash: str            # portable_hash of the file bytes the chunks came from
+    texts: List[str]
+    vectors: np.ndarray  # float32, shape (len(texts), dim)
+
+
+class SnapshotWriter:
+    """Streams entries into a gzip-compressed snapshot.
+
+    The header (provider, model, dimension) comes first, then one frame per
+    file: a JSON line with the relative path, hash and chunk texts, followed
+    by the raw little-endian float32 vectors. The file is written beside the
+    target and renamed into place on ``close``, so a failed export never
+    leaves a truncated snapshot behind.
+    """
+
+    def __init__(self, path: Path, provider: str, model: str, dimension: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._out = gzip.open(self._tmp, "wb")
+        self._out.write(_MAGIC)
+        self.dimension = dimension
+        self.files = 0
+        self.chunks = 0
+        self._frame({
+            "version": SNAPSHOT_VERSION,
+            "provider": provider,
+            "model": model,
+            "dimension": dimension,
+        }, b"")
+
+    def add(self, entry: SnapshotEntry):
+        vectors = np.ascontiguousarray(entry.vectors, dtype="<f4")
+        if vectors.shape != (len(entry.texts), self.dimension):
+            raise ValueError(f"{entry.path}: vectors {vectors.shape} do not match its chunks")
+        self._frame({"path": entry.path, "hash": entry.hash, "texts": entry.texts}, vectors.tobytes())
+        self.files += 1
+        self.chunks += len(entry.texts)
+
+    def close(self):
+        self._out.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._out.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def _frame(self, meta: dict, vectors: bytes):
+        header = json.dumps(meta).encode("utf-8")
+        self._out.write(_FRAME.pack(len(header), len(vectors)) + header + vectors)
+
+
+class SnapshotReader:
+    """Reads a snapshot one entry at a time; ``header`` is available on open."""
+
+    def __init__(self, path: Path):
+        self._in = gzip.open(Path(path), "rb")
+        if self._in.read(len(_MAGIC)) != _MAGIC:
+            self._in.close()
+            raise ValueError(f"{path} is not a source-mcp snapshot")
+        self.header, _ = self._read_frame()
+        if self.header.get("version") != SNAPSHOT_VERSION:
+            self._in.close()
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')}")
+
+    def __iter__(self) -> Iterator[SnapshotEntry]:
+        dim = self.header["dimension"]
+        while True:
+            frame = self._read_frame()
+            if frame is None:
+                return
+            meta, vectors = frame
+            yield SnapshotEntry(
+                path=meta["path"],
+                hash=meta["hash"],
+                texts=meta["texts"],
+                vectors=np.frombuffer(vectors, dtype="<f4").reshape(-1, dim),
+            )
+
+    def close(self):
+        self._in.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_frame(self):
+        prefix = self._in.read(_FRAME.size)
+        if not prefix:
+            return None
+        if len(prefix) < _FRAME.size:
+            raise ValueError("Snapshot is truncated")
+        header_len, vec_len = _FRAME.unpack(prefix)
+        header = self._in.read(header_len)
+        vectors = self._in.read(vec_len)
+        if len(header) < header_len or len(vectors) < vec_len:
+            raise ValueError("Snapshot is truncated")
+        return json.loads(header.decode("utf-8")), vectors
@@ -0,0 +1,128 @@
+"""Cheap binary / encoding detection from a file's first bytes."""
+
+import codecs
+import unicodedata
+from typing import Optional, Tuple
+
+try:  # optional: better guesses for legacy 8-bit encodings
+    from charset_normalizer import from_bytes as _detect
+except ImportError:  # pragma: no cover - depends on the environment
+    _detect = None
+
+
+SNIFF_BYTES = 8192  # prefix read before deciding whether to read the rest
+
+_BOMS = (  # longest first: the UTF-32 LE BOM starts with the UTF-16 LE one
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Control bytes that do not occur in text (everything below 0x20 except \b \t \n \f \r ESC)
+_CONTROL = frozenset(range(0x20)) - {0x08, 0x09, 0x0A, 0x0C, 0x0D, 0x1B}
+_MAX_CONTROL_RATIO = 0.1
+_MIN_UTF16_TEXT = 0.95  # share of text characters for a BOM-less UTF-16 guess
+_MAX_ASCII_PAIRS = 0.5  # share of byte pairs both printable ASCII, above which it is not UTF-16
+
+
+def sniff(prefix: bytes) -> Tuple[Optional[str], str]:
+    """Guess how to decode a file from its first bytes.
+
+    Returns ``(encoding, "")`` for text, or ``(None, reason)`` for a file
+    that should be skipped — ``"binary"`` or ``"unknown-encoding"``.
+    """
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding, ""
+
+    # NULs and control bytes mean binary, unless the prefix reads as UTF-16
+    # (where ASCII has NUL high bytes and e.g. Cyrillic has 0x04 ones)
+    if b"\0" in prefix or sum(b in _CONTROL for b in prefix) > _MAX_CONTROL_RATIO * len(prefix):
+        encoding = _bomless_utf16(prefix)
+        return (encoding, "") if encoding else (None, "binary")
+
+    # The prefix may end mid-character, so decode it incrementally
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8", ""
+    except UnicodeDecodeError:
+        pass
+
+    encoding = _legacy_encoding(prefix)
+    return (encoding, "") if encoding else (None, "unknown-encoding")
+
+
+def decode(data: bytes, encoding: str) -> str:
+    """Decode a whole file with the sniffed encoding.
+
+    Only the prefix was sniffed: if the rest is not valid UTF-8 after all
+    (an ASCII header before legacy 8-bit text), the encoding is detected
+    again from the whole file. Other invalid sequences are replaced rather
+    than losing the whole file.
+    """
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        if encoding == "utf-8":
+            encoding = _legacy_encoding(data) or encoding
+        return data.decode(encoding, errors="replace")
+
+
+def _bomless_utf16(prefix: bytes) -> Optional[str]:
+    """UTF-16 without a BOM: the byte order under which the prefix reads as text."""
+    # ASCII read as UTF-16 pairs up into CJK letters, e.g. strings in a binary. Genuine
+    # CJK text has both bytes of a character in that range for about a fifth of them.
+    pairs = len(prefix) // 2
+    ascii_pairs = sum(0x20 <= a < 0x7F and 0x20 <= b < 0x7F for a, b in zip(prefix[0::2], prefix[1::2]))
+    if ascii_pairs > _MAX_ASCII_PAIRS * pairs:
+        return None
+    best, best_share = None, 0.0
+    for encoding in ("utf-16-le", "utf-16-be"):
+        try:
+            text = codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+        except UnicodeDecodeError:  # e.g. unpaired surrogates: not this byte order
+            continue
+        if not text:
+            continue
+        share = _text_share(text)
+        if share > best_share:
+            best, best_share = encoding, share
+    return best if best_share >= _MIN_UTF16_TEXT else None
+
+
+def _text_share(text: str) -> float:
+    """Share of characters that occur in text: letters, digits, punctuation,
+    symbols, spaces and line breaks, and combining marks on a letter of
+    their own script (the wrong byte order turns ASCII into unassigned or
+    control code points and sprinkles marks onto unrelated letters)."""
+    count = 0
+    previous = ""
+    for c in text:
+        category = unicodedata.category(c)
+        if category[0] in "LNPS" or category == "Zs" or c in "\t\n\r\f":
+            count += 1
+        elif category[0] == "M" and previous and ord(previous) >> 7 == ord(c) >> 7:
+            count += 1
+        if category[0] == "L":
+            previous = c
+    return count / len(text)
+
+
+def _legacy_encoding(data: bytes) -> Optional[str]:
+    """Pick an 8-bit encoding for text that is not UTF-8."""
+    # Only lines with high bytes tell encodings apart; a long ASCII part
+    # would drown them out
+    data = b"\n".join(line for line in data.splitlines() if max(line, default=0) >= 0x80)
+    if _detect is not None:
+        best = _detect(data).best()
+        if best is not None:
+            return best.encoding
+    # Without a detector: Cyrillic text is mostly lowercase letters, which
+    # sit at 0xE0-0xFF in cp1251 but at 0xC0-0xDF in KOI8-R.
+    high = [b for b in data if b >= 0x80]
+    letters = [b for b in high if b >= 0xC0]
+    if len(letters) < 0.5 * len(high):
+        return "cp1252"
+    upper_half = sum(b >= 0xE0 for b in letters)
+    return "cp1251" if upper_half >= len(letters) - upper_half else "koi8_r"
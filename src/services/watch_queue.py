@@ -0,0 +1,110 @@
+"""Watcher event queue — coalesces file events and hands them to indexing workers."""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from .monitor import logger
+
+
+class WatchQueue:
+    """Bounded, coalescing queue of paths the watcher saw change.
+
+    The observer thread only calls ``put`` (a dict insert). Entries are
+    level-triggered: a worker looks at the path's current state on disk, so
+    a file saved ten times while waiting is handled once. When ``capacity``
+    distinct paths are pending, ``put`` blocks — the observer stops draining
+    the OS event buffer until the workers catch up, instead of the queue
+    growing without bound. A path is never handled by two workers at once;
+    an event arriving while it is being handled queues it again.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[str], None],
+        workers: int = 2,
+        capacity: int = 10000,
+        on_depth: Optional[Callable[[int], None]] = None,
+    ):
+        self._handle = handle
+        self._workers = max(1, workers)
+        self._capacity = max(1, capacity)
+        self._on_depth = on_depth
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._active: set = set()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+
+    def start(self):
+        with self._cond:
+            self._stopped = False
+        for i in range(self._workers):
+            t = threading.Thread(target=self._run, name=f"watch-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; events still pending are dropped (the next scan catches them)."""
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self._report()
+
+    def put(self, path: str):
+        with self._cond:
+            if path in self._pending:
+                return
+            while len(self._pending) >= self._capacity and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return
+            self._pending[path] = None
+            self._cond.notify_all()
+        self._report()
+
+    def depth(self) -> int:
+        """Paths waiting or being handled."""
+        with self._cond:
+            return len(self._pending) + len(self._active)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued path has been handled. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._active, timeout)
+
+    def _next(self) -> Optional[str]:
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                for path in self._pending:
+                    if path not in self._active:
+                        del self._pending[path]
+                        self._active.add(path)
+                        self._cond.notify_all()  # room for a blocked producer
+                        return path
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            path = self._next()
+            if path is None:
+                return
+            try:
+                self._handle(path)
+            except Exception as exc:
+                logger.error(f"Error handling file event for {path}: {exc}")
+            finally:
+                with self._cond:
+                    self._active.discard(path)
+                    self._cond.notify_all()
+                self._report()
+
+    def _report(self):
+        if self._on_depth is not None:
+            self._on_depth(self.depth())
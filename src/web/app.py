@@ -1,10 +1,15 @@
-from fastapi import FastAPI
+from typing import List
+
+from fastapi import FastAPI, Query
 from fastapi.responses import HTMLResponse
 from pathlib import Path
 
 from ..config import settings
 from ..services.monitor import monitor
+from ..services.embed_scheduler import QUERY
 from ..services.indexer import indexer
+from ..services.projects import group_batch, projects
+from ..services.search_filter import SearchFilter
 
 app = FastAPI(title="Source-MCP Dashboard")
 
@@ -38,7 +43,10 @@ async def read_root():
 
 @app.get("/api/stats")
 async def get_stats():
-    return monitor.get_stats()
+    """The main project's progress, plus every served project's under "projects"."""
+    stats = monitor.get_stats()
+    stats["projects"] = {name: service.monitor.get_stats() for name, service in projects.services()}
+    return stats
 
 
 @app.get("/api/logs")
@@ -60,9 +68,10 @@ async def get_config():
 
 @app.post("/api/reindex")
 async def reindex_knowledge_base():
-    """Wipe DB and force a full re-index."""
+    """Rebuild the index from scratch; the current one serves until the swap."""
     try:
-        indexer.reindex()
+        if not indexer.reindex():
+            return {"status": "ignored", "message": "A rebuild is already running"}
         return {"status": "success", "message": "Reindexing started"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -75,6 +84,10 @@ async def get_tools():
             "name": "search_knowledge_base",
             "description": "Search for relevant context in the indexed documents.",
         },
+        {
+            "name": "search_knowledge_base_batch",
+            "description": "Run several related searches in one call; results are grouped per query.",
+        },
         {
             "name": "get_index_stats",
             "description": "Get current statistics about the vector index.",
@@ -82,18 +95,66 @@ async def get_tools():
     ]
 
 
+@app.get("/api/projects")
+async def get_projects():
+    return [
+        {"name": name, "docs_path": str(Path(service.docs_path).resolve())}
+        for name, service in projects.services()
+    ]
+
+
 @app.get("/api/search")
-async def search(q: str = "", limit: int = 5):
-    """Quick search endpoint for dashboard testing."""
+async def search(
+    q: str = "",
+    limit: int = 5,
+    project: str | None = None,
+    path_glob: str | None = None,
+    ext: str | None = None,
+    dir: str | None = None,
+    language: str | None = None,
+    max_tokens: int | None = None,
+):
+    """Quick search endpoint for dashboard testing.
+
+    ``project``: name, root path or "*"; ``path_glob`` / ``ext`` / ``dir`` /
+    ``language`` restrict the files searched (see SearchFilter);
+    ``max_tokens`` packs a token budget instead of ``limit`` chunks.
+    """
     if not q.strip():
         return {"query": q, "results": [], "error": "Empty query"}
     try:
-        results = indexer.query(q, limit)
+        where = SearchFilter(path_glob=path_glob, ext=ext, dir=dir, language=language) or None
+        results = projects.query(q, limit, project, where=where, max_tokens=max_tokens)
         return {"query": q, "results": results}
     except Exception as exc:
         return {"query": q, "results": [], "error": str(exc)}
 
 
+@app.get("/api/search/batch")
+async def search_batch(
+    q: List[str] = Query(default=[]),
+    limit: int = 5,
+    project: str | None = None,
+    path_glob: str | None = None,
+    ext: str | None = None,
+    dir: str | None = None,
+    language: str | None = None,
+):
+    """Several searches at once (``?q=a&q=b``): one embedding call, grouped and deduplicated results.
+
+    Each group's ``repeated`` maps earlier query positions to how many of
+    its chunks were only listed there.
+    """
+    queries = [query for query in q if query.strip()]
+    if not queries:
+        return {"groups": [], "error": "Empty query"}
+    try:
+        where = SearchFilter(path_glob=path_glob, ext=ext, dir=dir, language=language) or None
+        return {"groups": group_batch(queries, projects.search_batch(queries, limit, project, where=where))}
+    except Exception as exc:
+        return {"groups": [], "error": str(exc)}
+
+
 @app.get("/api/search/debug")
 async def search_debug(q: str = "", limit: int = 10):
     """Debug search - shows raw scores."""
@@ -101,7 +162,7 @@ async def search_debug(q: str = "", limit: int = 10):
         return {"query": q, "results": []}
     try:
         import zvec as _zvec
-        vecs = indexer.embed([q])
+        vecs = indexer.embed([q], priority=QUERY)
         if not vecs:
             return {"query": q, "results": [], "error": "No embedding"}
         qvec = vecs[0]
@@ -0,0 +1,124 @@
+"""
+Benchmark: N related searches one by one vs. one search_batch call.
+
+The embedding engine is emulated: one call runs at a time and costs
+CALL_MS (session run, tokenizer and thread start-up) plus EMBED_MS per
+text, so a query batch pays the call overhead once. The collection holds
+real zvec data (random vectors) built from FILES generated documents; the
+wall time of N sequential ``search`` calls is compared with one
+``search_batch`` of the same N queries.
+
+    python tests/scripts/bench_batch_search.py [--files 300] [--call-ms 8] [--embed-ms 2]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.indexer import IndexerService  # noqa: E402
+
+QUERIES = [
+    "where is the retry policy configured?",
+    "how are failed uploads reported?",
+    "which settings control the cache size?",
+    "what happens when the token expires?",
+    "how is the database connection pooled?",
+    "where are request timeouts defined?",
+    "how does the worker pick up new jobs?",
+    "what does the health check verify?",
+    "how are feature flags evaluated?",
+    "where is the rate limiter applied?",
+    "how is pagination implemented?",
+    "what is logged on startup?",
+    "how are migrations ordered?",
+    "where are the API keys validated?",
+    "how are webhooks retried?",
+    "which metrics are exported?",
+]
+
+
+class Engine:
+    """Fake embedding model: calls are serialized and cost call_ms + embed_ms per text."""
+
+    def __init__(self, call_ms: float, embed_ms: float):
+        self.call_ms = call_ms
+        self.embed_ms = embed_ms
+        self._cpu = threading.Lock()
+
+    def embed(self, texts):
+        texts = list(texts)
+        with self._cpu:
+            time.sleep((self.call_ms + self.embed_ms * len(texts)) / 1000)
+            return [np.random.rand(384).astype(np.float32) for _ in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--call-ms", type=float, default=8.0)
+    parser.add_argument("--embed-ms", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_batch_"))
+    docs = root / "docs"
+    docs.mkdir()
+    for i in range(args.files):
+        (docs / f"module_{i}.md").write_text(f"Section {i} of the service handbook. " * 200)
+
+    try:
+        with patch("src.services.indexer.settings") as settings, \
+             patch("src.services.indexer.TextEmbedding", return_value=Engine(args.call_ms, args.embed_ms)), \
+             patch("src.services.indexer.TextCrossEncoder", MagicMock()):
+            settings.docs_path = str(docs)
+            settings.zvec_path = str(root / "zvec")
+            settings.embedding_provider = "fastembed"
+            settings.embedding_model = "bench-model"
+            settings.openai_api_key = None
+            settings.git_scan = False
+            settings.scan_workers = 4
+            settings.embed_batch_size = 256
+            settings.query_session = False
+
+            indexer = IndexerService()
+            indexer.configure()
+            indexer.initialize()
+            indexer.index_directory()
+            print(
+                f"{indexer._get_total_vectors()} chunks from {args.files} files; "
+                f"embedding call {args.call_ms} ms + {args.embed_ms} ms/text"
+            )
+
+            for n in (1, 4, 8, 16):
+                queries = QUERIES[:n]
+                sequential = batched = 0.0
+                for _ in range(args.rounds):
+                    t0 = time.perf_counter()
+                    for query in queries:
+                        indexer.search(query, 5)
+                    t1 = time.perf_counter()
+                    indexer.search_batch(queries, 5)
+                    t2 = time.perf_counter()
+                    sequential += t1 - t0
+                    batched += t2 - t1
+                sequential, batched = sequential / args.rounds * 1000, batched / args.rounds * 1000
+                print(
+                    f"  {n:>2} queries  one by one {sequential:7.1f} ms  "
+                    f"batch {batched:7.1f} ms  ({sequential / batched:4.1f}x)"
+                )
+            indexer._close_manifest()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
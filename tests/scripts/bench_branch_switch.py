@@ -0,0 +1,97 @@
+"""
+Benchmark: rescan after a branch switch that rewrites mtimes but not content.
+
+Indexes N files with a fake embedder that costs EMBED_MS per chunk, bumps
+every file's mtime (what `git checkout` round-trips and formatters do), then
+rescans with content hashing on and off.
+
+    python tests/scripts/bench_branch_switch.py [--files 2000] [--embed-ms 2]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.indexer import IndexerService  # noqa: E402
+
+
+class SlowEmbedder:
+    def __init__(self, embed_ms: float):
+        self.embed_ms = embed_ms
+        self.chunks = 0
+
+    def embed(self, texts):
+        for _ in texts:
+            self.chunks += 1
+            time.sleep(self.embed_ms / 1000)
+            yield np.random.rand(384).astype(np.float32)
+
+
+def run(files: int, embed_ms: float, content_hash: bool) -> dict:
+    root = Path(tempfile.mkdtemp(prefix="bench_branch_"))
+    docs = root / "docs"
+    docs.mkdir()
+    for i in range(files):
+        sub = docs / f"pkg{i % 20}"
+        sub.mkdir(exist_ok=True)
+        (sub / f"mod_{i}.py").write_text(f"def handler_{i}(x):\n    return x * {i}\n" * 20)
+
+    embedder = SlowEmbedder(embed_ms)
+    try:
+        with patch("src.services.indexer.settings") as settings, \
+             patch("src.services.indexer.TextEmbedding", return_value=embedder), \
+             patch("src.services.indexer.TextCrossEncoder", MagicMock()):
+            settings.docs_path = str(docs)
+            settings.zvec_path = str(root / "zvec")
+            settings.embedding_provider = "fastembed"
+            settings.embedding_model = "bench-model"
+            settings.openai_api_key = None
+            settings.content_hash = content_hash
+            settings.scan_workers = 4
+            settings.embed_batch_size = 32
+            settings.embed_processes = 1  # keep the fake embedder in-process
+
+            indexer = IndexerService()
+            indexer.configure()
+            indexer.initialize()
+            indexer.index_directory()
+
+            # "Switch branches": every mtime moves, no bytes change
+            future = time.time() + 60
+            for path in docs.rglob("*.py"):
+                os.utime(path, (future, future))
+
+            embedder.chunks = 0
+            started = time.perf_counter()
+            indexer.index_directory()
+            elapsed = time.perf_counter() - started
+            indexer._close_manifest()
+            return {"seconds": elapsed, "chunks_embedded": embedder.chunks}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--embed-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"Rescan of {args.files} touched files ({args.embed_ms} ms/chunk embed)")
+    for enabled in (False, True):
+        r = run(args.files, args.embed_ms, enabled)
+        label = "content hash" if enabled else "mtime only  "
+        print(f"  {label}: {r['seconds']:7.2f}s  chunks re-embedded: {r['chunks_embedded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: embedding throughput of the process pool from 1 to N workers.
+
+Embeds a fixed set of chunks with EmbedPool at increasing worker counts and
+reports chunks/s and speed-up over one worker. By default each worker runs a
+CPU-bound stand-in model (a fixed amount of pure-Python work per chunk), so
+the curve shows the pool's own scaling and overhead without a model
+download; pass --model to use a real FastEmbed model instead.
+
+    python tests/scripts/bench_embed_pool.py [--chunks 2000] [--max-workers 8] [--model NAME]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.embed_pool import EmbedPool, default_workers, load_fastembed  # noqa: E402
+
+WORK_PER_CHUNK = 60_000  # loop iterations, ~2-3 ms of CPU
+
+
+class BusyModel:
+    def embed(self, texts):
+        for text in texts:
+            acc = 0
+            for i in range(WORK_PER_CHUNK):
+                acc += i * i
+            yield np.full(384, (acc + len(text)) % 7, dtype=np.float32)
+
+
+def busy_model(model_name, threads):
+    return BusyModel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    texts = [f"def handler_{i}(request):\n    return process(request, retries={i % 5})\n" * 6 for i in range(args.chunks)]
+    factory = load_fastembed if args.model else busy_model
+    counts = sorted({1, *[2**k for k in range(1, 8) if 2**k < args.max_workers], args.max_workers})
+
+    print(f"{args.chunks} chunks, {os.cpu_count()} cores, default workers here: {default_workers()}")
+    baseline = None
+    for workers in counts:
+        pool = EmbedPool(args.model or "busy", workers, batch_size=32, factory=factory)
+        pool.start()
+        try:
+            pool.embed(texts[:32 * workers])  # warm every worker
+            started = time.perf_counter()
+            vectors = pool.embed(texts)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.close()
+        assert len(vectors) == len(texts)
+        rate = len(texts) / elapsed
+        baseline = baseline or rate
+        print(f"  workers={workers:<3} {rate:9.0f} chunks/s  x{rate / baseline:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
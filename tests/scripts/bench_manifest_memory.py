@@ -0,0 +1,113 @@
+"""
+Benchmark: memory held by the in-memory manifest mirror for a large repository.
+
+Writes a manifest database with N synthetic entries (paths spread over nested
+directories, each with mtime, size, content hash and chunk count), then loads
+it into the compact mirror, and the same entries in the previous schema (hex
+text hashes) into the plain nested-dict mirror it replaced, measuring
+retained memory and load time of each. Loading happens inside
+``initialize()`` before anything is served, so the compact mirror must be
+both smaller and no slower to load (within LOAD_TOLERANCE); the script
+exits non-zero otherwise.
+
+    python tests/scripts/bench_manifest_memory.py [--files 200000]
+"""
+
+import argparse
+import gc
+import math
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.fingerprint import hash_bytes  # noqa: E402
+from src.services.manifest import ManifestStore  # noqa: E402
+
+LOAD_TOLERANCE = 1.15  # timer noise allowed on the load-time comparison
+
+
+def entries(files: int):
+    for i in range(files):
+        path = f"/home/dev/monorepo/services/svc{i % 400}/src/module{i % 23}/file_{i}.py"
+        yield path, 1700000000.0 + i, 1000 + i % 5000, 1 + i % 7, hash_bytes(str(i).encode())
+
+
+def make_db(db_path: Path, files: int):
+    store = ManifestStore(db_path)
+    for path, mtime, size, chunks, digest in entries(files):
+        store.put(path, {"mtime": mtime, "size": size, "hash": digest}, chunks)
+    store.commit()
+    store.close()
+
+
+def make_legacy_db(db_path: Path, files: int):
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, chunks INTEGER, hash TEXT)")
+    conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", entries(files))
+    conn.commit()
+    conn.close()
+
+
+def load_dicts(db_path: Path) -> dict:
+    """The previous mirror: one dict per file inside a dict keyed by path."""
+    conn = sqlite3.connect(str(db_path))
+    loaded = {}
+    for path, mtime, size, chunks, digest in conn.execute("SELECT path, mtime, size, chunks, hash FROM files").fetchall():
+        loaded[path] = {"fingerprint": {"mtime": mtime, "size": size, "hash": digest}, "chunks": chunks}
+    conn.close()
+    return loaded
+
+
+def measure(load, close, rounds: int = 5):
+    """Retained memory (traced) and best-of-``rounds`` load time (untraced)."""
+    elapsed = math.inf
+    for _ in range(rounds):
+        gc.collect()
+        started = time.perf_counter()
+        obj = load()
+        elapsed = min(elapsed, time.perf_counter() - started)
+        close(obj)
+        del obj
+    gc.collect()
+    tracemalloc.start()
+    obj = load()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    close(obj)
+    return retained, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200_000)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_manifest_"))
+    try:
+        db_path, legacy_path = root / "manifest.db", root / "legacy.db"
+        print(f"Writing {args.files} manifest entries...")
+        make_db(db_path, args.files)
+        make_legacy_db(legacy_path, args.files)
+
+        dict_bytes, dict_secs = measure(lambda: load_dicts(legacy_path), lambda loaded: None)
+        store_bytes, store_secs = measure(lambda: ManifestStore(db_path), lambda store: store.close())
+
+        print(f"  nested dicts   {dict_bytes / 2**20:8.1f} MiB  {dict_bytes / args.files:6.0f} B/file  load {dict_secs:5.2f}s")
+        print(f"  compact mirror {store_bytes / 2**20:8.1f} MiB  {store_bytes / args.files:6.0f} B/file  load {store_secs:5.2f}s")
+        print(f"  x{dict_bytes / store_bytes:.1f} less memory, x{dict_secs / store_secs:.1f} load speed")
+        if store_bytes >= dict_bytes or store_secs > dict_secs * LOAD_TOLERANCE:
+            print("FAIL: the compact mirror must be smaller and load no slower than the dicts")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: search latency while a full scan is embedding in the background.
+
+The embedding engine is emulated: one call runs at a time (ONNX already
+spreads a call over every core) and costs EMBED_MS per text. A scan of N
+files (MAX_CHUNKS-sized files, the worst case) runs in a thread while a
+client embeds a query every 20 ms; query latency percentiles are reported
+for indexing batch sizes from whole-file calls (the old behaviour) down to
+small scheduler batches, and with a separate query session (its own
+engine, emulated at twice the per-text cost for its smaller thread pool).
+
+    python tests/scripts/bench_query_latency.py [--files 20] [--embed-ms 1]
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.embed_scheduler import QUERY  # noqa: E402
+from src.services.indexer import MAX_CHUNKS, IndexerService  # noqa: E402
+
+
+class Engine:
+    """Fake embedding model: calls are serialized and cost embed_ms per text."""
+
+    def __init__(self, embed_ms: float):
+        self.embed_ms = embed_ms
+        self._cpu = threading.Lock()
+
+    def embed(self, texts):
+        with self._cpu:
+            time.sleep(self.embed_ms * len(texts) / 1000)
+            return [np.random.rand(384).astype(np.float32) for _ in texts]
+
+
+def run(files: int, embed_ms: float, batch_size: int, query_session: bool = False) -> dict:
+    root = Path(tempfile.mkdtemp(prefix="bench_query_"))
+    docs = root / "docs"
+    docs.mkdir()
+    for i in range(files):
+        (docs / f"big_{i}.md").write_text(f"Paragraph {i} of a long design document. " * 3000)
+
+    try:
+        with patch("src.services.indexer.settings") as settings, \
+             patch("src.services.indexer.TextEmbedding", side_effect=[Engine(embed_ms), Engine(embed_ms * 2)]), \
+             patch("src.services.indexer.TextCrossEncoder", MagicMock()):
+            settings.docs_path = str(docs)
+            settings.zvec_path = str(root / "zvec")
+            settings.embedding_provider = "fastembed"
+            settings.embedding_model = "bench-model"
+            settings.openai_api_key = None
+            settings.git_scan = False
+            settings.scan_workers = 4
+            settings.embed_batch_size = batch_size
+            settings.query_session = query_session
+
+            indexer = IndexerService()
+            indexer.configure()
+            indexer.initialize()
+
+            scan = threading.Thread(target=indexer.index_directory)
+            started = time.perf_counter()
+            scan.start()
+            latencies = []
+            while scan.is_alive():
+                t0 = time.perf_counter()
+                indexer.embed(["where is the retry policy configured?"], priority=QUERY)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                time.sleep(0.02)
+            scan_secs = time.perf_counter() - started
+            indexer._close_manifest()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        "scan_secs": scan_secs,
+        "queries": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--embed-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"Scan of {args.files} files x {MAX_CHUNKS} chunks, {args.embed_ms} ms/chunk; query every 20 ms")
+    runs = [(MAX_CHUNKS, False), (64, False), (32, False), (8, False), (MAX_CHUNKS, True)]
+    for batch_size, query_session in runs:
+        r = run(args.files, args.embed_ms, batch_size, query_session)
+        label = "whole file" if batch_size == MAX_CHUNKS else f"batch {batch_size}"
+        if query_session:
+            label += " + query session"
+        print(
+            f"  {label:<26}  query p50 {r['p50']:7.1f} ms  p99 {r['p99']:7.1f} ms  "
+            f"({r['queries']} queries)  scan {r['scan_secs']:6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: discovery + fingerprint phase on a slow (network-like) filesystem.
+
+Every directory listing and every stat() is delayed by --latency-ms, the way
+each call is a round trip on NFS, SMB or a container bind mount. The scan is
+run with increasing worker counts; stat calls per file show that each file
+is stat'ed once.
+
+    python tests/scripts/bench_slow_fs.py [--files 3000] [--latency-ms 1]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.file_filter import FileFilter  # noqa: E402
+
+
+def make_tree(root: Path, files: int):
+    for i in range(files):
+        d = root / f"pkg{i % 30}" / f"mod{i % 7}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"file_{i}.py").write_text(f"value = {i}\n")
+    # Pruned without being listed
+    junk = root / "node_modules" / "dep"
+    junk.mkdir(parents=True)
+    for i in range(files // 10):
+        (junk / f"index_{i}.js").write_text("module.exports = 1;\n")
+
+
+class SlowFS:
+    """Adds a fixed delay to os.scandir and os.stat and counts calls."""
+
+    def __init__(self, latency_ms: float):
+        self.delay = latency_ms / 1000
+        self.stats = 0
+        self.listings = 0
+        self._lock = threading.Lock()
+        self._scandir = os.scandir
+        self._stat = os.stat
+
+    def scandir(self, path="."):
+        time.sleep(self.delay)
+        with self._lock:
+            self.listings += 1
+        return self._scandir(path)
+
+    def stat(self, path, *args, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.stats += 1
+        return self._stat(path, *args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_slowfs_")).resolve()
+    try:
+        make_tree(root, args.files)
+        file_filter = FileFilter(root)
+        print(f"{args.files} files, {args.latency_ms} ms per listing/stat")
+        baseline = None
+        for workers in (1, 4, 16, 32):
+            fs = SlowFS(args.latency_ms)
+            with patch.object(os, "scandir", fs.scandir), patch.object(os, "stat", fs.stat):
+                started = time.perf_counter()
+                found, skipped = file_filter.scan_files(workers=workers)
+                elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(
+                f"  workers={workers:<3} {elapsed:7.2f}s  x{baseline / elapsed:5.1f}  "
+                f"found={len(found)} listings={fs.listings} stats/file={fs.stats / len(found):.2f}"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
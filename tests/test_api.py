@@ -1,7 +1,8 @@
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from src.services.monitor import monitor
+from src.services.projects import projects
 from src.web.app import app
 
 client = TestClient(app)
@@ -29,6 +30,7 @@ def test_get_stats():
     assert data["files_discovered"] == 10
     assert data["status"] == "Ready"
     assert data["total_chunks"] == 50
+    assert list(data["projects"]) == projects.names()  # each served project's own progress
 
 
 def test_get_logs():
@@ -78,3 +80,38 @@ def test_search_with_query():
     assert "results" in data
     assert "query" in data
     assert data["query"] == "test"
+
+
+def test_search_passes_file_filters():
+    with patch("src.web.app.projects") as projects:
+        projects.query.return_value = ["[routes.py] match"]
+        response = client.get("/api/search?q=test&dir=src/api&ext=py")
+    assert response.json()["results"] == ["[routes.py] match"]
+    where = projects.query.call_args.kwargs["where"]
+    assert (where.dir, where.ext, where.path_glob) == ("src/api", "py", None)
+
+
+def test_search_batch_groups_results():
+    def item(path, chunk, text):
+        return {"doc": MagicMock(id=f"{path}:{chunk}", fields={"file_path": path}), "text": text, "chunk": chunk}
+
+    with patch("src.web.app.projects") as projects:
+        projects.search_batch.return_value = [
+            [item("/r/a.py", 0, "one"), item("/r/b.py", 3, "two")], [item("/r/b.py", 3, "two")],
+        ]
+        response = client.get("/api/search/batch?q=first&q=second&q=%20&limit=2")
+    assert projects.search_batch.call_args.args[:2] == (["first", "second"], 2)
+    assert response.json()["groups"][0]["results"] == ["[a.py] one", "[b.py] two"]
+    groups = response.json()["groups"]
+    assert groups[1] == {"query": "second", "results": [], "repeated": {"0": 1}}
+    assert client.get("/api/search/batch").json()["error"] == "Empty query"
+
+
+def test_reindex_reports_an_ignored_request():
+    with patch("src.web.app.indexer") as indexer:
+        indexer.reindex.return_value = True
+        assert client.post("/api/reindex").json()["status"] == "success"
+        indexer.reindex.return_value = False  # a rebuild is already running
+        data = client.post("/api/reindex").json()
+    assert data["status"] == "ignored"
+    assert "already running" in data["message"]
@@ -0,0 +1,110 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import main as cli
+from src.services.monitor import MonitorService
+
+
+@pytest.fixture
+def headless(tmp_path, monkeypatch):
+    (tmp_path / ".source-mcp" / "zvec_db").mkdir(parents=True)
+    (tmp_path / ".source-mcp" / "zvec_db" / "old.bin").write_text("stale")
+    monkeypatch.delenv("EMBED_BATCH_SIZE", raising=False)
+    monkeypatch.delenv("EMBED_PROCESSES", raising=False)
+    stats = MonitorService()
+    with patch.object(cli, "indexer") as indexer, patch.object(cli, "monitor", stats), \
+         patch.object(cli, "settings") as settings:
+        settings.docs_path = str(tmp_path)
+        settings.zvec_path = str(tmp_path / ".source-mcp" / "zvec_db")
+        indexer.get_stats.return_value = {"total_vectors": 12}
+        indexer.wait_for_rebuild.return_value = None  # no migration when the index was opened
+        yield indexer, stats, settings
+
+
+def test_index_command_reports_and_exits_zero(headless, capsys):
+    indexer, stats, settings = headless
+    indexer.index_directory.return_value = {"to_index": 3, "unchanged": 5, "removed": 1}
+    stats.update_stats(files_indexed=3, total_chunks=12)
+
+    assert cli.run_index() == 0
+    out = capsys.readouterr().out
+    assert "Indexed 3 files (12 chunks)" in out
+    assert "unchanged 5, removed 1, failed 0" in out
+    assert settings.embed_batch_size == cli.HEADLESS_BATCH_SIZE
+    indexer.start_watching.assert_not_called()
+    indexer.close.assert_called_once()
+
+    with patch("os.cpu_count", return_value=8), \
+         patch("src.services.embed_pool._available_memory_mb", return_value=None):
+        cli.run_index()
+    assert settings.embed_processes == 8  # no queries to serve: every core embeds
+
+
+def test_index_command_exit_codes(headless):
+    indexer, stats, settings = headless
+    indexer.index_directory.return_value = {"to_index": 2, "unchanged": 0, "removed": 0}
+    stats.update_stats(files_indexed=1, files_failed=1)
+    assert cli.run_index() == 2
+
+    indexer.initialize.side_effect = RuntimeError("collection locked")
+    assert cli.run_index() == 1
+
+
+def test_index_command_counts_a_migration(headless, capsys):
+    indexer, stats, settings = headless
+    indexer.wait_for_rebuild.return_value = {
+        "reason": "Migrating index from fastembed/old-model", "files": 40, "chunks": 300, "failed": 1,
+    }
+    indexer.index_directory.return_value = {"to_index": 0, "unchanged": 40, "removed": 0}
+    assert cli.run_index() == 2
+    out = capsys.readouterr().out
+    assert "Indexed 40 files (300 chunks)" in out
+    assert "failed 1" in out
+    assert "Migrating index from fastembed/old-model: 40 files rebuilt" in out
+
+    indexer.wait_for_rebuild.return_value = {
+        "reason": "Migrating index", "files": 0, "chunks": 0, "failed": 0, "error": "model not found",
+    }
+    assert cli.run_index() == 1
+
+
+def test_full_index_discards_the_old_one(headless):
+    indexer, stats, settings = headless
+    indexer.index_directory.return_value = {"to_index": 0, "unchanged": 0, "removed": 0}
+    assert cli.run_index(full=True) == 0
+    assert not list((cli.Path(settings.zvec_path)).iterdir())
+
+
+def test_main_dispatches_index_subcommand(tmp_path):
+    argv = ["source-mcp", "index", "--path", str(tmp_path), "--full"]
+    with patch.object(sys, "argv", argv), patch.object(cli, "run_index", return_value=2) as run, \
+         patch.object(cli, "settings", MagicMock()):
+        with pytest.raises(SystemExit) as exit_info:
+            cli.main()
+    assert exit_info.value.code == 2
+    run.assert_called_once_with(full=True)
+
+
+def test_export_and_import_commands(headless, capsys):
+    indexer, stats, settings = headless
+    default = cli.Path(settings.zvec_path).parent / cli.SNAPSHOT_NAME
+
+    def export(target):
+        target.write_bytes(b"x")
+        return {"files": 4, "chunks": 9, "stale": 1}
+
+    indexer.export_snapshot.side_effect = export
+    assert cli.run_export() == 0
+    indexer.export_snapshot.assert_called_once_with(default)
+    assert "Exported 4 files (9 chunks)" in capsys.readouterr().out
+
+    indexer.import_snapshot.return_value = {"reused": 3, "unchanged": 0, "mismatched": 1}
+    indexer.index_directory.return_value = {"to_index": 1, "unchanged": 3, "removed": 0}
+    stats.update_stats(files_indexed=1)
+    assert cli.run_import(str(default)) == 0
+    assert "Reused 3 files" in capsys.readouterr().out
+
+    indexer.import_snapshot.side_effect = ValueError("Snapshot was built with another model")
+    assert cli.run_import(str(default)) == 1
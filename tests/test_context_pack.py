@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+from src.services.context_pack import SEPARATOR, estimate_tokens, pack
+from src.services.indexer import TextChunker
+
+
+def result(path, position, text, score):
+    doc = MagicMock()
+    doc.fields = {"file_path": path}
+    return {"doc": doc, "text": text, "initial_score": score, "chunk": position}
+
+
+def label(item):
+    return f"[{item['doc'].fields['file_path']}] {item['text']}"
+
+
+def test_neighbouring_chunks_merge_without_repeating_the_overlap():
+    text = " ".join(f"word{i}" for i in range(400))
+    chunker = TextChunker()
+    chunks = chunker.split_text(text)
+    assert len(chunks) >= 4
+
+    items = [
+        result("a.py", 2, chunks[2], 0.9),
+        result("b.md", 0, "other file", 0.8),
+        result("a.py", 0, chunks[0], 0.7),
+        result("a.py", 1, chunks[1], 0.6),  # closes the gap: 0, 1 and 2 become one span
+    ]
+    packed = pack(items, 10_000, chunker.chunk_overlap, label)
+    assert packed == [f"[a.py] {chunks[0]}{chunks[1][50:]}{chunks[2][50:]}", "[b.md] other file"]
+    assert text.startswith(packed[0][len("[a.py] "):])
+
+
+def test_budget_is_filled_by_score_and_never_exceeded():
+    items = [
+        result("a.py", 0, "a" * 400, 0.9),   # 100 tokens
+        result("b.py", 5, "b" * 800, 0.8),   # too big for what is left
+        result("c.py", None, "c" * 200, 0.7),
+        result("d.py", 3, "d" * 200, 0.6),
+    ]
+    packed = pack(items, 170, 50, label)
+    assert [entry[:6] for entry in packed] == ["[a.py]", "[c.py]"]
+    assert estimate_tokens(SEPARATOR.join(packed)) <= 170
+
+    # Nothing fits: the best result comes back truncated to the budget
+    assert pack(items[1:2], 10, 50, label) == [label(items[1])[:40]]
+    assert pack([], 100, 50, label) == []
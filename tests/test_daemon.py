@@ -0,0 +1,121 @@
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import daemon
+from src import main as cli
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "d.sock"
+
+
+def start_server(path, handlers):
+    server = daemon.DaemonServer(path, handlers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_client_calls_reach_the_daemon_with_its_root(socket_path):
+    calls = []
+
+    def search(root, query, limit=5):
+        calls.append((root, query, limit))
+        return f"{len(calls)} results"
+
+    def broken(root):
+        raise ValueError("index is closed")
+
+    server = start_server(socket_path, {"search": search, "broken": broken})
+    try:
+        client = daemon.DaemonClient(socket_path, "/repo/a", spawn=MagicMock())
+        assert client.call("search", query="q", limit=3) == "1 results"
+        assert client.call("search", query="again") == "2 results"  # same connection
+        assert calls == [("/repo/a", "q", 3), ("/repo/a", "again", 5)]
+        with pytest.raises(RuntimeError, match="index is closed"):
+            client.call("broken")
+        with pytest.raises(RuntimeError, match="Unknown method"):
+            client.call("missing")
+        client._spawn.assert_not_called()
+
+        with pytest.raises(RuntimeError, match="Another daemon"):
+            daemon.DaemonServer(socket_path, {})
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not socket_path.exists()
+
+
+def test_client_starts_the_daemon_when_none_listens(socket_path):
+    servers = []
+    client = daemon.DaemonClient(
+        socket_path, "/repo/a",
+        spawn=lambda: servers.append(start_server(socket_path, {"ping": lambda root: "pong"})),
+    )
+    try:
+        assert client.call("ping") == "pong"
+        assert len(servers) == 1
+
+        # The daemon goes away and comes back: the next call reconnects
+        servers[0].shutdown()
+        servers[0].server_close()
+        assert client.call("ping") == "pong"
+        assert len(servers) == 2
+    finally:
+        client.close()
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_proxy_tools_forward_to_the_daemon():
+    client = MagicMock()
+    client.call.return_value = "Found 1 relevant chunks"
+    with patch.object(cli, "daemon_client", client), patch.object(cli, "indexer") as indexer:
+        assert await cli.search_knowledge_base("query", 3) == "Found 1 relevant chunks"
+        await cli.get_index_stats("*")
+    assert client.call.call_args_list[0].args == ("search",)
+    assert client.call.call_args_list[0].kwargs == {"query": "query", "limit": 3, "project": None}
+    assert client.call.call_args_list[1].kwargs == {"project": "*"}
+    indexer.query.assert_not_called()
+
+
+def test_daemon_that_never_listens_is_spawned_once(socket_path, monkeypatch):
+    monkeypatch.setattr(daemon, "START_TIMEOUT_SECS", 0.2)
+    monkeypatch.setattr(daemon, "CONNECT_RETRY_SECS", 0.01)
+    spawn = MagicMock()
+    client = daemon.DaemonClient(socket_path, "/repo/a", spawn=spawn)
+
+    with pytest.raises(RuntimeError, match="did not start listening"):
+        client.call("ping")
+    spawn.assert_called_once()
+
+
+def test_socket_and_its_directory_are_private(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+    path = shared / "d.sock"
+    # The socket is bound under a private umask, not chmod-ed afterwards
+    chmod = os.chmod
+    with patch("src.daemon.os.chmod", side_effect=lambda p, mode: None if p == path else chmod(p, mode)):
+        server = daemon.DaemonServer(path, {})
+    try:
+        assert path.stat().st_mode & 0o077 == 0
+        assert shared.stat().st_mode & 0o777 == 0o700
+    finally:
+        server.server_close()
+
+    fresh = tmp_path / "new" / "sub" / "d.sock"
+    server = daemon.DaemonServer(fresh, {})
+    server.server_close()
+    assert fresh.parent.stat().st_mode & 0o777 == 0o700
+
+    with patch("src.daemon.os.getuid", return_value=os.getuid() + 1):
+        with pytest.raises(RuntimeError, match="belongs to another user"):
+            daemon.DaemonServer(path, {})
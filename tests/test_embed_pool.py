@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.services.embed_pool import EmbedPool, default_workers
+
+
+class LengthModel:
+    """Embeds a text as [len(text), 1, 0, ...] so results can be checked."""
+
+    def embed(self, texts):
+        for text in texts:
+            if text == "boom":
+                raise ValueError("cannot embed")
+            vec = np.zeros(8, dtype=np.float32)
+            vec[0], vec[1] = len(text), 1
+            yield vec
+
+
+def length_model(model_name, threads):
+    return LengthModel()
+
+
+def crashing_model(model_name, threads):
+    os._exit(3)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = EmbedPool("test-model", workers=2, batch_size=4, factory=length_model)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def test_batches_are_spread_and_reassembled_in_order(pool):
+    texts = ["x" * n for n in range(1, 23)]
+    vectors = pool.embed(texts)
+    assert [int(v[0]) for v in vectors] == list(range(1, 23))
+    assert all(v.dtype == np.float32 and v.shape == (8,) for v in vectors)
+
+
+def test_worker_errors_surface_to_the_caller(pool):
+    with pytest.raises(RuntimeError, match="cannot embed"):
+        pool.embed(["ok", "boom"])
+    assert len(pool.embed(["still works"])) == 1
+
+
+def test_worker_dying_at_startup_fails_fast():
+    pool = EmbedPool("test-model", workers=1, factory=crashing_model)
+    with pytest.raises(RuntimeError, match="did not start"):
+        pool.start()
+
+
+def test_default_workers_is_bounded_by_memory(monkeypatch):
+    monkeypatch.setattr("src.services.embed_pool.os.cpu_count", lambda: 32)
+    monkeypatch.setattr("src.services.embed_pool._available_memory_mb", lambda: 2800)
+    assert default_workers(memory_mb=700) == 2
+    monkeypatch.setattr("src.services.embed_pool._available_memory_mb", lambda: None)
+    assert default_workers() == 16
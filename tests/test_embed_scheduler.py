@@ -0,0 +1,88 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.services.embed_scheduler import INDEX, QUERY, EmbedScheduler
+from src.services.indexer import IndexerService
+
+
+def test_waiting_query_gets_the_next_slot():
+    scheduler = EmbedScheduler()
+    order = []
+    holding = threading.Event()
+    release = threading.Event()
+
+    def index_batch(name, hold=False):
+        with scheduler.slot(INDEX):
+            order.append(name)
+            if hold:
+                holding.set()
+                release.wait(5)
+
+    def query():
+        with scheduler.slot(QUERY):
+            order.append("query")
+
+    first = threading.Thread(target=index_batch, args=("batch-1", True))
+    first.start()
+    assert holding.wait(5)
+    second = threading.Thread(target=index_batch, args=("batch-2",))
+    second.start()
+    time.sleep(0.05)  # batch-2 is queued before the query arrives
+    searcher = threading.Thread(target=query)
+    searcher.start()
+    time.sleep(0.05)
+    release.set()
+    for t in (first, second, searcher):
+        t.join(5)
+
+    assert order == ["batch-1", "query", "batch-2"]
+    assert scheduler.query_waits == 1
+
+
+def test_indexing_embeds_in_scheduler_sized_batches():
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(len(texts))
+        return [np.zeros(384, dtype=np.float32) for _ in texts]
+
+    with patch("src.services.indexer.settings") as settings:
+        settings.embed_batch_size = 8
+        service = IndexerService()
+        service.provider = "fastembed"
+        service.fastembed_model = MagicMock()
+        service.fastembed_model.embed.side_effect = fake_embed
+
+        assert len(service.embed([f"chunk {i}" for i in range(20)])) == 20
+        assert calls == [8, 8, 4]
+
+        calls.clear()
+        service.embed(["query"] * 20, priority=QUERY)
+        assert calls == [20]  # a query is never split
+
+
+def test_query_session_does_not_wait_for_indexing():
+    with patch("src.services.indexer.settings") as settings, \
+         patch("src.services.indexer.TextEmbedding") as model_cls:
+        settings.index_threads = 16
+        settings.query_session = True
+        settings.query_threads = 2
+        index_model, query_model = MagicMock(), MagicMock()
+        model_cls.side_effect = [index_model, query_model]
+        query_model.embed.side_effect = lambda texts: [np.ones(384, dtype=np.float32) for _ in texts]
+
+        service = IndexerService()
+        service.provider = "fastembed"
+        service.model_name = "test-model"
+        service._load_embedding_model()
+        assert [c.kwargs["threads"] for c in model_cls.call_args_list] == [16, 2]
+
+        scheduler = EmbedScheduler()
+        with patch("src.services.indexer.embed_scheduler", scheduler):
+            with scheduler.slot(INDEX):  # an indexing batch is running
+                vecs = service.embed(["query"], priority=QUERY)
+        assert len(vecs) == 1
+        index_model.embed.assert_not_called()
@@ -1,3 +1,4 @@
+import os
 import pytest
 from pathlib import Path
 from unittest.mock import patch
@@ -107,3 +108,98 @@ def test_collect_files(file_filter):
     assert skipped > 0
 
 
+
+
+def test_scan_files_stats_once_and_prunes_skip_dirs(file_filter, project_root):
+    stats, _ = file_filter.scan_files(workers=4)
+    assert stats[project_root / "src" / "main.py"].st_size == len("print('hello')")
+
+    listed = []
+    real_scandir = os.scandir
+
+    def spy(path):
+        listed.append(Path(path).name)
+        return real_scandir(path)
+
+    with patch("src.services.file_filter.os.scandir", side_effect=spy):
+        parallel, skipped = file_filter.scan_files(workers=4)
+    assert "node_modules" not in listed
+    assert set(parallel) == set(file_filter.collect_files()[0])
+
+
+def test_should_index_uses_given_stat(file_filter, project_root):
+    path = project_root / "src" / "main.py"
+    st = path.stat()
+    with patch.object(Path, "stat", side_effect=AssertionError("stat called")):
+        assert file_filter.should_index(path, st) == ""
+
+
+def test_nested_ignore_files(project_root):
+    sub = project_root / "packages" / "app"
+    (sub / "generated").mkdir(parents=True)
+    (sub / "generated" / "bundle.js").write_text("compiled")
+    (sub / "gen.py").write_text("generated")
+    (sub / "keep.log.md").write_text("# notes")
+    (sub / "main.py").write_text("print(1)")
+    (sub / ".gitignore").write_text("generated/\n*.md\n")
+    (sub / ".cursorignore").write_text("gen.py\n")
+    (project_root / ".sourcemcpignore").write_text("!packages/app/keep.log.md\n")
+    ff = FileFilter(project_root)
+
+    assert ff.should_index(sub / "main.py") == ""
+    assert ff.should_index(sub / "gen.py") == "gitignored"
+    assert ff.should_index(sub / "generated" / "bundle.js") == "gitignored"
+    # A deeper file's rules win over the root's re-include
+    assert ff.should_index(sub / "keep.log.md") == "gitignored"
+
+    names = {p.name for p in ff.collect_files()[0]}
+    assert "main.py" in names
+    assert not names & {"gen.py", "bundle.js", "keep.log.md"}
+
+
+def test_invalidate_reloads_rules(file_filter, project_root):
+    assert file_filter.should_index(project_root / "src" / "utils.ts") == ""
+    (project_root / "src" / ".gitignore").write_text("utils.ts\n")
+    assert file_filter.should_index(project_root / "src" / "utils.ts") == ""  # cached rules
+    file_filter.invalidate(project_root / "src")
+    assert file_filter.should_index(project_root / "src" / "utils.ts") == "gitignored"
+
+
+def test_git_excludes_apply_like_gitignore(project_root, tmp_path_factory):
+    import subprocess
+
+    subprocess.run(["git", "init", "-q", str(project_root)], check=True)
+    (project_root / ".git" / "info").mkdir(exist_ok=True)
+    (project_root / ".git" / "info" / "exclude").write_text("scratch.py\n")
+    global_ignore = tmp_path_factory.mktemp("home") / "ignore"
+    global_ignore.write_text("*.ts\nnotes/\n")
+    subprocess.run(
+        ["git", "-C", str(project_root), "config", "core.excludesFile", str(global_ignore)], check=True
+    )
+    (project_root / "scratch.py").write_text("tmp")
+    (project_root / "notes").mkdir()
+    (project_root / "notes" / "todo.md").write_text("# todo")
+    (project_root / "src" / ".gitignore").write_text("!utils.ts\n")  # a .gitignore overrides both
+    ff = FileFilter(project_root / "src" / "..")
+
+    assert ff.should_index(project_root / "scratch.py") == "gitignored"
+    assert ff.should_index(project_root / "notes" / "todo.md") == "gitignored"
+    assert ff.should_index(project_root / "src" / "utils.ts") == ""
+    assert ff.should_index(project_root / "src" / "main.py") == ""
+    names = {p.name for p in ff.collect_files()[0]}
+    assert "main.py" in names and not names & {"scratch.py", "todo.md"}
+
+    # Scoped to a subdirectory of the work tree, patterns still match from its top
+    sub = FileFilter(project_root / "notes")
+    assert sub.should_index(project_root / "notes" / "todo.md") == "gitignored"
+
+
+def test_excluded_prefixes_are_neither_walked_nor_indexed(project_root):
+    index = project_root / ".source-mcp" / "zvec_db.building"
+    index.mkdir(parents=True)
+    (index / "meta.json").write_text("{}")
+    ff = FileFilter(project_root, exclude=(str(project_root / ".source-mcp" / "zvec_db.building") + os.sep,))
+
+    assert ff.should_index(index / "meta.json") == "skip-dir:index"
+    assert "meta.json" not in {p.name for p in ff.collect_files()[0]}
+    assert all(not str(d).startswith(str(index)) for d, _ in ff.walk())
@@ -1,5 +1,8 @@
 import pytest
 import shutil
+import subprocess
+import os
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 import numpy as np
@@ -7,7 +10,9 @@ import zvec
 
 # We need to ensure we patch settings BEFORE importing IndexerService if it uses settings at module level?
 # No, it uses settings inside methods/init.
+from src.services.file_filter import FileFilter
 from src.services.indexer import IndexerService
+from src.services.monitor import MonitorService
 
 @pytest.fixture
 def mock_settings(tmp_path):
@@ -17,6 +22,12 @@ def mock_settings(tmp_path):
         mock_settings.embedding_model = "test-model"
         mock_settings.embedding_provider = "fastembed"
         mock_settings.openai_api_key = None
+        mock_settings.content_hash = True
+        mock_settings.git_scan = True
+        mock_settings.scan_workers = 4
+        mock_settings.embed_batch_size = 32
+        mock_settings.index_threads = None
+        mock_settings.query_session = False
         yield mock_settings
 
 @pytest.fixture
@@ -138,3 +149,678 @@ def test_query_threshold_filtering(indexer, tmp_path, mock_settings, mock_embedd
     # Threshold 0.5 should filter it out
     results = indexer.query("orthogonal", threshold=0.5)
     assert len(results) == 0
+
+def test_index_size_measured_off_hot_path(indexer, mock_settings):
+    import src.services.indexer as indexer_mod
+    from src.services.monitor import monitor
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    for i in range(25):
+        (d / f"doc_{i}.txt").write_text(f"Document number {i}")
+
+    calls = []
+    real_calc = indexer._calc_index_size
+
+    def counting_calc():
+        calls.append(1)
+        return real_calc()
+
+    indexer._calc_index_size = counting_calc
+    with patch.object(indexer_mod, "INDEX_SIZE_REFRESH_SECS", 3600):
+        indexer.index_directory()
+        # Wait for the background measurement to land
+        for _ in range(100):
+            if not indexer._size_refresh_running:
+                break
+            time.sleep(0.05)
+
+    # Rate-limited: one measurement during the scan, one forced at the end (at most)
+    assert 1 <= len(calls) <= 2
+    assert indexer._index_size_mb > 0
+    assert monitor.get_stats()["index_size_mb"] == indexer._index_size_mb
+    assert indexer.get_stats()["index_size_mb"] == round(indexer._index_size_mb, 2)
+
+def test_manifest_persists_and_migrates_legacy_json(mock_settings, mock_embedding_model):
+    import json
+    from src.services.indexer import MANIFEST_NAME
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    p = d / "kept.txt"
+    p.write_text("Kept content")
+    stat = p.stat()
+
+    first = IndexerService()
+    first.initialize()
+    first.collection = None  # release the zvec lock
+    first._close_manifest()
+
+    # A legacy JSON manifest next to an existing collection is imported once
+    legacy = d / MANIFEST_NAME
+    legacy.write_text(json.dumps({
+        str(p): {"fingerprint": {"mtime": stat.st_mtime, "size": stat.st_size}, "chunks": 1},
+    }))
+
+    second = IndexerService()
+    second.initialize()
+    assert not legacy.exists()
+    assert second._needs_reindex(p) is False
+    assert second._manifest.total_chunks() == 1
+
+def test_interrupted_scan_resumes_from_journal(mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    p = d / "long.txt"
+    p.write_text("word " * 400)  # several chunks
+
+    first = IndexerService()
+    first.initialize()
+    first.index_file(str(p))
+    chunks = first._manifest.get(str(p))["chunks"]
+    assert first._journal.pending == 1
+
+    # Crash before any checkpoint: manifest batch is lost, zvec is not flushed
+    first._manifest.close()
+    first._journal.close()
+    first.collection = None
+
+    embed_calls = mock_embedding_model.embed.call_count
+    second = IndexerService()
+    second.initialize()
+
+    # Replayed from the journal without embedding anything again
+    assert mock_embedding_model.embed.call_count == embed_calls
+    assert second._needs_reindex(p) is False
+    assert second._manifest.get(str(p))["chunks"] == chunks
+    assert second._get_total_vectors() == chunks
+    assert second._journal.size() == 0
+
+
+def test_shrinking_file_drops_stale_chunks(indexer, mock_settings):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    p = d / "shrink.txt"
+    p.write_text("word " * 400)
+    indexer.index_file(str(p))
+    assert indexer._get_total_vectors() > 1
+
+    p.write_text("short now")
+    indexer.index_file(str(p))
+    indexer._save_manifest()
+    assert indexer._get_total_vectors() == 1
+    assert indexer._manifest.get(str(p))["chunks"] == 1
+
+def test_touched_but_unchanged_files_skip_embedding(indexer, mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    same, edited = d / "same.txt", d / "edited.txt"
+    same.write_text("unchanged content")
+    edited.write_text("version one")
+    indexer.index_directory()
+    embeds = mock_embedding_model.embed.call_count
+
+    # Branch switch: both mtimes move, only one file's bytes change (same size)
+    edited.write_text("version two")
+    for p in (same, edited):
+        os.utime(p, (time.time() + 10, time.time() + 10))
+    indexer.index_directory()
+
+    assert mock_embedding_model.embed.call_count == embeds + 1
+    assert indexer._manifest.get(str(same))["fingerprint"]["mtime"] == same.stat().st_mtime
+    assert not indexer._needs_reindex(same)
+    assert not indexer._needs_reindex(edited)
+
+def test_large_scan_embeds_through_worker_pool(indexer, mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    for i in range(6):
+        (d / f"doc_{i}.txt").write_text(f"document number {i}")
+    mock_settings.embed_processes = 2
+    pools = []
+
+    class FakePool:
+        def __init__(self, model_name, workers, batch_size):
+            self.workers, self.texts, self.closed = workers, [], False
+            pools.append(self)
+
+        def start(self):
+            pass
+
+        def embed(self, texts):
+            self.texts.extend(texts)
+            return [np.random.rand(384).astype(np.float32) for _ in texts]
+
+        def close(self):
+            self.closed = True
+
+    with patch("src.services.indexer.EmbedPool", FakePool), \
+         patch("src.services.indexer.POOL_MIN_FILES", 5):
+        indexer.index_directory()
+
+    assert len(pools) == 1 and pools[0].workers == 2 and pools[0].closed
+    assert len(pools[0].texts) == 6
+    assert mock_embedding_model.embed.call_count == 0  # nothing embedded in-process
+    assert len(indexer._manifest) == 6
+    assert indexer._embed_pool is None
+
+def test_watch_and_query_embeds_skip_the_scan_pool(indexer, mock_embedding_model):
+    from src.services.embed_scheduler import INDEX, QUERY, WATCH
+
+    pool = MagicMock()
+    pool.embed.side_effect = lambda texts: [np.zeros(384, dtype=np.float32) for _ in texts]
+    indexer._embed_pool = pool  # a scan is running with its worker processes
+    try:
+        assert len(indexer.embed(["saved file"], priority=WATCH)) == 1
+        assert len(indexer.embed(["a query"], priority=QUERY)) == 1
+        assert pool.embed.call_count == 0  # neither waited behind the scan's batches
+        assert mock_embedding_model.embed.call_count == 2
+        indexer.embed(["scanned file"], priority=INDEX)
+        pool.embed.assert_called_once_with(["scanned file"])
+    finally:
+        indexer._embed_pool = None
+
+def test_readiness_moves_from_warming_through_indexing_to_ready(indexer, mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "a.txt").write_text("hello")
+    fresh = indexer.monitor = MonitorService()
+    assert indexer.get_stats()["readiness"] == "warming"
+    indexer.warm_up()
+    assert mock_embedding_model.embed.call_count == 1
+    assert fresh.get_stats()["readiness"] == "indexing 0%"
+    indexer.index_directory()
+    assert indexer.get_stats()["readiness"] == "ready"
+
+def test_scan_skips_files_the_watcher_already_indexed(indexer, mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    edited, other = d / "edited.py", d / "other.py"
+    edited.write_text("x = 1")
+    other.write_text("y = 2")
+
+    indexer._scan_fresh = set()
+    indexer.handle_file_event(str(edited))  # saved while the scan is still queued up
+    indexer._index_files([edited, other])
+    indexer._scan_fresh = None
+
+    assert mock_embedding_model.embed.call_count == 2
+    assert str(edited) in indexer._manifest and str(other) in indexer._manifest
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_git_scan_finds_changes_and_deletions_without_walking(indexer, mock_settings):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    for name in ("keep.py", "edit.py", "gone.py", "revert.py"):
+        (d / name).write_text(f"# {name}\nprint('{name}')\n")
+    _git(d, "init", "-q")
+    _git(d, "add", ".")
+    _git(d, "commit", "-q", "-m", "init")
+    (d / "revert.py").write_text("# dirty while indexed\n")
+    indexer.index_directory()  # first scan walks and records the git state
+    assert indexer._manifest.get_meta("git_state")
+
+    (d / "edit.py").write_text("# edited and committed\n")
+    (d / "gone.py").unlink()
+    _git(d, "commit", "-qam", "edit")
+    (d / "new.py").write_text("# untracked\n")
+    _git(d, "checkout", "-q", "--", "revert.py")
+
+    with patch.object(FileFilter, "scan_files", side_effect=AssertionError("walked")):
+        indexer.index_directory()
+
+    root = indexer.file_filter.root
+    manifest = indexer._manifest
+    assert str(root / "gone.py") not in manifest
+    assert str(root / "new.py") in manifest
+    for name in ("edit.py", "revert.py", "new.py"):
+        assert not indexer._needs_reindex(root / name)
+    total = sum(entry["chunks"] for _, entry in manifest.items())
+    assert indexer._get_total_vectors() == total
+
+def test_git_scan_applies_a_new_ignore_file_below_the_root(indexer, mock_settings):
+    d = Path(mock_settings.docs_path)
+    (d / "newdir").mkdir(parents=True, exist_ok=True)
+    for name in ("c.py", "d.py"):
+        (d / "newdir" / name).write_text(f"print('{name}')\n")
+    _git(d, "init", "-q")
+    _git(d, "add", ".")
+    _git(d, "commit", "-q", "-m", "init")
+    indexer.index_directory()  # caches newdir's (empty) rules
+    root = indexer.file_filter.root
+    assert str(root / "newdir" / "c.py") in indexer._manifest
+
+    (d / "newdir" / ".gitignore").write_text("c.py\n")
+    with patch.object(FileFilter, "scan_files", wraps=indexer.file_filter.scan_files) as walk:
+        indexer.index_directory()
+    assert walk.call_args.args[0] == root / "newdir"  # only the subtree was walked
+    assert str(root / "newdir" / "c.py") not in indexer._manifest
+    assert str(root / "newdir" / "d.py") in indexer._manifest
+
+def test_git_scan_rechecks_files_the_watcher_indexed_then_git_reverted(indexer, mock_settings):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "a.py").write_text("print('committed')\n")
+    _git(d, "init", "-q")
+    _git(d, "add", ".")
+    _git(d, "commit", "-q", "-m", "init")
+    indexer.index_directory()
+    root = indexer.file_filter.root
+    a = root / "a.py"
+
+    a.write_text("print('edited while serving')\n")
+    indexer.handle_file_event(str(a))  # the watcher indexes the edit
+    indexer._save_manifest()           # ... and the server stops
+    _git(d, "checkout", "-q", "--", "a.py")  # reverted while it was down
+
+    assert indexer.index_directory()["to_index"] == 1
+    chunk_id = indexer._chunk_id(str(a), 0)
+    assert "committed" in indexer.collection.fetch([chunk_id])[chunk_id].fields["text"]
+    assert indexer._git_touched() == set()  # the scan covered it
+
+def test_ignore_file_edit_evicts_and_includes_without_rebuild(indexer, mock_settings):
+    from watchdog.events import FileCreatedEvent, FileDeletedEvent
+    from src.services.indexer import DocsEventHandler
+    from src.services.watch_queue import WatchQueue
+
+    d = Path(mock_settings.docs_path)
+    (d / "sub").mkdir(parents=True, exist_ok=True)
+    (d / "sub" / "a.py").write_text("print('a')")
+    (d / "sub" / "b.py").write_text("print('b')")
+    (d / "other.py").write_text("print('other')")
+    indexer.index_directory()
+    root = indexer.file_filter.root
+    queue = WatchQueue(indexer.handle_file_event)
+    queue.start()
+    handler = DocsEventHandler(queue)
+
+    ignore = d / "sub" / ".sourcemcpignore"
+    ignore.write_text("a.py\n")
+    handler.dispatch(FileCreatedEvent(str(ignore)))
+    assert queue.join(timeout=30)
+    assert str(root / "sub" / "a.py") not in indexer._manifest
+    assert str(root / "sub" / "b.py") in indexer._manifest
+    assert str(root / "other.py") in indexer._manifest
+
+    ignore.unlink()
+    handler.dispatch(FileDeletedEvent(str(ignore)))
+    assert queue.join(timeout=30)
+    queue.stop()
+    assert str(root / "sub" / "a.py") in indexer._manifest
+    total = sum(entry["chunks"] for _, entry in indexer._manifest.items())
+    assert indexer._get_total_vectors() == total
+
+def test_directory_move_and_delete_update_the_whole_subtree(indexer, mock_settings):
+    from watchdog.events import DirDeletedEvent, DirMovedEvent
+    from src.services.indexer import DocsEventHandler
+    from src.services.watch_queue import WatchQueue
+
+    d = Path(mock_settings.docs_path)
+    (d / "pkg" / "deep").mkdir(parents=True, exist_ok=True)
+    (d / "pkg" / "a.py").write_text("print('a')")
+    (d / "pkg" / "deep" / "b.py").write_text("print('b')")
+    (d / "pkg_other.py").write_text("print('sibling, not below pkg/')")
+    indexer.index_directory()
+    root = indexer.file_filter.root
+    queue = WatchQueue(indexer.handle_file_event)
+    queue.start()
+    handler = DocsEventHandler(queue)
+
+    (d / "pkg").rename(d / "lib")
+    handler.dispatch(DirMovedEvent(str(d / "pkg"), str(d / "lib")))
+    assert queue.join(timeout=30)
+    assert not indexer._manifest.paths_under(str(root / "pkg") + os.sep)
+    assert str(root / "lib" / "a.py") in indexer._manifest
+    assert str(root / "lib" / "deep" / "b.py") in indexer._manifest
+    assert str(root / "pkg_other.py") in indexer._manifest
+
+    shutil.rmtree(d / "lib")
+    handler.dispatch(DirDeletedEvent(str(d / "lib")))
+    assert queue.join(timeout=30)
+    queue.stop()
+    assert sorted(indexer._manifest.paths()) == [str(root / "pkg_other.py")]
+    assert indexer._get_total_vectors() == indexer._manifest.total_chunks()
+
+def test_indexed_file_the_filter_now_rejects_is_evicted(indexer, mock_settings):
+    from src.services.file_filter import MAX_FILE_SIZE
+    from src.services.poller import ManifestPoller
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    big = d / "notes.txt"
+    big.write_text("small enough")
+    indexer.index_directory()
+    root = indexer.file_filter.root
+    assert str(root / "notes.txt") in indexer._manifest
+
+    big.write_text("x" * (MAX_FILE_SIZE + 1))
+    emitted = []
+    poller = ManifestPoller(
+        indexer.file_filter, indexer._manifest.fingerprint, indexer._manifest.paths, emitted.append
+    )
+    assert poller.poll_once() == 1
+    indexer.handle_file_event(emitted[0])
+    assert str(root / "notes.txt") not in indexer._manifest
+    assert indexer._get_total_vectors() == 0
+    assert poller.poll_once() == 0  # not re-sent every cycle
+
+def test_legacy_encodings_decoded_and_binaries_sniffed_out(indexer, mock_settings):
+    from src.services.monitor import monitor
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "notes.txt").write_bytes("Документация на русском языке.".encode("cp1251"))
+    (d / "blob.txt").write_bytes(b"\x00\x01binary" * 5000)
+    indexer.index_directory()
+
+    root = indexer.file_filter.root
+    assert str(root / "blob.txt") not in indexer._manifest
+    assert monitor.stats["skip_reasons"].get("binary") == 1
+    chunk_id = indexer._chunk_id(str(root / "notes.txt"), 0)
+    doc = indexer.collection.fetch([chunk_id])[chunk_id]
+    assert doc.fields["text"] == "Документация на русском языке."
+
+def test_reindex_builds_shadow_and_swaps_while_serving(indexer, mock_settings):
+    from src.services.indexer import OLD_SUFFIX, SHADOW_SUFFIX
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    a = d / "alpha.txt"
+    a.write_text("Alpha content")
+    indexer.index_file(str(a))
+    indexer._save_manifest()
+    live_path = indexer.zvec_path
+
+    late = d / "late.txt"
+    during = {}
+    real_index_directory = IndexerService.index_directory
+
+    def building(builder):
+        real_index_directory(builder)
+        # The old collection still answers while the new one is being built
+        during["results"] = indexer.query("alpha")
+        during["building_in"] = builder.zvec_path
+        # A watcher event arriving mid-build is recorded for replay after the swap
+        late.write_text("Late content")
+        indexer.index_file(str(late))
+
+    with patch.object(IndexerService, "index_directory", building):
+        indexer.reindex()
+        indexer._rebuild_thread.join(timeout=60)
+
+    assert during["results"]
+    assert during["building_in"] == indexer._side_path(SHADOW_SUFFIX)
+    assert indexer.zvec_path == live_path
+    assert not indexer._side_path(SHADOW_SUFFIX).exists()
+    assert not indexer._side_path(OLD_SUFFIX).exists()
+    assert indexer._needs_reindex(a) is False
+    assert indexer._needs_reindex(late) is False
+    assert indexer._get_total_vectors() == 2
+    assert indexer._pending_events is None
+
+
+def test_rebuild_with_the_index_inside_the_docs_tree_skips_itself(mock_settings, mock_embedding_model):
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    mock_settings.zvec_path = str(d / ".source-mcp" / "zvec_db")  # the default layout
+    for i in range(5):
+        (d / f"doc_{i}.txt").write_text(f"document number {i}")
+    service = IndexerService()
+    service.initialize()
+    service.index_directory()
+
+    assert service.reindex()
+    assert service.wait_for_rebuild()["files"] == 5
+    assert len(service._manifest) == 5
+    assert not [p for p in service._manifest.paths() if ".source-mcp" in p]
+    assert service.index_directory()["to_index"] == 0
+
+
+def test_failed_swap_reopens_the_previous_index(indexer, mock_settings):
+    from src.services.indexer import OLD_SUFFIX, SHADOW_SUFFIX
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    a = d / "alpha.txt"
+    a.write_text("Alpha content")
+    indexer.index_file(str(a))
+    indexer._save_manifest()
+
+    real_open = zvec.open
+    opened = []
+
+    def open_once_broken(path, *args, **kwargs):
+        opened.append(path)
+        if len(opened) == 1:
+            raise RuntimeError("corrupt segment")
+        return real_open(path, *args, **kwargs)
+
+    real_index_directory = IndexerService.index_directory
+
+    def building(builder):
+        real_index_directory(builder)
+        assert indexer.reindex() is False  # one rebuild at a time: a second request is refused
+
+    with patch.object(IndexerService, "index_directory", building), \
+         patch("src.services.indexer.zvec.open", open_once_broken):
+        assert indexer.reindex() is True
+        indexer._rebuild_thread.join(timeout=60)
+
+    assert len(opened) == 2  # the rebuilt collection failed, the previous one was reopened
+    assert indexer.collection is not None and indexer._manifest is not None
+    assert indexer._needs_reindex(a) is False
+    assert indexer.query("alpha")
+    assert not indexer._side_path(SHADOW_SUFFIX).exists()
+    assert not indexer._side_path(OLD_SUFFIX).exists()
+    assert indexer._pending_events is None
+
+
+def test_watcher_event_during_swap_waits_for_the_new_index(indexer, mock_settings):
+    import threading
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    a = d / "alpha.txt"
+    a.write_text("Alpha content")
+    indexer.index_file(str(a))
+    indexer._save_manifest()
+    a.write_text("Alpha content, edited")
+
+    # Mimic _swap_in: manifest and collection are closed under the write lock
+    manifest, collection = indexer._manifest, indexer.collection
+    swapping, handled = threading.Event(), threading.Event()
+
+    def swap():
+        with indexer._write_lock:
+            indexer._manifest = indexer.collection = None
+            swapping.set()
+            handled.wait(0.5)
+            indexer._manifest, indexer.collection = manifest, collection
+
+    def event():
+        indexer.handle_file_event(str(a))
+        handled.set()
+
+    swapper = threading.Thread(target=swap)
+    swapper.start()
+    swapping.wait()
+    worker = threading.Thread(target=event)
+    worker.start()
+    swapper.join()
+    worker.join()
+
+    assert handled.is_set()
+    assert indexer._needs_reindex(a) is False
+    assert "edited" in indexer.query("alpha")[0]
+
+
+def test_model_change_reembeds_stored_text_in_background(mock_settings, mock_embedding_model):
+    import json
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    a = d / "alpha.txt"
+    a.write_text("Alpha content")
+
+    first = IndexerService()
+    first.initialize()
+    first.index_file(str(a))
+    first._save_manifest()
+    first.collection = None
+    first._close_manifest()
+
+    mock_settings.embedding_model = "another-model"
+    embed_calls = mock_embedding_model.embed.call_count
+    # Only the stored chunk text may be used: no scan, before or after the swap
+    with patch.object(IndexerService, "index_directory") as scan:
+        second = IndexerService()
+        second.initialize()
+        # The old collection is opened and served with the model it was built with
+        assert second.collection is not None
+        second._rebuild_thread.join(timeout=60)
+    scan.assert_called_once_with()  # the catch-up scan after the swap
+
+    meta = json.loads((second.zvec_path / "meta.json").read_text())
+    assert meta["model"] == "another-model"
+    assert second._serving_embedder is second
+    assert second._needs_reindex(a) is False
+    # One batched embedding call re-embedded the stored chunk
+    assert mock_embedding_model.embed.call_count == embed_calls + 1
+    results = second.query("alpha")
+    assert len(results) == 1
+    assert "Alpha content" in results[0]
+
+
+def test_snapshot_import_reuses_vectors_for_matching_files(mock_settings, mock_embedding_model, tmp_path):
+    d = Path(mock_settings.docs_path)
+    (d / "sub").mkdir(parents=True)
+    (d / "a.txt").write_text("alpha " * 200)
+    (d / "sub" / "b.txt").write_text("beta content")
+    (d / "c.txt").write_text("gamma content")
+
+    source = IndexerService()
+    source.initialize()
+    source.index_directory()
+    snapshot = tmp_path / "snap.smcp"
+    assert source.export_snapshot(snapshot) == {"files": 3, "chunks": source._manifest.total_chunks(), "stale": 0}
+    original = source.collection.fetch([source._chunk_id(str(d / "a.txt"), 0)])
+    source.close()
+
+    # Another checkout elsewhere: one file differs, one is new
+    other = tmp_path / "checkout"
+    shutil.copytree(d, other)
+    (other / "c.txt").write_text("gamma edited")
+    (other / "d.txt").write_text("delta content")
+    mock_settings.docs_path = str(other)
+    mock_settings.zvec_path = str(tmp_path / "other_index")
+
+    target = IndexerService()
+    target.initialize()
+    embeds = mock_embedding_model.embed.call_count
+    assert target.import_snapshot(snapshot) == {"reused": 2, "unchanged": 0, "mismatched": 1}
+    assert mock_embedding_model.embed.call_count == embeds
+
+    reused = target.collection.fetch([target._chunk_id(str(other / "a.txt"), 0)])
+    assert np.allclose(
+        next(iter(reused.values())).vector("embedding"),
+        next(iter(original.values())).vector("embedding"),
+    )
+    assert target.index_directory()["to_index"] == 2  # c.txt and d.txt only
+    assert mock_embedding_model.embed.call_count == embeds + 2
+
+    mock_settings.embedding_model = "other-model"
+    stranger = IndexerService()
+    stranger.configure()
+    stranger.file_filter = target.file_filter
+    with pytest.raises(ValueError, match="other-model"):
+        stranger.import_snapshot(snapshot)
+
+
+def test_search_filter_is_applied_inside_the_vector_query(indexer, mock_settings):
+    from src.services.search_filter import SearchFilter
+
+    d = Path(mock_settings.docs_path)
+    (d / "src" / "api").mkdir(parents=True)
+    (d / "docs").mkdir()
+    (d / "src" / "api" / "routes.py").write_text("shared topic in python")
+    (d / "src" / "util.ts").write_text("shared topic in typescript")
+    (d / "docs" / "guide.md").write_text("shared topic in markdown")
+    indexer.index_directory()
+
+    fetched = indexer.collection.fetch([indexer._chunk_id(str(d / "src" / "api" / "routes.py"), 0)])
+    assert next(iter(fetched.values())).fields["rel_path"] == "src/api/routes.py"
+
+    def names(where):
+        return sorted(r.split("]")[0] for r in indexer.query("shared topic", 10, where=where))
+
+    assert names(None) == ["[guide.md", "[routes.py", "[util.ts"]
+    assert names(SearchFilter(ext="py,.ts")) == ["[routes.py", "[util.ts"]
+    assert names(SearchFilter(dir="src/api")) == ["[routes.py"]
+    assert names(SearchFilter(language="markdown")) == ["[guide.md"]
+    assert names(SearchFilter(path_glob="src/*.ts")) == ["[util.ts"]
+    assert names(SearchFilter(path_glob="*.py")) == ["[routes.py"]
+    assert names(SearchFilter(dir="docs", ext="py")) == []
+
+    with patch.object(indexer.collection, "query", wraps=indexer.collection.query) as query:
+        indexer.query("shared topic", 10, where=SearchFilter(dir="src", ext="py"))
+    assert query.call_args.kwargs["filter"] == "ext = 'py' AND top_dir = 'src'"
+
+
+def test_schema_upgrade_copies_vectors_without_embedding(mock_settings, mock_embedding_model):
+    import json
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "alpha.md").write_text("Alpha content")
+
+    first = IndexerService()
+    first.initialize()
+    first.index_directory()
+    first.close()
+    first.collection = None
+
+    # An index written before the metadata fields existed has no "schema" in its meta
+    meta_path = first.zvec_path / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    del meta["schema"]
+    meta_path.write_text(json.dumps(meta))
+
+    embeds = mock_embedding_model.embed.call_count
+    with patch.object(IndexerService, "index_directory"):
+        second = IndexerService()
+        second.initialize()
+        assert second._serving_embedder is second  # same model: keeps answering queries
+        second._rebuild_thread.join(timeout=60)
+
+    assert mock_embedding_model.embed.call_count == embeds
+    assert json.loads(meta_path.read_text())["schema"] == 2
+    assert second._meta_fields
+    from src.services.search_filter import SearchFilter
+    assert second.query("alpha", where=SearchFilter(language="markdown")) == ["[alpha.md] Alpha content"]
+
+
+def test_token_budget_packs_neighbouring_chunks_into_one_span(indexer, mock_settings):
+    from src.services.context_pack import estimate_tokens
+
+    d = Path(mock_settings.docs_path)
+    d.mkdir(parents=True, exist_ok=True)
+    text = " ".join(f"line{i}" for i in range(300))
+    (d / "long.md").write_text(text)
+    (d / "short.md").write_text("short note")
+    indexer.index_directory()
+
+    items = indexer.chunk_positions(indexer.search("line", 10))
+    chunks = len(indexer.chunker.split_text(text))
+    assert sorted(item["chunk"] for item in items if "line" in item["text"]) == list(range(chunks))
+
+    packed = indexer.query("line", max_tokens=10_000)
+    assert sorted(packed) == [f"[long.md] {text}", "[short.md] short note"]
+
+    small = indexer.query("line", max_tokens=150)
+    assert small and estimate_tokens("\n\n---\n\n".join(small)) <= 150
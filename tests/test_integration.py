@@ -22,6 +22,9 @@ def integration_indexer(tmp_path):
         mock_settings.embedding_model = "sentence-transformers/all-MiniLM-L6-v2" 
         mock_settings.embedding_provider = "fastembed"
         mock_settings.openai_api_key = None 
+        mock_settings.embed_batch_size = 32
+        mock_settings.index_threads = None
+        mock_settings.query_session = False
         
         with patch("src.services.indexer.TextEmbedding") as MockEmbed:
              # Setup mock behavior
@@ -124,6 +127,9 @@ async def test_zvec_semantic_search(tmp_path):
         mock_settings.embedding_model = "sentence-transformers/all-MiniLM-L6-v2"
         mock_settings.embedding_provider = "fastembed"
         mock_settings.openai_api_key = None
+        mock_settings.embed_batch_size = 32
+        mock_settings.index_threads = None
+        mock_settings.query_session = False
         
         with patch("src.services.indexer.TextEmbedding") as MockEmbed:
             instance = MockEmbed.return_value
@@ -209,3 +215,23 @@ async def test_stats_flow(integration_indexer):
     # assert stats["total_vectors"] == 0 
     # Actually let's assume it's empty start.
     pass
+
+
+@pytest.mark.asyncio
+async def test_batch_search_embeds_once_and_dedupes(integration_indexer, tmp_path):
+    from src.main import search_knowledge_base_batch
+
+    docs_dir = tmp_path / "docs"
+    (docs_dir / "fruits.txt").write_text("The apple is red.")
+    (docs_dir / "yellow.txt").write_text("A banana is yellow.")
+    integration_indexer.index_file(str(docs_dir / "fruits.txt"))
+    integration_indexer.index_file(str(docs_dir / "yellow.txt"))
+
+    with patch.object(integration_indexer, "embed", wraps=integration_indexer.embed) as embed:
+        result = await search_knowledge_base_batch(["apple", "banana", "apple again"], limit=1)
+    embed.assert_called_once()
+    assert result.startswith("Results for 3 queries:")
+    assert "## 1. apple\n\nFound 1 relevant chunks:\n\n[fruits.txt] The apple is red." in result
+    assert "## 2. banana\n\nFound 1 relevant chunks:\n\n[yellow.txt] A banana is yellow." in result
+    assert "## 3. apple again\n\n(+1 chunk already listed under query 1)" in result
+    assert result.count("The apple is red.") == 1
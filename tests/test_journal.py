@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.services import journal as journal_module
+from src.services.journal import IndexJournal, JournalRecord
+
+
+def _record(path: str, n: int = 2) -> JournalRecord:
+    return JournalRecord(
+        path=path,
+        fingerprint={"mtime": 1.5, "size": 42},
+        ids=[f"{path}-{i}" for i in range(n)],
+        texts=[f"chunk {i} of {path}" for i in range(n)],
+        vectors=np.arange(n * 4, dtype=np.float32).reshape(n, 4),
+        stale_ids=[f"{path}-old"],
+    )
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = IndexJournal(tmp_path / "index.journal")
+    yield j
+    j.close()
+
+
+def test_roundtrip(journal):
+    journal.append(_record("/a.py"))
+    journal.append(_record("/b.py", n=3))
+    assert journal.pending == 2
+
+    records = journal.records()
+    assert [r.path for r in records] == ["/a.py", "/b.py"]
+    b = records[1]
+    assert b.fingerprint == {"mtime": 1.5, "size": 42}
+    assert b.texts[2] == "chunk 2 of /b.py"
+    assert b.stale_ids == ["/b.py-old"]
+    np.testing.assert_array_equal(b.vectors, np.arange(12, dtype=np.float32).reshape(3, 4))
+
+
+def test_short_writes_still_store_whole_records(journal, monkeypatch):
+    real_write, synced = os.write, []
+    monkeypatch.setattr(os, "write", lambda fd, data: real_write(fd, bytes(data[:7])))
+    monkeypatch.setattr(journal_module, "_datasync", synced.append)
+
+    journal.append(_record("/a.py"))
+    journal.append(_record("/b.py", n=3))
+
+    assert [r.path for r in journal.records()] == ["/a.py", "/b.py"]
+    assert synced == [journal._fd, journal._fd]
+
+
+def test_removal_record_has_no_vectors(journal):
+    journal.append(JournalRecord(path="/gone.py", fingerprint=None, stale_ids=["x", "y"]))
+    (record,) = journal.records()
+    assert record.fingerprint is None
+    assert record.vectors is None
+    assert record.stale_ids == ["x", "y"]
+
+
+def test_reset_truncates(journal):
+    journal.append(_record("/a.py"))
+    journal.reset()
+    assert journal.pending == 0
+    assert journal.size() == 0
+    assert journal.records() == []
+
+
+def test_torn_tail_is_ignored(journal, tmp_path):
+    journal.append(_record("/a.py"))
+    journal.append(_record("/b.py"))
+    data = (tmp_path / "index.journal").read_bytes()
+    # Simulate a crash in the middle of the second append
+    (tmp_path / "index.journal").write_bytes(data[: len(data) - 10])
+
+    assert [r.path for r in journal.records()] == ["/a.py"]
+
+
+def test_corrupt_record_stops_replay(journal, tmp_path):
+    journal.append(_record("/a.py"))
+    first_len = journal.size()
+    journal.append(_record("/b.py"))
+    data = bytearray((tmp_path / "index.journal").read_bytes())
+    data[first_len + 20] ^= 0xFF
+    (tmp_path / "index.journal").write_bytes(bytes(data))
+
+    assert [r.path for r in journal.records()] == ["/a.py"]
@@ -0,0 +1,179 @@
+import json
+import sqlite3
+
+import pytest
+
+from src.services.manifest import ManifestStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "index" / "manifest.db"
+
+
+def test_put_get_and_totals(db_path):
+    store = ManifestStore(db_path)
+    store.put("/a.py", {"mtime": 1.0, "size": 10}, 3)
+    store.put("/b.py", {"mtime": 2.0, "size": 20}, 4)
+    store.put("/a.py", {"mtime": 3.0, "size": 11}, 1)  # upsert
+
+    assert len(store) == 2
+    assert "/a.py" in store
+    assert store.get("/a.py") == {"fingerprint": {"mtime": 3.0, "size": 11}, "chunks": 1}
+    assert store.total_chunks() == 5
+
+    store.remove("/b.py")
+    assert "/b.py" not in store
+    assert store.total_chunks() == 1
+    store.close()
+
+
+def test_commit_is_durable(db_path):
+    store = ManifestStore(db_path)
+    store.put("/a.py", {"mtime": 1.0, "size": 10}, 3)
+    store.commit()
+    store.close()
+
+    reopened = ManifestStore(db_path)
+    assert reopened.get("/a.py")["chunks"] == 3
+    assert reopened.total_chunks() == 3
+    reopened.close()
+
+
+def test_uncommitted_writes_are_rolled_back(db_path):
+    store = ManifestStore(db_path)
+    store.put("/a.py", {"mtime": 1.0, "size": 10}, 3)
+    store.commit()
+    store.put("/b.py", {"mtime": 2.0, "size": 20}, 4)
+    store.close()  # simulates a crash before the next batch commit
+
+    reopened = ManifestStore(db_path)
+    assert "/a.py" in reopened
+    assert "/b.py" not in reopened
+    reopened.close()
+
+
+def test_uses_wal_mode(db_path):
+    ManifestStore(db_path).close()
+    conn = sqlite3.connect(str(db_path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_import_legacy_json(db_path, tmp_path):
+    legacy = tmp_path / ".source-mcp_manifest.json"
+    legacy.write_text(json.dumps({
+        "/a.py": {"fingerprint": {"mtime": 1.0, "size": 10}, "chunks": 2},
+        "/b.md": {"fingerprint": {"mtime": 2.0, "size": 5}, "chunks": 1},
+    }, indent=2))
+
+    store = ManifestStore(db_path)
+    assert store.import_json(legacy) == 2
+    store.close()
+
+    reopened = ManifestStore(db_path)
+    assert reopened.get("/b.md") == {"fingerprint": {"mtime": 2.0, "size": 5}, "chunks": 1}
+    assert reopened.total_chunks() == 3
+    reopened.close()
+
+
+def test_corrupt_db_starts_empty(db_path):
+    db_path.parent.mkdir(parents=True)
+    db_path.write_bytes(b"not a sqlite database" * 100)
+
+    store = ManifestStore(db_path)
+    assert len(store) == 0
+    store.put("/a.py", {"mtime": 1.0, "size": 10}, 1)
+    store.commit()
+    store.close()
+
+
+def test_content_hash_persists(db_path):
+    store = ManifestStore(db_path)
+    store.put("/a.py", {"mtime": 1.0, "size": 10, "hash": "blake2b:ab"}, 2)
+    store.commit()
+    store.close()
+
+    reopened = ManifestStore(db_path)
+    assert reopened.get("/a.py")["fingerprint"]["hash"] == "blake2b:ab"
+    reopened.close()
+
+
+def test_schema_without_hash_column_is_upgraded(db_path):
+    db_path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, chunks INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("INSERT INTO files VALUES ('/a.py', 1.0, 10, 2)")
+    conn.commit()
+    conn.close()
+
+    store = ManifestStore(db_path)
+    assert store.get("/a.py") == {"fingerprint": {"mtime": 1.0, "size": 10}, "chunks": 2}
+    store.put("/a.py", {"mtime": 2.0, "size": 10, "hash": "blake2b:cd"}, 2)
+    store.commit()
+    store.close()
+
+
+def test_meta_is_transactional(db_path):
+    store = ManifestStore(db_path)
+    store.set_meta("git_state", '{"head": "abc"}')
+    store.commit()
+    store.set_meta("git_state", '{"head": "def"}')
+    store.close()
+
+    reopened = ManifestStore(db_path)
+    assert reopened.get_meta("git_state") == '{"head": "abc"}'
+    assert reopened.get_meta("missing") is None
+    reopened.close()
+
+
+def test_hashes_and_removed_rows_round_trip(db_path):
+    digest = "xxh3_128:" + "0f" * 16
+    store = ManifestStore(db_path)
+    store.put("/src/a.py", {"mtime": 1.5, "size": 10, "hash": digest}, 2)
+    store.put("/src/b.py", {"mtime": 2.0, "size": 20}, 1)
+    store.remove("/src/a.py")
+    store.put("/docs/c.md", {"mtime": 3.0, "size": 30, "hash": "blake2b:ab"}, 4)  # reuses a's row
+
+    assert store.fingerprint("/src/a.py") is None
+    assert store.fingerprint("/docs/c.md") == {"mtime": 3.0, "size": 30, "hash": "blake2b:ab"}
+    assert store.chunks("/docs/c.md") == 4
+    assert sorted(store.paths()) == ["/docs/c.md", "/src/b.py"]
+    assert store.total_chunks() == 5
+
+    store.put("/src/a.py", {"mtime": 1.5, "size": 10, "hash": digest}, 2)
+    assert store.fingerprint("/src/a.py")["hash"] == digest
+    store.commit()
+    store.close()
+
+    reopened = ManifestStore(db_path)
+    assert reopened.get("/src/a.py") == {"fingerprint": {"mtime": 1.5, "size": 10, "hash": digest}, "chunks": 2}
+    assert len(reopened) == 3
+    reopened.close()
+
+
+def test_hex_text_hashes_move_to_binary_digests(db_path):
+    db_path.parent.mkdir(parents=True)
+    digest = "blake2b:" + "a1" * 16
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, chunks INTEGER, hash TEXT)")
+    conn.execute("INSERT INTO files VALUES ('/a.py', 1.0, 10, 2, ?)", (digest,))
+    conn.execute("INSERT INTO files VALUES ('/b.py', 2.0, NULL, 1, 'odd:xyz')")
+    conn.commit()
+    conn.close()
+
+    store = ManifestStore(db_path)
+    assert store.fingerprint("/a.py") == {"mtime": 1.0, "size": 10, "hash": digest}
+    assert store.fingerprint("/b.py") == {"mtime": 2.0, "size": None, "hash": "odd:xyz"}
+    store.put("/c.py", {"mtime": 3.0, "size": 5, "hash": "xxh3_128:" + "0b" * 16}, 1)
+    store.commit()
+    store.close()
+
+    conn = sqlite3.connect(str(db_path))
+    assert conn.execute("SELECT hash, length(digest) FROM files WHERE path = '/a.py'").fetchone() == (None, 16)
+    assert [name for (name,) in conn.execute("SELECT name FROM hash_algos ORDER BY id")] == ["blake2b", "xxh3_128"]
+    conn.close()
+    reopened = ManifestStore(db_path)
+    assert reopened.fingerprint("/c.py")["hash"] == "xxh3_128:" + "0b" * 16
+    assert reopened.fingerprint("/a.py")["hash"] == digest
+    reopened.close()
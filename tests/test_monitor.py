@@ -0,0 +1,33 @@
+import sys
+import threading
+
+from src.services.monitor import MonitorService
+
+
+def test_counters_do_not_lose_concurrent_updates():
+    monitor = MonitorService()
+    monitor.begin_scan(40000)
+
+    def work():
+        for _ in range(5000):
+            monitor.file_indexed(2)
+            monitor.file_failed()
+            monitor.file_skipped("binary")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible to expose lost updates
+    try:
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    stats = monitor.get_stats()
+    assert stats["files_indexed"] == 40000
+    assert stats["total_chunks"] == 80000
+    assert stats["files_failed"] == 40000
+    assert stats["files_skipped"] == 40000
+    assert stats["skip_reasons"] == {"binary": 40000}
@@ -0,0 +1,104 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.services.file_filter import FileFilter
+from src.services.indexer import IndexerService
+from src.services.poller import ManifestPoller
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("print('a')")
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("x")
+    return tmp_path.resolve()
+
+
+def _poller(tree, manifest, emitted, **kwargs):
+    return ManifestPoller(
+        FileFilter(tree),
+        lookup=manifest.get,
+        known_paths=lambda: list(manifest),
+        emit=emitted.append,
+        **kwargs,
+    )
+
+
+def _index(manifest, path):
+    st = os.stat(path)
+    manifest[str(path)] = {"mtime": st.st_mtime, "size": st.st_size}  # path -> stored fingerprint
+
+
+def test_reports_new_modified_and_deleted_files(tree):
+    manifest, emitted = {}, []
+    poller = _poller(tree, manifest, emitted)
+    a = tree / "src" / "a.py"
+
+    poller.poll_once()
+    assert emitted == [str(a)]  # node_modules is pruned
+
+    _index(manifest, a)
+    emitted.clear()
+    poller.poll_once()
+    assert emitted == []
+
+    a.write_text("print('changed')")
+    poller.poll_once()
+    assert emitted == [str(a)]
+
+    _index(manifest, a)
+    a.unlink()
+    emitted.clear()
+    poller.poll_once()
+    assert emitted == [str(a)]
+
+
+def test_rejected_file_is_reported_once_per_version(tree):
+    manifest, emitted = {}, []
+    poller = _poller(tree, manifest, emitted)
+    poller.poll_once()
+    poller.poll_once()  # the indexer never took it (e.g. undecodable)
+    assert len(emitted) == 1
+
+    a = tree / "src" / "a.py"
+    a.write_text("print('a new version')")
+    poller.poll_once()
+    assert len(emitted) == 2
+
+
+def test_cpu_budget_spreads_the_cycle(tree):
+    for i in range(300):
+        (tree / "src" / f"m{i}.py").write_text("x = 1")
+    poller = _poller(tree, {}, [], cpu_budget=0.5)
+    with patch("src.services.poller._SLICE_SECS", 0.0), patch.object(poller._stop, "wait") as wait:
+        poller.poll_once()
+    assert wait.called
+    assert all(call.args[0] >= 0 for call in wait.call_args_list)
+
+
+def test_auto_mode_falls_back_to_polling_when_native_fails(tree):
+    with patch("src.services.indexer.settings") as settings, \
+         patch("src.services.indexer.Observer") as observer_cls:
+        settings.docs_path = str(tree)
+        settings.zvec_path = str(tree / ".source-mcp" / "zvec_db")
+        settings.watch_mode = "auto"
+        settings.watch_workers = 1
+        settings.watch_queue_size = 100
+        settings.poll_interval = 60.0
+        settings.poll_cpu_budget = 0.1
+        observer_cls.return_value.is_alive.return_value = False
+        observer_cls.return_value.start.side_effect = OSError(24, "inotify instance limit reached")
+
+        idx = IndexerService()
+        idx.file_filter = FileFilter(tree)
+        idx.start_watching()
+        try:
+            assert isinstance(idx.observer, ManifestPoller)
+            assert idx.observer.is_alive()
+        finally:
+            idx.stop_watching()
@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.services.indexer import IndexerService
+from src.services.projects import ALL_PROJECTS, ProjectRegistry, group_batch
+
+
+def fake_embed(texts):
+    for t in texts:
+        v = np.zeros(384, dtype=np.float32)
+        v[0 if "apple" in t else 1] = 1.0
+        yield v
+
+
+@pytest.fixture
+def registry(tmp_path):
+    main_root, other_root = tmp_path / "main", tmp_path / "other"
+    main_root.mkdir()
+    other_root.mkdir()
+    (main_root / "fruit.txt").write_text("apple pie recipe")
+    (other_root / "notes.txt").write_text("apple orchard notes")
+    (other_root / "misc.txt").write_text("unrelated text")
+
+    with patch("src.services.indexer.settings") as settings, \
+         patch("src.services.indexer.TextEmbedding") as model_cls, \
+         patch("src.services.indexer.TextCrossEncoder"):
+        settings.docs_path = str(main_root)
+        settings.zvec_path = str(main_root / ".source-mcp" / "zvec_db")
+        settings.embedding_model = "test-model"
+        settings.embedding_provider = "fastembed"
+        settings.openai_api_key = None
+        settings.content_hash = True
+        settings.git_scan = False
+        settings.scan_workers = 4
+        settings.embed_batch_size = 32
+        settings.index_threads = None
+        settings.query_session = False
+        settings.embed_processes = 1
+        model_cls.return_value.embed.side_effect = fake_embed
+
+        primary = IndexerService()
+        primary.initialize()
+        registry = ProjectRegistry(primary)
+        other = registry.add(str(other_root))
+        registry.index_all()
+        yield registry, primary, other, model_cls
+
+
+def test_extra_roots_get_their_own_index_and_share_the_model(registry, tmp_path):
+    registry, primary, other, model_cls = registry
+    assert model_cls.call_count == 1  # one model for both projects
+    assert other.fastembed_model is primary.fastembed_model
+    assert other.zvec_path == tmp_path / "other" / ".source-mcp" / "zvec_db"
+    assert registry.names() == ["main", "other"]
+    assert primary._get_total_vectors() == 1
+    assert other._get_total_vectors() == 2
+
+
+def test_project_selector_and_fan_out(registry, tmp_path):
+    registry, primary, other, _ = registry
+    assert registry.query("apple", 5) == ["[fruit.txt] apple pie recipe"]
+    assert registry.query("apple", 5, project="other")[0] == "[notes.txt] apple orchard notes"
+    assert registry.query("apple", 5, project=str(tmp_path / "other"))[0].startswith("[notes.txt]")
+
+    merged = registry.query("apple", 2, project=ALL_PROJECTS)
+    assert sorted(merged) == ["[main:fruit.txt] apple pie recipe", "[other:notes.txt] apple orchard notes"]
+
+    packed = registry.query("apple", project=ALL_PROJECTS, max_tokens=1000)
+    assert sorted(packed) == [
+        "[main:fruit.txt] apple pie recipe", "[other:misc.txt] unrelated text", "[other:notes.txt] apple orchard notes",
+    ]
+
+    with pytest.raises(KeyError, match="Available: main, other"):
+        registry.select("missing")
+
+
+def test_batch_fan_out_embeds_once_and_groups(registry):
+    registry, primary, other, model_cls = registry
+    calls = model_cls.return_value.embed.call_count
+    results = registry.query_batch(["apple", "unrelated"], 1, project=ALL_PROJECTS)
+    assert model_cls.return_value.embed.call_count == calls + 1
+    assert results[0][0].endswith("apple pie recipe") or results[0][0].endswith("apple orchard notes")
+    assert results[1] == ["[other:misc.txt] unrelated text"]
+
+    found = registry.search_batch(["apple", "apple orchard"], 5, project=ALL_PROJECTS)
+    assert all(item["chunk"] == 0 for items in found for item in items)
+    groups = group_batch(["apple", "apple orchard"], found)
+    assert sorted(groups[0]["results"]) == sorted(registry.query_batch(["apple"], 5, project=ALL_PROJECTS)[0])
+    assert groups[1] == {"query": "apple orchard", "results": [], "repeated": {0: 3}}
+
+
+def test_group_batch_dedupes_chunks_not_their_text():
+    def item(project, path, chunk, text="same text"):
+        return {"doc": MagicMock(id=f"{path}:{chunk}", fields={"file_path": path}), "text": text,
+                "project": project, "chunk": chunk}
+
+    x, y, z = item("main", "/m/a/util.py", 0), item("main", "/m/b/util.py", 0), item("other", "/o/a/util.py", 0)
+    groups = group_batch(["a", "b", "c"], [[x, y], [item("main", "/m/b/util.py", 0), z], [x]])
+    # Three different chunks, although a and b's two format identically
+    assert groups == [
+        {"query": "a", "results": ["[main:util.py] same text"] * 2, "repeated": {}},
+        {"query": "b", "results": ["[other:util.py] same text"], "repeated": {0: 1}},
+        {"query": "c", "results": [], "repeated": {0: 1}},
+    ]
+
+
+def test_ensure_refuses_a_project_indexed_with_another_model(registry, tmp_path):
+    registry, primary, other, _ = registry
+    third = tmp_path / "third"
+    db = third / ".source-mcp" / "zvec_db"
+    db.mkdir(parents=True)
+    meta = '{"provider": "openai", "model": "text-embedding-3-small", "dimension": 1536, "schema": 2}'
+    (db / "meta.json").write_text(meta)
+
+    with pytest.raises(ValueError, match="indexed with openai/text-embedding-3-small"):
+        registry.ensure(str(third))
+    assert registry.names() == ["main", "other"]
+    assert (db / "meta.json").read_text() == meta  # left alone, nothing migrated
+
+    # Same model (or no index yet): opened as usual
+    assert registry.ensure(str(tmp_path / "other")) is other
+    fresh = tmp_path / "fresh"
+    fresh.mkdir()
+    with patch.object(IndexerService, "start_watching"), patch.object(IndexerService, "index_directory"):
+        registry.ensure(str(fresh))
+    assert registry.names() == ["main", "other", "fresh"]
+
+
+def test_each_project_keeps_its_own_scan_progress(registry):
+    registry, primary, other, _ = registry
+    assert other.monitor is not primary.monitor
+    assert primary.monitor.stats["files_indexed"] == 1
+    assert other.monitor.stats["files_indexed"] == 2
+
+    registry.warm_up()
+    assert registry.readiness(ALL_PROJECTS) == "ready"
+    other.monitor.begin_scan(4)  # a rescan of the other project starts
+    assert registry.readiness() == "ready"
+    assert registry.readiness("other") == "indexing 0%"
+    assert registry.readiness(ALL_PROJECTS) == "other: indexing 0%"
+    assert primary.monitor.stats["files_discovered"] == 1
@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.services.scan_order import prioritize
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+
+def _stats(mtimes):
+    return {Path(p): SimpleNamespace(st_mtime=m) for p, m in mtimes.items()}
+
+
+def test_recent_files_come_first():
+    stats = _stats({"/r/old.py": NOW - 90 * DAY, "/r/new.py": NOW, "/r/mid.py": NOW - 3 * DAY})
+    order = prioritize(list(stats), stats)
+    assert [p.name for p in order] == ["new.py", "mid.py", "old.py"]
+
+
+def test_files_near_recent_edits_beat_distant_trees():
+    stats = _stats({
+        "/r/app/api/handlers.py": NOW,  # just edited
+        "/r/app/api/routes.py": NOW - 30 * DAY,
+        "/r/third_party/lib/deep/util.py": NOW - 30 * DAY,
+    })
+    order = prioritize(list(stats), stats)
+    assert order.index(Path("/r/app/api/routes.py")) < order.index(Path("/r/third_party/lib/deep/util.py"))
+
+
+def test_source_before_docs_before_config():
+    stats = _stats({"/r/a/settings.yaml": NOW, "/r/a/guide.md": NOW, "/r/a/main.go": NOW})
+    order = prioritize(list(stats), stats)
+    assert [p.suffix for p in order] == [".go", ".md", ".yaml"]
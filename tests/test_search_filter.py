@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from src.services.search_filter import SearchFilter, chunk_metadata
+
+
+def test_chunk_metadata_is_relative_to_the_root(tmp_path):
+    meta = chunk_metadata(str(tmp_path / "src" / "api" / "Routes.PY"), tmp_path, 12)
+    assert meta == {
+        "rel_path": "src/api/Routes.PY",
+        "ext": "py",
+        "top_dir": "src",
+        "language": "python",
+        "mtime": 12.0,
+    }
+    root_file = chunk_metadata(str(tmp_path / "Dockerfile"), tmp_path, None)
+    assert (root_file["top_dir"], root_file["ext"], root_file["language"]) == ("", "", "dockerfile")
+    assert chunk_metadata("/elsewhere/x.md", tmp_path, None)["rel_path"] == "/elsewhere/x.md"
+
+
+def test_filter_expression_and_exact_match():
+    assert not SearchFilter()
+    assert SearchFilter().expression() is None
+    assert SearchFilter(ext=".PY").expression() == "ext = 'py'"
+    assert SearchFilter(ext="ts, tsx").expression() == "ext IN ('ts', 'tsx')"
+    assert SearchFilter(dir="/src/").expression() == "top_dir = 'src'"
+    assert SearchFilter(dir="src\\api").expression() == "rel_path LIKE 'src/api/%'"
+    assert SearchFilter(path_glob="src/**/test_*.py").expression() == "rel_path LIKE 'src/%test_%.py'"
+    assert SearchFilter(path_glob="*.md", language="Markdown").expression() == (
+        "language = 'markdown' AND rel_path LIKE '%.md'"
+    )
+    # No escaping in zvec string literals: such values are only checked afterwards
+    assert SearchFilter(dir="it's").expression() is None
+
+    def meta(rel):
+        return chunk_metadata(rel, Path("/nowhere"), None)
+
+    glob = SearchFilter(path_glob="src/*.py")
+    assert glob.matches(meta("src/main.py"))
+    assert not glob.matches(meta("src/services/indexer.py"))  # LIKE matches it, the glob does not
+    deep = SearchFilter(path_glob="src/**/*.py")
+    assert deep.matches(meta("src/main.py")) and deep.matches(meta("src/services/indexer.py"))
+    anywhere = SearchFilter(path_glob="test_*.py")
+    assert anywhere.matches(meta("test_a.py")) and anywhere.matches(meta("tests/test_a.py"))
+    assert SearchFilter(dir="src", ext="py").matches(meta("src/a.py"))
+    assert not SearchFilter(dir="src").matches(meta("srcx/a.py"))
+    assert not SearchFilter(language="python").matches(meta("a.md"))
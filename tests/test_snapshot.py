@@ -0,0 +1,44 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from src.services.snapshot import SnapshotEntry, SnapshotReader, SnapshotWriter, portable_hash
+
+
+def test_entries_round_trip_through_a_compressed_file(tmp_path):
+    path = tmp_path / "index.smcp"
+    writer = SnapshotWriter(path, "fastembed", "test-model", 4)
+    vectors = np.arange(8, dtype=np.float32).reshape(2, 4)
+    writer.add(SnapshotEntry("docs/a.md", portable_hash(b"a"), ["one", "two"], vectors))
+    writer.add(SnapshotEntry("b.py", portable_hash(b"b"), ["three"], vectors[:1]))
+    with pytest.raises(ValueError):
+        writer.add(SnapshotEntry("c.py", portable_hash(b"c"), ["four"], vectors))
+    assert not path.exists()  # only renamed into place on close
+    writer.close()
+
+    with SnapshotReader(path) as reader:
+        assert reader.header["model"] == "test-model"
+        entries = list(reader)
+    assert [e.path for e in entries] == ["docs/a.md", "b.py"]
+    assert entries[0].texts == ["one", "two"]
+    assert np.array_equal(entries[0].vectors, vectors)
+    assert entries[1].hash == portable_hash(b"b")
+
+
+def test_truncated_or_foreign_files_are_rejected(tmp_path):
+    path = tmp_path / "index.smcp"
+    writer = SnapshotWriter(path, "fastembed", "test-model", 4)
+    writer.add(SnapshotEntry("a.md", portable_hash(b"a"), ["one"], np.ones((1, 4), dtype=np.float32)))
+    writer.close()
+
+    truncated = tmp_path / "truncated.smcp"
+    truncated.write_bytes(gzip.compress(gzip.decompress(path.read_bytes())[:-3]))
+    with pytest.raises(ValueError, match="truncated"):
+        with SnapshotReader(truncated) as reader:
+            list(reader)
+
+    foreign = tmp_path / "foreign.smcp"
+    foreign.write_bytes(gzip.compress(b"not a snapshot"))
+    with pytest.raises(ValueError, match="not a source-mcp snapshot"):
+        SnapshotReader(foreign)
@@ -0,0 +1,64 @@
+import codecs
+
+from src.services.text_sniff import SNIFF_BYTES, decode, sniff
+
+RUSSIAN = "Привет, мир! Это документация проекта на русском языке.\n" * 20
+
+
+def test_utf8_and_ascii():
+    assert sniff(b"print('hello')\n") == ("utf-8", "")
+    assert sniff(RUSSIAN.encode("utf-8")) == ("utf-8", "")
+
+
+def test_utf8_prefix_cut_mid_character():
+    data = RUSSIAN.encode("utf-8")
+    assert sniff(data[:101]) == ("utf-8", "")  # 101 splits a 2-byte character
+
+
+def test_boms():
+    assert sniff(codecs.BOM_UTF8 + b"x = 1") == ("utf-8-sig", "")
+    assert sniff(RUSSIAN.encode("utf-16")) == ("utf-16", "")
+    assert sniff("abc".encode("utf-32")) == ("utf-32", "")
+
+
+def test_bomless_utf16():
+    encoding, _ = sniff("# README\nplain ascii text\n".encode("utf-16-le"))
+    assert encoding == "utf-16-le"
+
+
+def test_binary_is_rejected():
+    assert sniff(b"\x7fELF\x02\x01\x01\x00\x00\x00" + bytes(range(256))) == (None, "binary")
+    assert sniff(b"\x01\x02\x03\x04\x05\x06" * 50) == (None, "binary")
+    # Strings between NULs would read as CJK text in UTF-16
+    assert sniff(b"\x00\x01binary" * 1000) == (None, "binary")
+
+
+def test_cp1251_russian_is_decoded():
+    data = RUSSIAN.encode("cp1251")
+    encoding, reason = sniff(data)
+    assert reason == ""
+    assert decode(data, encoding) == RUSSIAN
+
+
+def test_koi8r_russian_is_decoded():
+    data = RUSSIAN.encode("koi8_r")
+    encoding, _ = sniff(data)
+    assert decode(data, encoding) == RUSSIAN
+
+
+def test_legacy_text_after_an_ascii_prefix_is_not_replaced():
+    data = b"x = 1\n" * 2000 + RUSSIAN.encode("cp1251")
+    assert len(data) > SNIFF_BYTES
+    encoding, _ = sniff(data[:SNIFF_BYTES])
+    assert encoding == "utf-8"
+    assert decode(data, encoding) == data[:12000].decode("ascii") + RUSSIAN
+
+
+def test_bomless_utf16_non_latin():
+    for encoding in ("utf-16-le", "utf-16-be"):
+        data = RUSSIAN.encode(encoding)
+        assert sniff(data[:SNIFF_BYTES]) == (encoding, "")
+        assert decode(data, encoding) == RUSSIAN
+    # No spaces or ASCII at all: no NULs, only 0x04 high bytes
+    data = ("Привет" * 100).encode("utf-16-le")
+    assert sniff(data) == ("utf-16-le", "")
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+from src.services.indexer import DocsEventHandler
+from src.services.watch_queue import WatchQueue
+
+
+def test_events_for_the_same_path_coalesce():
+    handled = []
+    gate = threading.Event()
+
+    def handle(path):
+        gate.wait(5)
+        handled.append(path)
+
+    queue = WatchQueue(handle, workers=1)
+    queue.start()
+    queue.put("/busy")  # occupies the only worker
+    for _ in range(5):
+        queue.put("/a")
+    queue.put("/b")
+    assert queue.depth() == 3
+    gate.set()
+    assert queue.join(timeout=5)
+    queue.stop()
+
+    assert sorted(handled) == ["/a", "/b", "/busy"]
+
+
+def test_same_path_is_never_handled_concurrently():
+    running = set()
+    overlaps = []
+    calls = []
+
+    def handle(path):
+        if path in running:
+            overlaps.append(path)
+        running.add(path)
+        time.sleep(0.02)
+        running.discard(path)
+        calls.append(path)
+
+    queue = WatchQueue(handle, workers=4)
+    queue.start()
+    for _ in range(20):
+        queue.put("/hot")
+        time.sleep(0.005)
+    assert queue.join(timeout=5)
+    queue.stop()
+
+    assert not overlaps
+    assert 1 < len(calls) < 20  # re-queued while busy, coalesced while waiting
+
+
+def test_full_queue_blocks_the_producer():
+    gate = threading.Event()
+    depths = []
+    queue = WatchQueue(lambda path: gate.wait(5), workers=1, capacity=2, on_depth=depths.append)
+    queue.start()
+    queue.put("/1")
+    time.sleep(0.05)  # "/1" is now being handled
+    queue.put("/2")
+    queue.put("/3")
+
+    producer = threading.Thread(target=queue.put, args=("/4",))
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()  # backpressure
+
+    gate.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert queue.join(timeout=5)
+    queue.stop()
+    assert max(depths) == 3 and depths[-1] == 0
+
+
+def test_handler_enqueues_and_suppresses_index_dir():
+    queued = []
+
+    class Recorder:
+        def put(self, path):
+            queued.append(path)
+
+    handler = DocsEventHandler(Recorder(), suppressed=("/proj/.source-mcp/zvec_db/",))
+    handler.dispatch(FileModifiedEvent("/proj/src/a.py"))
+    handler.dispatch(FileModifiedEvent("/proj/.source-mcp/zvec_db/manifest.db-wal"))
+    handler.dispatch(FileMovedEvent("/proj/src/.a.py.swp", "/proj/src/a.py"))
+
+    assert queued == ["/proj/src/a.py", "/proj/src/.a.py.swp", "/proj/src/a.py"]
+
+
+def test_handler_enqueues_directory_deletes_and_moves_but_not_modifications():
+    queued = []
+
+    class Recorder:
+        def put(self, path):
+            queued.append(path)
+
+    handler = DocsEventHandler(Recorder(), suppressed=("/proj/.source-mcp/zvec_db/",))
+    handler.dispatch(DirModifiedEvent("/proj/src"))
+    handler.dispatch(DirMovedEvent("/proj/src/pkg", "/proj/lib/pkg"))
+    handler.dispatch(DirDeletedEvent("/proj/old"))
+    handler.dispatch(DirCreatedEvent("/proj/.source-mcp/zvec_db"))
+
+    assert queued == ["/proj/src/pkg", "/proj/lib/pkg", "/proj/old"]
+